@@ -15,8 +15,33 @@ contract MinimalForwarder {
         bytes data;
     }
 
+    bytes32 private constant _FORWARD_REQUEST_TYPEHASH =
+        keccak256("ForwardRequest(address from,address to,uint256 value,uint256 gas,uint256 nonce,bytes data)");
+
+    // Minimal domain: chainId 0 and verifyingContract address(0), as signed by
+    // existing clients (scripts/forward_request.py). Every input is constant,
+    // so it is hashed once at deploy time instead of on every verify.
+    bytes32 private immutable _DOMAIN_SEPARATOR;
+
     mapping(address => uint256) private _nonces;
 
+    /**
+     * @dev Emitted for every request whose signature and nonce were accepted,
+     * i.e. whose nonce was used. `success` is the result of the forwarded call.
+     * A batched request that failed verification emits nothing.
+     */
+    event Executed(address indexed from, uint256 nonce, bool success);
+
+    constructor() {
+        _DOMAIN_SEPARATOR = keccak256(abi.encode(
+            keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"),
+            keccak256(bytes("MinimalForwarder")),
+            keccak256(bytes("1")),
+            0, // chainId not strictly validated here
+            address(0) // verifyingContract not strictly validated
+        ));
+    }
+
     function getNonce(address from) public view returns (uint256) {
         return _nonces[from];
     }
@@ -27,10 +52,8 @@ contract MinimalForwarder {
     function verify(
         ForwardRequest calldata req,
         bytes calldata signature
-    ) public view returns (bool) {
-        bytes32 hash = _hashTypedData(req);
-        address signer = _recover(hash, signature);
-        return (signer == req.from && _nonces[req.from] == req.nonce);
+    ) external view returns (bool) {
+        return _verify(req, signature);
     }
 
     /**
@@ -41,7 +64,7 @@ contract MinimalForwarder {
         ForwardRequest calldata req,
         bytes calldata signature
     ) public payable returns (bool, bytes memory) {
-        require(verify(req, signature), "MinimalForwarder: signature does not match request");
+        require(_verify(req, signature), "MinimalForwarder: signature does not match request");
         _nonces[req.from]++;
 
         (bool success, bytes memory returndata) = req.to.call{gas: req.gas, value: req.value}(
@@ -51,27 +74,77 @@ contract MinimalForwarder {
         // and the call didn't run out of gas.
         require(gasleft() > req.gas / 63, "MinimalForwarder: out of gas");
 
+        emit Executed(req.from, req.nonce, success);
         return (success, returndata);
     }
 
+    /**
+     * @dev Executes several meta-txs in one transaction, so the relayer pays the
+     * base transaction cost once per batch. Each request is verified, its nonce is
+     * bumped and its call is forwarded exactly as in `execute`. A request that fails
+     * verification, or whose call reverts, is reported as false without reverting
+     * the others; Executed is emitted per executed request, so receipts show
+     * which ones went through. msg.value must equal the sum of the requests' values; the value
+     * of every failed or skipped request is refunded to msg.sender, so no ETH is
+     * left in the forwarder.
+     */
+    function executeBatch(
+        ForwardRequest[] calldata reqs,
+        bytes[] calldata signatures
+    ) public payable returns (bool[] memory successes) {
+        require(reqs.length == signatures.length, "MinimalForwarder: length mismatch");
+        successes = new bool[](reqs.length);
+        uint256 total;
+        uint256 refund;
+
+        for (uint256 i = 0; i < reqs.length; ++i) {
+            ForwardRequest calldata req = reqs[i];
+            total += req.value;
+            if (!_verify(req, signatures[i])) {
+                refund += req.value;
+                continue;
+            }
+            _nonces[req.from]++;
+
+            (bool success, ) = req.to.call{gas: req.gas, value: req.value}(
+                abi.encodePacked(req.data, req.from)
+            );
+            // Same check as execute: the relayer must not starve a request of gas
+            require(gasleft() > req.gas / 63, "MinimalForwarder: out of gas");
+
+            emit Executed(req.from, req.nonce, success);
+            successes[i] = success;
+            if (!success) {
+                refund += req.value;
+            }
+        }
+        require(msg.value == total, "MinimalForwarder: value mismatch");
+
+        if (refund > 0) {
+            (bool refunded, ) = payable(msg.sender).call{value: refund}("");
+            require(refunded, "MinimalForwarder: refund failed");
+        }
+    }
+
+    /**
+     * @dev Signature and nonce check shared by verify, execute and executeBatch.
+     * Reads the request straight from calldata.
+     */
+    function _verify(ForwardRequest calldata req, bytes calldata signature) internal view returns (bool) {
+        address signer = _recover(_hashTypedData(req), signature);
+        return (signer == req.from && _nonces[req.from] == req.nonce);
+    }
+
     /**
      * @dev Creates EIP712 typed data hash.
      */
-    function _hashTypedData(ForwardRequest calldata req) private pure returns (bytes32) {
-        // EIP712 domain separator can be simplified for a minimal forwarder
+    function _hashTypedData(ForwardRequest calldata req) private view returns (bytes32) {
         return keccak256(
             abi.encodePacked(
                 "\x19\x01",
-                // Hash of the domain separator, minimal version
-                keccak256(abi.encode(
-                    keccak256("EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"),
-                    keccak256(bytes("MinimalForwarder")),
-                    keccak256(bytes("1")),
-                    0, // chainId not strictly validated here
-                    address(0) // verifyingContract not strictly validated
-                )),
+                _DOMAIN_SEPARATOR,
                 keccak256(abi.encode(
-                    keccak256("ForwardRequest(address from,address to,uint256 value,uint256 gas,uint256 nonce,bytes data)"),
+                    _FORWARD_REQUEST_TYPEHASH,
                     req.from,
                     req.to,
                     req.value,
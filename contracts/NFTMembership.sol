@@ -14,8 +14,11 @@ contract NFTMembership is ERC721, AccessControl {
     // Custom role for managing pricing and admin tasks
     bytes32 public constant ADMIN_ROLE = keccak256("ADMIN_ROLE");
 
-    // Tracks membership expiration timestamps
-    mapping(uint256 => uint256) public validUntil;
+    // Membership expiration timestamps, packed four uint64 values per slot:
+    // token `id` lives in _packedExpiries[id >> 2] at bit offset 64 * (id & 3).
+    // Sequential ids share slots, so only every fourth mint pays for a fresh
+    // (zero to non-zero) storage write. Read through validUntil(tokenId).
+    mapping(uint256 => uint256) private _packedExpiries;
 
     // Price to mint or renew (in Wei)
     uint256 public membershipPrice;
@@ -29,6 +32,9 @@ contract NFTMembership is ERC721, AccessControl {
     // Event for successful renewals
     event MembershipRenewed(uint256 indexed tokenId, uint256 newExpiry);
 
+    // Event for price changes, so off-chain caches can invalidate membershipPrice
+    event MembershipPriceUpdated(uint256 newPrice);
+
     /**
      * @dev Constructor: sets up initial roles and parameters.
      * @param name_ Token name (e.g., "MembershipPass")
@@ -70,12 +76,61 @@ contract NFTMembership is ERC721, AccessControl {
         return forwarder == trustedForwarder;
     }
 
+    /**
+     * @dev Expiration timestamp of `tokenId` (0 if it was never minted).
+     * Same signature and result as the former public mapping getter.
+     */
+    function validUntil(uint256 tokenId) public view returns (uint256) {
+        return uint64(_packedExpiries[tokenId >> 2] >> ((tokenId & 3) << 6));
+    }
+
+    /**
+     * @dev True if `tokenId` exists and its membership has not lapsed.
+     * Same rule as membershipStatusBatch and renewals (lapsed once
+     * block.timestamp > validUntil); unminted ids return false.
+     */
+    function isValid(uint256 tokenId) external view returns (bool) {
+        return _ownerOf(tokenId) != address(0) && block.timestamp <= validUntil(tokenId);
+    }
+
+    /**
+     * @dev Batched status lookup for access gates: owner, expiry and whether the
+     * membership is active for each token id, in one call. Unminted ids return
+     * address(0), 0 and false instead of reverting like ownerOf.
+     * @param tokenIds Tokens to look up
+     */
+    function membershipStatusBatch(uint256[] calldata tokenIds)
+        external
+        view
+        returns (address[] memory owners, uint256[] memory expiries, bool[] memory active)
+    {
+        uint256 count = tokenIds.length;
+        owners = new address[](count);
+        expiries = new uint256[](count);
+        active = new bool[](count);
+
+        for (uint256 i = 0; i < count; ) {
+            uint256 tokenId = tokenIds[i];
+            address owner = _ownerOf(tokenId);
+            uint256 expiry = validUntil(tokenId);
+
+            owners[i] = owner;
+            expiries[i] = expiry;
+            // Same rule as renewals: lapsed once block.timestamp > validUntil
+            active[i] = owner != address(0) && block.timestamp <= expiry;
+            unchecked {
+                ++i;
+            }
+        }
+    }
+
     /**
      * @dev Admin-only: sets a new price for mint/renew
      * @param newPrice New membership price in Wei
      */
     function setMembershipPrice(uint256 newPrice) external onlyRole(ADMIN_ROLE) {
         membershipPrice = newPrice;
+        emit MembershipPriceUpdated(newPrice);
     }
 
     /**
@@ -92,6 +147,36 @@ contract NFTMembership is ERC721, AccessControl {
         revokeRole(ADMIN_ROLE, account);
     }
 
+    /**
+     * @dev Admin-only: grant ADMIN_ROLE to several addresses in one transaction.
+     * Accounts that already hold the role are skipped (no RoleGranted event).
+     * @param accounts Addresses receiving ADMIN_ROLE
+     */
+    function grantAdminRoles(address[] calldata accounts) external onlyRole(DEFAULT_ADMIN_ROLE) {
+        uint256 count = accounts.length;
+        for (uint256 i = 0; i < count; ) {
+            _grantRole(ADMIN_ROLE, accounts[i]);
+            unchecked {
+                ++i;
+            }
+        }
+    }
+
+    /**
+     * @dev Admin-only: revoke ADMIN_ROLE from several addresses in one transaction.
+     * Accounts that do not hold the role are skipped (no RoleRevoked event).
+     * @param accounts Addresses losing ADMIN_ROLE
+     */
+    function revokeAdminRoles(address[] calldata accounts) external onlyRole(DEFAULT_ADMIN_ROLE) {
+        uint256 count = accounts.length;
+        for (uint256 i = 0; i < count; ) {
+            _revokeRole(ADMIN_ROLE, accounts[i]);
+            unchecked {
+                ++i;
+            }
+        }
+    }
+
     /**
      * @dev Mints a new membership NFT for `recipient`.
      * @param recipient Address receiving the NFT
@@ -104,7 +189,38 @@ contract NFTMembership is ERC721, AccessControl {
         uint256 newTokenId = _tokenIdCounter;
 
         _safeMint(recipient, newTokenId);
-        validUntil[newTokenId] = block.timestamp + durationInSeconds;
+        _setValidUntil(newTokenId, block.timestamp + durationInSeconds);
+    }
+
+    /**
+     * @dev Mints one membership NFT per recipient in a single transaction.
+     * Payment is checked once for the whole batch (membershipPrice * recipients).
+     * @param recipients Addresses receiving the NFTs
+     * @param durationsInSeconds Time before expiry for each recipient (in seconds)
+     */
+    function batchMintMembership(
+        address[] calldata recipients,
+        uint256[] calldata durationsInSeconds
+    ) external payable {
+        uint256 count = recipients.length;
+        require(count == durationsInSeconds.length, "Length mismatch");
+        require(msg.value >= membershipPrice * count, "Insufficient payment");
+
+        // Reserve the whole id range first so a reentrant mint from
+        // onERC721Received cannot reuse one of these ids
+        uint256 newTokenId = _tokenIdCounter;
+        _tokenIdCounter = newTokenId + count;
+
+        for (uint256 i = 0; i < count; ) {
+            unchecked {
+                ++newTokenId;
+            }
+            _safeMint(recipients[i], newTokenId);
+            _setValidUntil(newTokenId, block.timestamp + durationsInSeconds[i]);
+            unchecked {
+                ++i;
+            }
+        }
     }
 
     /**
@@ -116,15 +232,30 @@ contract NFTMembership is ERC721, AccessControl {
         require(msg.value >= membershipPrice, "Insufficient payment");
         require(ownerOf(tokenId) == msg.sender, "Not token owner");
 
-        uint256 currentExpiry = validUntil[tokenId];
-        if (block.timestamp > currentExpiry) {
-            currentExpiry = block.timestamp;
-        }
+        _extendMembership(tokenId, additionalSeconds);
+    }
 
-        uint256 newExpiry = currentExpiry + additionalSeconds;
-        validUntil[tokenId] = newExpiry;
+    /**
+     * @dev Renews several tokens owned by the caller in a single transaction.
+     * Payment is checked once for the whole batch (membershipPrice * tokenIds).
+     * @param tokenIds Tokens to renew
+     * @param additionalSeconds Time to extend each token by
+     */
+    function batchRenewMembership(
+        uint256[] calldata tokenIds,
+        uint256[] calldata additionalSeconds
+    ) external payable {
+        uint256 count = tokenIds.length;
+        require(count == additionalSeconds.length, "Length mismatch");
+        require(msg.value >= membershipPrice * count, "Insufficient payment");
 
-        emit MembershipRenewed(tokenId, newExpiry);
+        for (uint256 i = 0; i < count; ) {
+            require(ownerOf(tokenIds[i]) == msg.sender, "Not token owner");
+            _extendMembership(tokenIds[i], additionalSeconds[i]);
+            unchecked {
+                ++i;
+            }
+        }
     }
 
     /**
@@ -138,17 +269,36 @@ contract NFTMembership is ERC721, AccessControl {
         require(isTrustedForwarder(msg.sender), "Not trusted forwarder");
         require(ownerOf(tokenId) == realUser, "Not token owner");
 
-        uint256 currentExpiry = validUntil[tokenId];
+        _extendMembership(tokenId, additionalSeconds);
+    }
+
+    /**
+     * @dev Extends `tokenId` from its current expiry (or from now, if it has
+     * already lapsed) and emits MembershipRenewed.
+     */
+    function _extendMembership(uint256 tokenId, uint256 additionalSeconds) internal {
+        uint256 currentExpiry = validUntil(tokenId);
         if (block.timestamp > currentExpiry) {
             currentExpiry = block.timestamp;
         }
 
         uint256 newExpiry = currentExpiry + additionalSeconds;
-        validUntil[tokenId] = newExpiry;
+        _setValidUntil(tokenId, newExpiry);
 
         emit MembershipRenewed(tokenId, newExpiry);
     }
 
+    /**
+     * @dev Writes the packed uint64 expiry of `tokenId`, leaving the three
+     * neighbouring tokens in the same slot untouched.
+     */
+    function _setValidUntil(uint256 tokenId, uint256 expiry) internal {
+        require(expiry <= type(uint64).max, "Expiry too large");
+        uint256 shift = (tokenId & 3) << 6;
+        uint256 packed = _packedExpiries[tokenId >> 2];
+        _packedExpiries[tokenId >> 2] = (packed & ~(uint256(type(uint64).max) << shift)) | (expiry << shift);
+    }
+
     /**
      * @dev EIP-2771: Override msg.sender if forwarded
      */
@@ -0,0 +1,388 @@
+"""
+Local gas and latency benchmark that regenerates docs/benchmark.md.
+
+Deploys fresh MinimalForwarder / NFTMembership contracts on the active
+(local) network and records:
+
+  - deploy gas for both contracts
+  - mint, renew, metaRenewMembership, MinimalForwarder.verify and .execute gas, for
+    writes to empty storage slots (first mint to a holder, first request of
+    a signer) and to slots that already hold a value
+  - mint / renew gas once the contract already holds TOKEN_COUNTS tokens
+  - gas per token for batchMintMembership / batchRenewMembership
+  - gas per relayed renewal for MinimalForwarder.executeBatch bundles
+  - wall-clock latency of the Python client paths
+
+Results go to docs/benchmark.json (sorted keys, stable layout) and the table
+between the GENERATED BENCHMARK markers in docs/benchmark.md is re-rendered,
+so a regression shows up as a diff on either file.
+
+To compare two contract versions, keep the benchmark.json of the old run and
+pass it as `baseline_path`: the gas tables then get "before" and "change"
+columns next to the new numbers.
+
+Usage:
+    brownie run scripts/benchmark.py
+    brownie run scripts/benchmark.py main 200 docs/benchmark_before.json
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from brownie import MinimalForwarder, NFTMembership, accounts, chain, network, web3
+
+from scripts.forward_request import encode_execute, recover_signer, request_tuple, sign_request
+
+BATCH_SIZES = (1, 10, 50, 200)
+FORWARDER_BATCH_SIZES = (1, 5, 10, 25, 50)
+TOKEN_COUNTS = (10, 100, 1000)
+PRICE = 10**16  # 0.01 ETH in Wei
+DURATION = 30 * 24 * 60 * 60  # 30 days in seconds
+
+DOCS_DIR = Path(__file__).resolve().parent.parent / "docs"
+RESULTS_PATH = DOCS_DIR / "benchmark.json"
+MARKDOWN_PATH = DOCS_DIR / "benchmark.md"
+BEGIN_MARKER = "<!-- BEGIN GENERATED BENCHMARK -->"
+END_MARKER = "<!-- END GENERATED BENCHMARK -->"
+
+
+def _deploy(deployer, forwarder=None):
+    if forwarder is None:
+        forwarder = MinimalForwarder.deploy({"from": deployer})
+    nft = NFTMembership.deploy("MembershipPass", "MBR", PRICE, forwarder, {"from": deployer})
+    return forwarder, nft
+
+
+def _meta_renew_request(nft, user, token_id, nonce):
+    return {
+        "from": user.address,
+        "to": nft.address,
+        "value": 0,
+        "gas": 100000,
+        "nonce": nonce,
+        "data": bytes.fromhex(nft.metaRenewMembership.encode_input(token_id, DURATION, user.address)[2:]),
+    }
+
+
+def measure_gas(deployer, user):
+    """
+    Returns [{"operation", "scenario", "gas"}] rows for the single-token paths.
+    """
+    rows = []
+
+    def record(operation, scenario, tx):
+        rows.append({"operation": operation, "scenario": scenario, "gas": tx.gas_used})
+
+    forwarder, nft = _deploy(deployer)
+    record("deploy", "MinimalForwarder", forwarder.tx)
+    record("deploy", "NFTMembership", nft.tx)
+
+    # Mint: balance slot 0 -> 1 for a new holder, n -> n+1 for an existing one
+    record("mintMembership", "new holder", nft.mintMembership(user, DURATION, {"from": user, "value": PRICE}))
+    record("mintMembership", "existing holder", nft.mintMembership(user, DURATION, {"from": user, "value": PRICE}))
+    # Token 3 shares a packed expiry slot with tokens 1 and 2, but its holder is new
+    record("mintMembership", "new holder, token 3", nft.mintMembership(deployer, DURATION, {"from": user, "value": PRICE}))
+
+    record("renewMembership", "active token", nft.renewMembership(1, DURATION, {"from": user, "value": PRICE}))
+    chain.sleep(3 * DURATION)
+    chain.mine()
+    record("renewMembership", "lapsed token", nft.renewMembership(2, DURATION, {"from": user, "value": PRICE}))
+
+    # metaRenewMembership on its own: a second deployment that trusts the deployer as forwarder
+    _, direct = _deploy(deployer, forwarder=deployer)
+    direct.mintMembership(user, DURATION, {"from": user, "value": PRICE})
+    record(
+        "metaRenewMembership",
+        "direct call from trusted forwarder",
+        direct.metaRenewMembership(1, DURATION, user, {"from": deployer}),
+    )
+
+    # Signature check alone (a view, so estimated rather than mined)
+    request = _meta_renew_request(nft, user, 1, 0)
+    rows.append({
+        "operation": "MinimalForwarder.verify",
+        "scenario": "eth_estimateGas",
+        "gas": forwarder.verify.estimate_gas(request_tuple(request), sign_request(request, user.private_key)),
+    })
+
+    # Full gasless path: forwarder nonce slot 0 -> 1 on the first request, n -> n+1 afterwards
+    for nonce, scenario in enumerate(("first request of signer", "later request of signer")):
+        request = _meta_renew_request(nft, user, 1, nonce)
+        signature = sign_request(request, user.private_key)
+        tx = forwarder.execute(request_tuple(request), signature, {"from": deployer})
+        record("MinimalForwarder.execute", scenario, tx)
+
+    # Token count should not matter (mappings), but keep it measured
+    minted = 3
+    for count in TOKEN_COUNTS:
+        while minted < count - 1:
+            size = min(100, count - 1 - minted)
+            nft.batchMintMembership([user] * size, [DURATION] * size, {"from": user, "value": PRICE * size})
+            minted += size
+        mint_tx = nft.mintMembership(user, DURATION, {"from": user, "value": PRICE})
+        minted += 1
+        record("mintMembership", f"{count:,} tokens minted", mint_tx)
+        record("renewMembership", f"{count:,} tokens minted",
+               nft.renewMembership(minted, DURATION, {"from": user, "value": PRICE}))
+
+    return rows
+
+
+def measure_batch_gas(deployer, sizes=BATCH_SIZES):
+    """
+    Returns one row per batch size with total and per-token gas for mint and renew.
+    The first row ("single") is one plain mintMembership + renewMembership.
+    """
+    _, nft = _deploy(deployer)
+
+    mint_tx = nft.mintMembership(deployer, DURATION, {"from": deployer, "value": PRICE})
+    renew_tx = nft.renewMembership(1, DURATION, {"from": deployer, "value": PRICE})
+    rows = [{
+        "batch_size": "single",
+        "mint_gas": mint_tx.gas_used,
+        "mint_gas_per_token": mint_tx.gas_used,
+        "renew_gas": renew_tx.gas_used,
+        "renew_gas_per_token": renew_tx.gas_used,
+    }]
+
+    next_token_id = 2
+    for size in sizes:
+        mint_tx = nft.batchMintMembership(
+            [deployer] * size, [DURATION] * size, {"from": deployer, "value": PRICE * size}
+        )
+        token_ids = list(range(next_token_id, next_token_id + size))
+        next_token_id += size
+        renew_tx = nft.batchRenewMembership(
+            token_ids, [DURATION] * size, {"from": deployer, "value": PRICE * size}
+        )
+        rows.append({
+            "batch_size": size,
+            "mint_gas": mint_tx.gas_used,
+            "mint_gas_per_token": mint_tx.gas_used // size,
+            "renew_gas": renew_tx.gas_used,
+            "renew_gas_per_token": renew_tx.gas_used // size,
+        })
+    return rows
+
+
+def measure_forwarder_batch_gas(deployer, user, sizes=FORWARDER_BATCH_SIZES):
+    """
+    Returns one row per bundle size with total and per-renewal gas for relaying
+    metaRenewMembership requests through executeBatch. The first row ("single")
+    is one plain execute. Every request is a later request of its signer, so
+    nonce writes are n -> n+1 throughout.
+    """
+    forwarder, nft = _deploy(deployer)
+    nft.mintMembership(user, DURATION, {"from": user, "value": PRICE})
+    nonce = 0
+
+    def signed(count):
+        nonlocal nonce
+        requests = [_meta_renew_request(nft, user, 1, nonce + i) for i in range(count)]
+        nonce += count
+        return [request_tuple(r) for r in requests], [sign_request(r, user.private_key) for r in requests]
+
+    # Warm the signer's nonce slot so the first measured row is not the 0 -> 1 write
+    (request,), (signature,) = signed(1)
+    forwarder.execute(request, signature, {"from": deployer})
+
+    (request,), (signature,) = signed(1)
+    tx = forwarder.execute(request, signature, {"from": deployer})
+    rows = [{"batch_size": "single", "gas": tx.gas_used, "gas_per_renewal": tx.gas_used}]
+
+    for size in sizes:
+        requests, signatures = signed(size)
+        tx = forwarder.executeBatch(requests, signatures, {"from": deployer})
+        rows.append({"batch_size": size, "gas": tx.gas_used, "gas_per_renewal": tx.gas_used // size})
+    return rows
+
+
+def _time_calls(label, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "path": label,
+        "runs": repeat,
+        "mean_us": round(sum(samples) / repeat * 1e6, 1),
+        "p50_us": round(samples[repeat // 2] * 1e6, 1),
+        "p99_us": round(samples[min(repeat - 1, int(repeat * 0.99))] * 1e6, 1),
+    }
+
+
+def measure_latency(deployer, user, repeat=200):
+    """
+    Wall-clock latency of the Python client paths against the local chain.
+    """
+    forwarder, nft = _deploy(deployer)
+    nft.mintMembership(user, DURATION, {"from": user, "value": PRICE})
+    request = _meta_renew_request(nft, user, 1, 0)
+    signature = sign_request(request, user.private_key)
+    valid_until_call = {"to": nft.address, "data": nft.validUntil.encode_input(1)}
+
+    def relay_one():
+        req = _meta_renew_request(nft, user, 1, forwarder.getNonce(user))
+        forwarder.execute(request_tuple(req), sign_request(req, user.private_key), {"from": deployer})
+
+    return [
+        _time_calls("sign ForwardRequest (forward_request.sign_request)", lambda: sign_request(request, user.private_key), repeat),
+        _time_calls("recover signer (forward_request.recover_signer)", lambda: recover_signer(request, signature), repeat),
+        _time_calls("encode execute calldata (forward_request.encode_execute)", lambda: encode_execute(request, signature), repeat),
+        _time_calls("eth_call validUntil (raw web3)", lambda: web3.eth.call(valid_until_call), repeat),
+        _time_calls("validUntil via brownie Contract", lambda: nft.validUntil(1), repeat),
+        _time_calls("mintMembership send + receipt (brownie)",
+                    lambda: nft.mintMembership(user, DURATION, {"from": user, "value": PRICE}), max(repeat // 10, 1)),
+        _time_calls("sign + execute + receipt (relayer path)", relay_one, max(repeat // 10, 1)),
+    ]
+
+
+def _before_after(before, after):
+    """
+    "before → after (±x.x%)" for a baseline comparison cell.
+    """
+    if before is None:
+        return f"– → {after:,}"
+    change = (after - before) / before * 100 if before else 0.0
+    return f"{before:,} → {after:,} ({change:+.1f}%)"
+
+
+def render_markdown(results):
+    """
+    Renders the generated section of docs/benchmark.md from a results dict.
+    With results["baseline"] (an older results dict) the gas tables show
+    before → after values.
+    """
+    baseline = results.get("baseline")
+    lines = [
+        f"_Generated {results['generated_at']} on network `{results['network']}` (chain id {results['chain_id']})._",
+        "",
+        "### Gas per operation",
+        "",
+    ]
+    if baseline:
+        before = {(row["operation"], row["scenario"]): row["gas"] for row in baseline["gas"]}
+        lines += [
+            f"_Before: {baseline['generated_at']}._",
+            "",
+            "| **Operation** | **Scenario** | **Gas Used (before → after)** |",
+            "|---------------|--------------|------------------------------:|",
+        ]
+        for row in results["gas"]:
+            cell = _before_after(before.get((row["operation"], row["scenario"])), row["gas"])
+            lines.append(f"| `{row['operation']}` | {row['scenario']} | {cell} |")
+    else:
+        lines += [
+            "| **Operation** | **Scenario** | **Gas Used** |",
+            "|---------------|--------------|-------------:|",
+        ]
+        for row in results["gas"]:
+            lines.append(f"| `{row['operation']}` | {row['scenario']} | {row['gas']:,} |")
+
+    lines += [
+        "",
+        "### Batch mint & renew",
+        "",
+    ]
+    if baseline:
+        before = {row["batch_size"]: row for row in baseline["batch"]}
+        lines += [
+            "| **Batch size** | **Mint / token (before → after)** | **Renew / token (before → after)** |",
+            "|---------------:|----------------------------------:|-----------------------------------:|",
+        ]
+        for row in results["batch"]:
+            old = before.get(row["batch_size"], {})
+            lines.append(
+                f"| {row['batch_size']} | {_before_after(old.get('mint_gas_per_token'), row['mint_gas_per_token'])} "
+                f"| {_before_after(old.get('renew_gas_per_token'), row['renew_gas_per_token'])} |"
+            )
+    else:
+        lines += [
+            "| **Batch size** | **Mint gas** | **Mint / token** | **Renew gas** | **Renew / token** |",
+            "|---------------:|-------------:|-----------------:|--------------:|------------------:|",
+        ]
+        for row in results["batch"]:
+            lines.append(
+                f"| {row['batch_size']} | {row['mint_gas']:,} | {row['mint_gas_per_token']:,} "
+                f"| {row['renew_gas']:,} | {row['renew_gas_per_token']:,} |"
+            )
+
+    lines += [
+        "",
+        "### Relayed renewals via executeBatch",
+        "",
+    ]
+    if baseline and "forwarder_batch" in baseline:
+        before = {row["batch_size"]: row["gas_per_renewal"] for row in baseline["forwarder_batch"]}
+        lines += [
+            "| **Bundle size** | **Gas** | **Gas / renewal (before → after)** |",
+            "|----------------:|--------:|-----------------------------------:|",
+        ]
+        for row in results["forwarder_batch"]:
+            cell = _before_after(before.get(row["batch_size"]), row["gas_per_renewal"])
+            lines.append(f"| {row['batch_size']} | {row['gas']:,} | {cell} |")
+    else:
+        lines += [
+            "| **Bundle size** | **Gas** | **Gas / renewal** |",
+            "|----------------:|--------:|------------------:|",
+        ]
+        for row in results["forwarder_batch"]:
+            lines.append(f"| {row['batch_size']} | {row['gas']:,} | {row['gas_per_renewal']:,} |")
+
+    lines += [
+        "",
+        "### Python client latency",
+        "",
+        "| **Path** | **Runs** | **Mean (µs)** | **p50 (µs)** | **p99 (µs)** |",
+        "|----------|---------:|--------------:|-------------:|-------------:|",
+    ]
+    for row in results["latency"]:
+        lines.append(
+            f"| {row['path']} | {row['runs']} | {row['mean_us']:,.1f} | {row['p50_us']:,.1f} | {row['p99_us']:,.1f} |"
+        )
+    return "\n".join(lines)
+
+
+def update_markdown(results, path=MARKDOWN_PATH):
+    text = path.read_text()
+    start = text.index(BEGIN_MARKER) + len(BEGIN_MARKER)
+    end = text.index(END_MARKER)
+    path.write_text(text[:start] + "\n" + render_markdown(results) + "\n" + text[end:])
+
+
+def main(latency_runs=200, baseline_path=None):
+    """
+    Runs every measurement, writes docs/benchmark.json and re-renders docs/benchmark.md.
+    `baseline_path` is an earlier benchmark.json to compare gas against.
+    """
+    active = network.show_active()
+    print(f"\n🔗 Connected to network: {active}")
+    if "fork" not in active and active not in ("development", "anvil", "hardhat", "geth-dev"):
+        print("⚠️ This deploys several contracts; run it on a local dev chain.")
+
+    deployer = accounts[0]
+    user = accounts.add()
+    deployer.transfer(user, "100 ether")
+
+    results = {
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+        "network": active,
+        "chain_id": chain.id,
+        "gas": measure_gas(deployer, user),
+        "batch": measure_batch_gas(deployer),
+        "forwarder_batch": measure_forwarder_batch_gas(deployer, user),
+        "latency": measure_latency(deployer, user, int(latency_runs)),
+    }
+    if baseline_path:
+        baseline = json.loads(Path(baseline_path).read_text())
+        # Only the gas tables are compared; don't nest older baselines
+        results["baseline"] = {key: baseline[key] for key in ("generated_at", "gas", "batch", "forwarder_batch") if key in baseline}
+
+    RESULTS_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+    update_markdown(results)
+    print(render_markdown(results))
+    print(f"\n✅ Wrote {RESULTS_PATH} and updated {MARKDOWN_PATH}")
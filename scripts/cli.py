@@ -0,0 +1,268 @@
+"""
+Fast-start command line for day-to-day membership operations.
+
+`brownie run` imports brownie, loads the project and connects a network before
+a script does any work, and relayer_execute.py re-parses the full
+MinimalForwarder build artifact on every run. For cron and webhook jobs that
+startup costs more than the work itself. This CLI instead:
+
+  - imports only the standard library at startup; each subcommand imports
+    what it needs when it runs
+  - talks JSON-RPC through rpc_client (requests, no web3) and signs legacy
+    transactions with eth_keys + rlp instead of eth_account
+  - encodes calldata from the compact ABIs in abi/ (calldata.extract_abis)
+
+Subcommands:
+    mint    [--to ADDRESS] [--days 30] [--count 1]
+    renew   TOKEN_ID [TOKEN_ID ...] [--days 30]
+    relay   [signed_request.json | signed_requests.jsonl]
+    grant   ACCOUNT         (ADMIN_ROLE)
+    revoke  ACCOUNT         (ADMIN_ROLE)
+    index   [--db membership_events.db] [--start-block 0]
+
+Usage:
+    python -m scripts.cli renew 1 2 3 --days 30
+    python -m scripts.cli --dry-run grant 0xD56521A2bc066ACFAf2cB398D38Be0C560b6abfD
+    python -m scripts.cli --timing --account myDeployerAccount mint
+
+Environment:
+    RPC_URL              JSON-RPC endpoint (default http://127.0.0.1:8545)
+    MEMBERSHIP_ADDRESS   Deployed NFTMembership
+    FORWARDER_ADDRESS    Deployed MinimalForwarder (relay)
+    PRIVATE_KEY          Sender for mint / renew / grant / revoke, unless
+                         --account names a brownie keystore account
+    RELAYER_PRIVATE_KEY  Sender for relay
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+_STARTED = time.perf_counter()
+
+SECONDS_PER_DAY = 24 * 60 * 60
+# Headroom on top of eth_estimateGas
+GAS_MARGIN = 1.2
+
+
+def _env(name):
+    value = os.getenv(name)
+    if not value:
+        raise SystemExit(f"❌ {name} not set in environment (or code).")
+    return value
+
+
+def _private_key(args, env_name):
+    from eth_keys import keys
+
+    if args.account:
+        import getpass
+        from pathlib import Path
+        from eth_keyfile import decode_keyfile_json
+
+        path = Path.home() / ".brownie" / "accounts" / f"{args.account}.json"
+        with open(path) as f:
+            keyfile = json.load(f)
+        password = os.getenv("ACCOUNT_PASSWORD") or getpass.getpass(f"Password for '{args.account}': ")
+        return keys.PrivateKey(decode_keyfile_json(keyfile, password.encode()))
+
+    from scripts.forward_request import load_key
+    return load_key(_env(env_name))
+
+
+def _builder(contract_name):
+    from scripts.calldata import CalldataBuilder, load_compact_abi
+    return CalldataBuilder(load_compact_abi(contract_name))
+
+
+def sign_legacy_transaction(private_key, tx):
+    """
+    RLP-encodes and signs an EIP-155 legacy transaction with eth_keys.
+    `tx` holds nonce, gasPrice, gas, to, value, data (bytes) and chainId.
+    Returns the raw transaction bytes for eth_sendRawTransaction.
+    """
+    import rlp
+    from eth_utils import keccak
+
+    fields = [tx["nonce"], tx["gasPrice"], tx["gas"], bytes.fromhex(tx["to"][2:]), tx["value"], tx["data"]]
+    signature = private_key.sign_msg_hash(keccak(rlp.encode(fields + [tx["chainId"], 0, 0])))
+    return rlp.encode(fields + [signature.v + 35 + 2 * tx["chainId"], signature.r, signature.s])
+
+
+def _wait_for_receipt(client, tx_hash, timeout, poll_interval=1.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        receipt = client.call("eth_getTransactionReceipt", [tx_hash])
+        if receipt is not None:
+            return receipt
+        time.sleep(poll_interval)
+    raise SystemExit(f"❌ No receipt for {tx_hash} after {timeout}s")
+
+
+def _transact(args, private_key, to, data, value=0):
+    """
+    Signs and sends one transaction; chain id, gas price, nonce and the gas
+    estimate are fetched in a single JSON-RPC batch.
+    """
+    sender = private_key.public_key.to_checksum_address()
+    if args.dry_run:
+        print(f"📝 from={sender} to={to} value={value}\n   data=0x{data.hex()}")
+        return None
+
+    from scripts.rpc_client import get_client
+
+    client = get_client(args.rpc_url)
+    call = {"from": sender, "to": to, "data": "0x" + data.hex(), "value": hex(value)}
+    chain_id, gas_price, nonce, gas = client.batch([
+        ("eth_chainId", []),
+        ("eth_gasPrice", []),
+        ("eth_getTransactionCount", [sender, "pending"]),
+        ("eth_estimateGas", [call]),
+    ])
+    raw_tx = sign_legacy_transaction(private_key, {
+        "nonce": int(nonce, 16),
+        "gasPrice": int(gas_price, 16),
+        "gas": int(int(gas, 16) * GAS_MARGIN),
+        "to": to,
+        "value": value,
+        "data": data,
+        "chainId": int(chain_id, 16),
+    })
+    tx_hash = client.call("eth_sendRawTransaction", ["0x" + raw_tx.hex()])
+    print(f"📤 Sent {tx_hash}")
+
+    receipt = _wait_for_receipt(client, tx_hash, args.timeout)
+    status = "Success" if int(receipt["status"], 16) == 1 else "Failed"
+    print(f"{'✅' if status == 'Success' else '❌'} {status} in block {int(receipt['blockNumber'], 16)}, "
+          f"gas used {int(receipt['gasUsed'], 16):,}")
+    return receipt
+
+
+def _membership_price(args, contract):
+    if args.dry_run:
+        return 0
+    from scripts.rpc_client import get_client
+
+    builder = _builder("NFTMembership")
+    return int.from_bytes(get_client(args.rpc_url).eth_call(contract, builder.encode("membershipPrice")), "big")
+
+
+def cmd_mint(args):
+    contract = _env("MEMBERSHIP_ADDRESS")
+    key = _private_key(args, "PRIVATE_KEY")
+    recipient = args.to or key.public_key.to_checksum_address()
+    duration = args.days * SECONDS_PER_DAY
+    builder = _builder("NFTMembership")
+
+    if args.count == 1:
+        data = builder.encode("mintMembership", recipient, duration)
+    else:
+        data = builder.encode("batchMintMembership", [recipient] * args.count, [duration] * args.count)
+    _transact(args, key, contract, data, _membership_price(args, contract) * args.count)
+
+
+def cmd_renew(args):
+    contract = _env("MEMBERSHIP_ADDRESS")
+    key = _private_key(args, "PRIVATE_KEY")
+    duration = args.days * SECONDS_PER_DAY
+    builder = _builder("NFTMembership")
+
+    if len(args.token_ids) == 1:
+        data = builder.encode("renewMembership", args.token_ids[0], duration)
+    else:
+        data = builder.encode("batchRenewMembership", args.token_ids, [duration] * len(args.token_ids))
+    _transact(args, key, contract, data, _membership_price(args, contract) * len(args.token_ids))
+
+
+def cmd_relay(args):
+    from scripts.forward_request import encode_execute, encode_execute_batch, request_from_json
+
+    forwarder = _env("FORWARDER_ADDRESS")
+    key = _private_key(args, "RELAYER_PRIVATE_KEY")
+    with open(args.path) as f:
+        if args.path.endswith(".jsonl"):
+            signed = [request_from_json(json.loads(line)) for line in f if line.strip()]
+        else:
+            signed = [request_from_json(json.load(f))]
+
+    if len(signed) == 1:
+        request, signature = signed[0]
+        data = encode_execute(request, signature)
+    else:
+        data = encode_execute_batch([request for request, _ in signed], [signature for _, signature in signed])
+    print(f"📨 Relaying {len(signed)} request(s) from {args.path}")
+    _transact(args, key, forwarder, data, sum(request["value"] for request, _ in signed))
+
+
+def _role_command(function_name):
+    def run(args):
+        from eth_utils import keccak
+
+        contract = _env("MEMBERSHIP_ADDRESS")
+        key = _private_key(args, "PRIVATE_KEY")
+        # ADMIN_ROLE is a constant: keccak256("ADMIN_ROLE"), no need to read it
+        data = _builder("NFTMembership").encode(function_name, keccak(text="ADMIN_ROLE"), args.account_address)
+        print(f"🔑 {function_name}(ADMIN_ROLE, {args.account_address})")
+        _transact(args, key, contract, data)
+    return run
+
+
+def cmd_index(args):
+    from scripts.event_indexer import sync_index
+    from scripts.rpc_web3 import web3_for
+
+    sync_index(web3_for(args.rpc_url), _env("MEMBERSHIP_ADDRESS"), args.db, args.start_block)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m scripts.cli", description="NFTMembership operations")
+    parser.add_argument("--rpc-url", default=None, help="defaults to $RPC_URL")
+    parser.add_argument("--account", default=None, help="brownie keystore account instead of a *_PRIVATE_KEY variable")
+    parser.add_argument("--dry-run", action="store_true", help="print the transaction instead of sending it")
+    parser.add_argument("--timeout", type=int, default=300, help="seconds to wait for a receipt")
+    parser.add_argument("--timing", action="store_true", help="print startup and command time")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    mint = commands.add_parser("mint", help="mint memberships (batchMintMembership when --count > 1)")
+    mint.add_argument("--to", default=None, help="recipient (default: sender)")
+    mint.add_argument("--days", type=int, default=30)
+    mint.add_argument("--count", type=int, default=1)
+    mint.set_defaults(func=cmd_mint)
+
+    renew = commands.add_parser("renew", help="renew tokens (batchRenewMembership for several ids)")
+    renew.add_argument("token_ids", type=int, nargs="+")
+    renew.add_argument("--days", type=int, default=30)
+    renew.set_defaults(func=cmd_renew)
+
+    relay = commands.add_parser("relay", help="relay signed request(s) through MinimalForwarder")
+    relay.add_argument("path", nargs="?", default="signed_request.json")
+    relay.set_defaults(func=cmd_relay)
+
+    for name, function_name in (("grant", "grantRole"), ("revoke", "revokeRole")):
+        role = commands.add_parser(name, help=f"{function_name}(ADMIN_ROLE, ACCOUNT)")
+        role.add_argument("account_address")
+        role.set_defaults(func=_role_command(function_name))
+
+    index = commands.add_parser("index", help="sync the MembershipRenewed SQLite index")
+    index.add_argument("--db", default="membership_events.db")
+    index.add_argument("--start-block", type=int, default=0)
+    index.set_defaults(func=cmd_index)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    dispatched = time.perf_counter()
+    args.func(args)
+    if args.timing:
+        finished = time.perf_counter()
+        print(
+            f"⏱️ startup {(dispatched - _STARTED) * 1000:.0f}ms, "
+            f"{args.command} {(finished - dispatched) * 1000:.0f}ms, {len(sys.modules)} modules loaded"
+        )
+
+
+if __name__ == "__main__":
+    main()
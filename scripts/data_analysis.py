@@ -1,6 +1,13 @@
+import os
+import time
+
 from brownie import network, NFTMembership
 from datetime import datetime
 
+from scripts.event_indexer import EventIndexer
+from scripts.rpc_client import get_client
+from scripts.rpc_web3 import web3_for
+
 
 def main():
     """
@@ -9,7 +16,9 @@ def main():
     This script:
       - Connects to the active Brownie network (e.g., 'sepolia')
       - Reads logs from a deployed NFTMembership address
-      - Scans for 'MembershipRenewed' events over the last N blocks
+      - Brings the local SQLite event index (membership_events.db) up to date,
+        scanning only blocks added since the previous run
+      - Reports 'MembershipRenewed' events from the last N blocks
       - Prints token ID and new expiration in UTC
 
     Usage:
@@ -30,20 +39,24 @@ def main():
         print(f"❌ Failed to load contract: {e}")
         return
 
-    # 3. Define block range to scan
-    web3 = network.web3
+    # 3. Define block range to scan (reads go through the pooled, retrying client)
+    web3 = web3_for(network.web3.provider.endpoint_uri)
     latest_block = web3.eth.block_number
     lookback = 5000
     from_block = max(latest_block - lookback, 0)
 
     print(f"🔍 Searching for 'MembershipRenewed' events from block {from_block} to {latest_block}...")
 
-    # 4. Fetch events using camelCase (Brownie v1.20.7)
+    # 4. Sync the resumable index (first run starts at from_block), then read from it
+    indexer = EventIndexer(web3, nft.address, start_block=from_block)
     try:
-        events = nft.events.MembershipRenewed.get_logs(fromBlock=from_block, toBlock=latest_block)
+        indexer.sync(latest_block)
+        events = indexer.renewals(from_block)
     except Exception as e:
         print(f"❌ Could not fetch events: {e}")
         return
+    finally:
+        indexer.close()
 
     # 5. Print results
     if not events:
@@ -52,10 +65,40 @@ def main():
 
     print(f"\n✅ Found {len(events)} 'MembershipRenewed' event(s):\n")
 
-    for evt in events:
-        token_id = evt.args.tokenId
-        new_expiry = evt.args.newExpiry
+    for _block, _tx, token_id, new_expiry in events:
         readable_date = datetime.utcfromtimestamp(new_expiry).strftime("%Y-%m-%d %H:%M:%S UTC")
         print(f" • Token ID: {token_id} | New Expiry: {readable_date}")
 
     print("\n📊 Event analysis complete.\n")
+
+
+def analytics(store_path="membership_events.npz", start_block=0, period_days=30):
+    """
+    Analytics mode: renewals per day, expiry histogram, active members over
+    time, churn and retention cohorts over the contract's whole history.
+
+    Events are kept in a columnar .npz store (scripts/membership_analytics.py);
+    each run only fetches blocks after the last synced one, and all
+    aggregates are vectorized NumPy operations.
+
+    Usage:
+        brownie run scripts/data_analysis.py analytics membership_events.npz 8170000 --network sepolia
+    """
+    # NumPy is only needed for this mode
+    from scripts.membership_analytics import EventStore, print_summary, summarize
+
+    contract_address = os.getenv("MEMBERSHIP_ADDRESS", "0xAaf086EC89D311f3fcAB1B17A735d4c8D746DFcF")
+    client = get_client(network.web3.provider.endpoint_uri)
+
+    store = EventStore.load(store_path)
+    start = time.perf_counter()
+    added = store.sync(client, contract_address, start_block=int(start_block))
+    store.save()
+    print(f"🔍 Synced {added:,} new event(s) up to block {store.synced_block} "
+          f"in {time.perf_counter() - start:.1f}s; {len(store):,} stored in {store_path}")
+
+    start = time.perf_counter()
+    summary = summarize(store.columns, period_days=int(period_days))
+    print(f"🧮 Aggregated in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print_summary(summary)
+    client.stats.print_report()
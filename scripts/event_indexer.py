@@ -0,0 +1,194 @@
+"""
+Resumable MembershipRenewed event indexer backed by SQLite.
+
+data_analysis.py used to fetch logs over a fixed 5000-block window with one
+get_logs call and keep nothing. EventIndexer instead:
+
+  - walks the range in chunks, halving the chunk when the provider errors
+    out (timeouts, "query returned more than N results", ...) or returns
+    more than `target_results` logs, and doubling it again while chunks
+    come back small (never past a size that has already failed)
+  - stores decoded (contract, block, tx, tokenId, newExpiry) rows in a
+    SQLite file, so several contracts can share one database
+  - records a checkpoint in the same SQLite transaction as the rows, so a
+    later run only scans blocks after the last indexed one
+
+Logs are fetched with raw eth_getLogs filtered on the event topic and decoded
+by hand (tokenId is indexed, newExpiry is the only data word).
+
+Usage:
+    brownie run scripts/event_indexer.py main membership_events.db 8170000 --network sepolia
+"""
+
+import os
+import sqlite3
+
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+MEMBERSHIP_RENEWED_TOPIC = "0x" + keccak(text="MembershipRenewed(uint256,uint256)").hex()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS membership_renewed (
+    contract     TEXT    NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash      TEXT    NOT NULL,
+    log_index    INTEGER NOT NULL,
+    token_id     INTEGER NOT NULL,
+    new_expiry   INTEGER NOT NULL,
+    PRIMARY KEY (contract, tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_renewed_block ON membership_renewed (contract, block_number);
+CREATE INDEX IF NOT EXISTS idx_renewed_token ON membership_renewed (contract, token_id);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    contract   TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL
+);
+"""
+
+
+def decode_membership_renewed(log):
+    """
+    Returns (block_number, tx_hash, log_index, token_id, new_expiry) for a raw log.
+    """
+    return (
+        log["blockNumber"],
+        "0x" + HexBytes(log["transactionHash"]).hex().removeprefix("0x"),
+        log["logIndex"],
+        int.from_bytes(HexBytes(log["topics"][1]), "big"),
+        int.from_bytes(HexBytes(log["data"])[:32], "big"),
+    )
+
+
+class EventIndexer:
+    """
+    Incrementally indexes MembershipRenewed logs of one NFTMembership contract.
+    """
+
+    def __init__(
+        self,
+        web3,
+        contract_address,
+        db_path="membership_events.db",
+        start_block=0,
+        chunk_size=2000,
+        min_chunk=1,
+        max_chunk=100000,
+        target_results=5000,
+    ):
+        self.web3 = web3
+        self.contract_address = to_checksum_address(contract_address)
+        self.start_block = int(start_block)
+        self.chunk_size = int(chunk_size)
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.target_results = target_results
+
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def last_indexed_block(self):
+        row = self.db.execute(
+            "SELECT last_block FROM checkpoint WHERE contract = ?", (self.contract_address,)
+        ).fetchone()
+        return row[0] if row else self.start_block - 1
+
+    def _fetch(self, from_block, to_block):
+        return self.web3.eth.get_logs({
+            "address": self.contract_address,
+            "topics": [MEMBERSHIP_RENEWED_TOPIC],
+            "fromBlock": from_block,
+            "toBlock": to_block,
+        })
+
+    def _store(self, rows, last_block):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO membership_renewed VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.contract_address,) + row for row in rows],
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO checkpoint (contract, last_block) VALUES (?, ?)",
+                (self.contract_address, last_block),
+            )
+
+    def sync(self, to_block=None):
+        """
+        Indexes every block after the checkpoint up to `to_block` (default: latest).
+        Returns the number of logs fetched.
+        """
+        if to_block is None:
+            to_block = self.web3.eth.block_number
+
+        fetched = 0
+        start = self.last_indexed_block() + 1
+        while start <= to_block:
+            end = min(start + self.chunk_size - 1, to_block)
+            try:
+                logs = self._fetch(start, end)
+            except Exception as e:
+                if self.chunk_size <= self.min_chunk:
+                    raise
+                # A range the provider rejected once will be rejected again: cap growth too
+                self.chunk_size = max(self.min_chunk, self.chunk_size // 2)
+                self.max_chunk = self.chunk_size
+                print(f"⚠️ get_logs({start}-{end}) failed ({e}); retrying with chunk={self.chunk_size}")
+                continue
+
+            self._store([decode_membership_renewed(log) for log in logs], end)
+            fetched += len(logs)
+            start = end + 1
+
+            if len(logs) > self.target_results:
+                self.chunk_size = max(self.min_chunk, self.chunk_size // 2)
+            elif len(logs) < self.target_results // 4:
+                self.chunk_size = min(self.max_chunk, self.chunk_size * 2)
+
+        return fetched
+
+    def renewals(self, from_block=0):
+        """
+        Returns this contract's stored (block_number, tx_hash, token_id,
+        new_expiry) rows in chain order.
+        """
+        return self.db.execute(
+            "SELECT block_number, tx_hash, token_id, new_expiry FROM membership_renewed "
+            "WHERE contract = ? AND block_number >= ? ORDER BY block_number, log_index",
+            (self.contract_address, from_block),
+        ).fetchall()
+
+
+def sync_index(web3, contract_address, db_path="membership_events.db", start_block=0):
+    """
+    Brings the SQLite index for `contract_address` up to the latest block and
+    prints a summary. Shared by main() and the `index` CLI subcommand.
+    """
+    indexer = EventIndexer(web3, contract_address, db_path=db_path, start_block=start_block)
+    resume_from = indexer.last_indexed_block() + 1
+    latest_block = web3.eth.block_number
+    print(f"🔍 Indexing 'MembershipRenewed' from block {resume_from} to {latest_block}...")
+
+    fetched = indexer.sync(latest_block)
+    total = indexer.db.execute(
+        "SELECT COUNT(*) FROM membership_renewed WHERE contract = ?", (indexer.contract_address,)
+    ).fetchone()[0]
+    indexer.close()
+
+    print(f"✅ {fetched} new event(s); {total} stored in {db_path}")
+
+
+def main(db_path="membership_events.db", start_block=0):
+    """
+    Brings the SQLite index for MEMBERSHIP_ADDRESS up to the latest block.
+    """
+    # Imported here so the CLI can use this module without loading brownie
+    from brownie import network
+
+    contract_address = os.getenv("MEMBERSHIP_ADDRESS")
+    if not contract_address:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+
+    sync_index(network.web3, contract_address, db_path, int(start_block))
@@ -0,0 +1,336 @@
+"""
+In-memory expiry index for NFTMembership tokens.
+
+validUntil is a mapping, so the contract cannot list tokens by expiry; the
+only on-chain option is one validUntil(tokenId) call per id. ExpiryIndex keeps
+the same data off-chain, built from mint Transfer and MembershipRenewed logs,
+and answers range queries such as "expiring between t1 and t2" in O(log n).
+
+Layout (about 16 bytes per token):
+  - `_expiry`: array('Q') indexed by tokenId (ids come from a counter, so the
+    array is dense); 0 means "not minted"
+  - `_buckets`: sorted array('Q') chunks of (expiry << 32 | tokenId) keys, with
+    `_maxes` holding the last key of each chunk. bisect on `_maxes` finds the
+    chunk, bisect inside it finds the position, and a chunk is split in two
+    once it grows past 2 * `load`.
+
+Keys pack expiry and tokenId into 64 bits, so tokenIds must be below 2**32.
+The contract allows expiries up to 2**64 - 1; `_expiry` stores them in full,
+while keys clamp the expiry to 2**32 - 1 (the year 2106). Range queries that
+reach past that point filter and order the clamped tokens by their stored
+expiry.
+
+Usage:
+    brownie run scripts/expiry_index.py benchmark 1000000
+"""
+
+import time
+import random
+from array import array
+from bisect import bisect_left, bisect_right
+
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from scripts.event_indexer import MEMBERSHIP_RENEWED_TOPIC
+
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+VALID_UNTIL_SELECTOR = keccak(text="validUntil(uint256)")[:4]
+
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+# Keys of expiries at or past this value all sort as 2**32 - 1
+_FAR_KEY = _ID_MASK << _ID_BITS
+_MAX_EXPIRY = (1 << 64) - 1
+
+
+def _key(expiry, token_id):
+    if not (0 <= token_id <= _ID_MASK and 0 <= expiry <= _MAX_EXPIRY):
+        raise ValueError(f"tokenId {token_id} / expiry {expiry} out of range (32 / 64 bits)")
+    return (min(expiry, _ID_MASK) << _ID_BITS) | token_id
+
+
+class ExpiryIndex:
+    """
+    Sorted tokenId -> expiry index with O(log n) lookups and range queries.
+    """
+
+    def __init__(self, load=1000):
+        self.load = load
+        self._expiry = array("Q")
+        self._buckets = []
+        self._maxes = []
+        self._size = 0
+        # Highest block whose logs have been applied
+        self.last_block = -1
+
+    def __len__(self):
+        return self._size
+
+    def memory_bytes(self):
+        """
+        Bytes held by the array buffers (excludes fixed Python object overhead).
+        """
+        return (
+            self._expiry.buffer_info()[1] * self._expiry.itemsize
+            + sum(len(bucket) * bucket.itemsize for bucket in self._buckets)
+            + len(self._maxes) * 8
+        )
+
+    # --------------- sorted key storage ---------------
+
+    def _insert_key(self, key):
+        if not self._buckets:
+            self._buckets.append(array("Q", [key]))
+            self._maxes.append(key)
+            return
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._buckets[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            bucket = self._buckets[pos]
+            bucket.insert(bisect_left(bucket, key), key)
+        if len(self._buckets[pos]) > 2 * self.load:
+            bucket = self._buckets[pos]
+            half = len(bucket) // 2
+            self._buckets[pos:pos + 1] = [bucket[:half], bucket[half:]]
+            self._maxes[pos:pos + 1] = [bucket[half - 1], bucket[-1]]
+
+    def _remove_key(self, key):
+        pos = bisect_left(self._maxes, key)
+        bucket = self._buckets[pos]
+        i = bisect_left(bucket, key)
+        del bucket[i]
+        if not bucket:
+            del self._buckets[pos]
+            del self._maxes[pos]
+        elif i == len(bucket):
+            self._maxes[pos] = bucket[-1]
+
+    def _iter_range(self, lo_key, hi_key):
+        """
+        Yields keys with lo_key <= key <= hi_key in ascending order.
+        """
+        pos = bisect_left(self._maxes, lo_key)
+        if pos == len(self._maxes):
+            return
+        i = bisect_left(self._buckets[pos], lo_key)
+        for bucket in self._buckets[pos:]:
+            end = bisect_right(bucket, hi_key)
+            yield from bucket[i:end]
+            if end < len(bucket):
+                return
+            i = 0
+
+    # --------------- public API ---------------
+
+    def bulk_load(self, pairs):
+        """
+        Replaces the index with (token_id, expiry) pairs in a single sort.
+        """
+        pairs = list(pairs)
+        keys = array("Q", sorted(_key(expiry, token_id) for token_id, expiry in pairs))
+        max_token = max((key & _ID_MASK for key in keys), default=0)
+
+        self._expiry = array("Q", bytes(8 * (max_token + 1)))
+        for token_id, expiry in pairs:
+            self._expiry[token_id] = expiry
+        self._buckets = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._size = len(keys)
+
+    def get(self, token_id):
+        """
+        Returns the indexed expiry for `token_id`, or None if it was never minted.
+        """
+        if token_id < len(self._expiry) and self._expiry[token_id]:
+            return self._expiry[token_id]
+        return None
+
+    def set_expiry(self, token_id, expiry):
+        current = self.get(token_id)
+        if current == expiry:
+            return
+        new_key = _key(expiry, token_id)
+        if current is None:
+            if token_id >= len(self._expiry):
+                self._expiry.extend(array("Q", bytes(8 * (token_id + 1 - len(self._expiry)))))
+            self._size += 1
+        else:
+            self._remove_key(_key(current, token_id))
+        self._expiry[token_id] = expiry
+        self._insert_key(new_key)
+
+    def remove(self, token_id):
+        current = self.get(token_id)
+        if current is not None:
+            self._remove_key(_key(current, token_id))
+            self._expiry[token_id] = 0
+            self._size -= 1
+
+    def expiring_between(self, t1, t2):
+        """
+        Token ids with t1 <= expiry <= t2, ordered by expiry.
+        """
+        if t2 < t1:
+            return []
+        lo = min(t1, _ID_MASK) << _ID_BITS
+        hi = (min(t2, _ID_MASK) << _ID_BITS) | _ID_MASK
+        if t2 < _ID_MASK:
+            return [key & _ID_MASK for key in self._iter_range(lo, hi)]
+        near = [key & _ID_MASK for key in self._iter_range(lo, min(hi, _FAR_KEY - 1))] if t1 < _ID_MASK else []
+        return near + [token_id for _, token_id in sorted(self._far_between(t1, t2))]
+
+    def _far_between(self, t1, t2):
+        """
+        (expiry, token_id) of the clamped-key tokens with t1 <= expiry <= t2.
+        """
+        for key in self._iter_range(_FAR_KEY, _FAR_KEY | _ID_MASK):
+            token_id = key & _ID_MASK
+            if t1 <= self._expiry[token_id] <= t2:
+                yield self._expiry[token_id], token_id
+
+    def count_between(self, t1, t2):
+        """
+        Number of tokens with t1 <= expiry <= t2, without materialising them:
+        two bisects per boundary chunk plus len() of the chunks in between.
+        """
+        if t2 < t1 or not self._buckets:
+            return 0
+        lo = min(t1, _ID_MASK) << _ID_BITS
+        hi = (min(t2, _ID_MASK) << _ID_BITS) | _ID_MASK
+        if t2 < _ID_MASK:
+            return self._count_keys(lo, hi)
+        near = self._count_keys(lo, _FAR_KEY - 1) if t1 < _ID_MASK else 0
+        return near + sum(1 for _ in self._far_between(t1, t2))
+
+    def _count_keys(self, lo, hi):
+        first = bisect_left(self._maxes, lo)
+        if first == len(self._maxes):
+            return 0
+        last = min(bisect_left(self._maxes, hi), len(self._maxes) - 1)
+        if first == last:
+            bucket = self._buckets[first]
+            return bisect_right(bucket, hi) - bisect_left(bucket, lo)
+        count = len(self._buckets[first]) - bisect_left(self._buckets[first], lo)
+        for bucket in self._buckets[first + 1:last]:
+            count += len(bucket)
+        return count + bisect_right(self._buckets[last], hi)
+
+    def expired_at(self, timestamp):
+        """
+        Token ids already expired at `timestamp`. Like the contract, a token is
+        expired once timestamp > validUntil.
+        """
+        return self.expiring_between(0, timestamp - 1)
+
+    def expired_as_of_block(self, block_number, block_timestamp):
+        """
+        Token ids expired at block `block_number` (whose timestamp the caller
+        supplies). Only exact while no logs after that block have been applied,
+        since a later renewal would hide that the token had lapsed.
+        """
+        if self.last_block > block_number:
+            raise ValueError(f"Index already includes logs up to block {self.last_block}")
+        return self.expired_at(block_timestamp)
+
+    def apply_logs(self, logs, resolve_mint_expiry):
+        """
+        Applies raw NFTMembership logs (mint Transfer and MembershipRenewed) in
+        chain order. mintMembership emits no expiry, so newly minted tokens are
+        resolved with one resolve_mint_expiry([(token_id, block_number), ...])
+        call per batch, which must return their validUntil values in order.
+        Mints renewed later in the same batch take the renewal's expiry.
+        """
+        pending = {}
+        for log in logs:
+            topic = "0x" + HexBytes(log["topics"][0]).hex().removeprefix("0x")
+            if topic == MEMBERSHIP_RENEWED_TOPIC:
+                token_id = int.from_bytes(HexBytes(log["topics"][1]), "big")
+                pending.pop(token_id, None)
+                self.set_expiry(token_id, int.from_bytes(HexBytes(log["data"])[:32], "big"))
+            elif topic == TRANSFER_TOPIC:
+                token_id = int.from_bytes(HexBytes(log["topics"][3]), "big")
+                if int.from_bytes(HexBytes(log["topics"][1]), "big") == 0:
+                    pending[token_id] = log["blockNumber"]
+                elif int.from_bytes(HexBytes(log["topics"][2]), "big") == 0:
+                    pending.pop(token_id, None)
+                    self.remove(token_id)
+            self.last_block = max(self.last_block, log["blockNumber"])
+
+        if pending:
+            mints = list(pending.items())
+            for (token_id, _block), expiry in zip(mints, resolve_mint_expiry(mints)):
+                self.set_expiry(token_id, expiry)
+
+
+def fetch_membership_logs(web3, contract_address, from_block, to_block):
+    """
+    Transfer and MembershipRenewed logs of `contract_address` in one eth_getLogs call.
+    """
+    return web3.eth.get_logs({
+        "address": contract_address,
+        "topics": [[TRANSFER_TOPIC, MEMBERSHIP_RENEWED_TOPIC]],
+        "fromBlock": from_block,
+        "toBlock": to_block,
+    })
+
+
+def valid_until_resolver(client, contract_address):
+    """
+    resolve_mint_expiry implementation that reads validUntil(tokenId) at each
+    mint block, sending all of a batch's reads as JSON-RPC batches through an
+    RpcClient (see rpc_client.get_client).
+    """
+    def resolve(mints):
+        calls = []
+        for token_id, block_number in mints:
+            data = "0x" + (VALID_UNTIL_SELECTOR + token_id.to_bytes(32, "big")).hex()
+            calls.append(("eth_call", [{"to": contract_address, "data": data}, hex(block_number)]))
+        return [int(result, 16) for result in client.batch(calls)]
+    return resolve
+
+
+def benchmark(count=1_000_000, queries=10_000, updates=100_000):
+    """
+    Builds an index of `count` tokens with random expiries over one year and
+    times bulk load, range queries and incremental renewals.
+    """
+    count, queries, updates = int(count), int(queries), int(updates)
+    rng = random.Random(42)
+    now = 1_750_000_000
+    year = 365 * 24 * 3600
+
+    index = ExpiryIndex()
+    start = time.perf_counter()
+    index.bulk_load((token_id, now + rng.randrange(year)) for token_id in range(1, count + 1))
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hits = 0
+    for _ in range(queries):
+        t1 = now + rng.randrange(year)
+        hits += index.count_between(t1, t1 + 3600)
+    count_us = (time.perf_counter() - start) / queries * 1e6
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        t1 = now + rng.randrange(year)
+        index.expiring_between(t1, t1 + 3600)
+    range_us = (time.perf_counter() - start) / queries * 1e6
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        token_id = rng.randrange(1, count + 1)
+        index.set_expiry(token_id, index.get(token_id) + 30 * 24 * 3600)
+    update_us = (time.perf_counter() - start) / updates * 1e6
+
+    print(f"Tokens indexed:             {len(index):,}")
+    print(f"Bulk load:                  {load_s:.2f}s")
+    print(f"count_between (1h window):  {count_us:.1f}µs per query (avg {hits / queries:.0f} tokens)")
+    print(f"expiring_between (1h):      {range_us:.1f}µs per query")
+    print(f"Incremental renewal:        {update_us:.1f}µs per update")
+    print(f"Array memory:               {index.memory_bytes() / 2**20:.1f} MiB "
+          f"({index.memory_bytes() / len(index):.1f} bytes/token)")
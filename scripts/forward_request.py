@@ -0,0 +1,209 @@
+"""
+EIP-712 helpers for MinimalForwarder's ForwardRequest.
+
+MinimalForwarder._hashTypedData always hashes against the same domain:
+name="MinimalForwarder", version="1", chainId=0, verifyingContract=address(0).
+Both the domain separator and the ForwardRequest typehash are therefore
+constants, so they are computed once at import time instead of rebuilding
+the full `types`/`domain` dict and calling encode_typed_data per request.
+
+Every field of ForwardRequest except `data` is a static 32-byte word, so the
+struct hash is a plain concatenation of words followed by keccak(data).
+
+Signing goes through eth_keys; installing `coincurve` makes it pick the
+libsecp256k1 backend automatically, which is much faster than pure Python.
+"""
+
+from eth_abi import encode
+from eth_keys import keys
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+EIP712_DOMAIN_TYPEHASH = keccak(
+    text="EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"
+)
+FORWARD_REQUEST_TYPEHASH = keccak(
+    text="ForwardRequest(address from,address to,uint256 value,uint256 gas,uint256 nonce,bytes data)"
+)
+
+FORWARD_REQUEST_ABI_TYPE = "(address,address,uint256,uint256,uint256,bytes)"
+EXECUTE_SELECTOR = keccak(text=f"execute({FORWARD_REQUEST_ABI_TYPE},bytes)")[:4]
+EXECUTE_BATCH_SELECTOR = keccak(text=f"executeBatch({FORWARD_REQUEST_ABI_TYPE}[],bytes[])")[:4]
+GET_NONCE_SELECTOR = keccak(text="getNonce(address)")[:4]
+# Executed(address indexed from, uint256 nonce, bool success), once per request whose nonce was used
+EXECUTED_TOPIC = keccak(text="Executed(address,uint256,bool)")
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+# Must match MinimalForwarder: chainId=0 and verifyingContract=address(0)
+DOMAIN_SEPARATOR = keccak(
+    EIP712_DOMAIN_TYPEHASH
+    + keccak(text="MinimalForwarder")
+    + keccak(text="1")
+    + (0).to_bytes(32, "big")
+    + bytes(32)
+)
+
+
+def _address_word(address):
+    return bytes(12) + bytes.fromhex(address[2:] if address.startswith("0x") else address)
+
+
+def _uint_word(value):
+    return int(value).to_bytes(32, "big")
+
+
+def hash_request(request):
+    """
+    Returns the 32-byte EIP-712 digest MinimalForwarder computes for `request`.
+    `request` uses the same keys as signed_request.json; `data` must be bytes.
+    """
+    struct_hash = keccak(
+        FORWARD_REQUEST_TYPEHASH
+        + _address_word(request["from"])
+        + _address_word(request["to"])
+        + _uint_word(request["value"])
+        + _uint_word(request["gas"])
+        + _uint_word(request["nonce"])
+        + keccak(request["data"])
+    )
+    return keccak(b"\x19\x01" + DOMAIN_SEPARATOR + struct_hash)
+
+
+def load_key(private_key):
+    """
+    Accepts a hex private key (with or without 0x) and returns an eth_keys PrivateKey.
+    """
+    if isinstance(private_key, keys.PrivateKey):
+        return private_key
+    if private_key.startswith("0x"):
+        private_key = private_key[2:]
+    return keys.PrivateKey(bytes.fromhex(private_key))
+
+
+def sign_request(request, private_key):
+    """
+    Signs `request` and returns the 65-byte r || s || v signature that
+    MinimalForwarder._recover expects (v is 27 or 28).
+    """
+    signature = load_key(private_key).sign_msg_hash(hash_request(request))
+    return signature.to_bytes()[:64] + bytes([signature.v + 27])
+
+
+def recover_signer(request, signature):
+    """
+    Off-chain mirror of MinimalForwarder._recover(_hashTypedData(req), signature).
+    Returns ZERO_ADDRESS wherever the contract's ecrecover would return address(0):
+    wrong length, v not 27/28, or r/s outside the curve order.
+    """
+    if len(signature) != 65 or signature[64] not in (27, 28):
+        return ZERO_ADDRESS
+    r = int.from_bytes(signature[:32], "big")
+    s = int.from_bytes(signature[32:64], "big")
+    if not (0 < r < SECP256K1_N and 0 < s < SECP256K1_N):
+        return ZERO_ADDRESS
+    try:
+        sig = keys.Signature(signature[:64] + bytes([signature[64] - 27]))
+        return sig.recover_public_key_from_msg_hash(hash_request(request)).to_checksum_address()
+    except Exception:
+        return ZERO_ADDRESS
+
+
+def request_tuple(request):
+    """
+    Returns the request as the ordered tuple MinimalForwarder's ABI expects.
+    """
+    return (
+        request["from"],
+        request["to"],
+        request["value"],
+        request["gas"],
+        request["nonce"],
+        request["data"],
+    )
+
+
+def encode_execute(request, signature):
+    """
+    Calldata for MinimalForwarder.execute(request, signature), encoded without
+    loading the forwarder ABI.
+    """
+    return EXECUTE_SELECTOR + encode(
+        [FORWARD_REQUEST_ABI_TYPE, "bytes"], [request_tuple(request), signature]
+    )
+
+
+def encode_execute_batch(requests, signatures):
+    """
+    Calldata for MinimalForwarder.executeBatch(requests, signatures).
+    """
+    return EXECUTE_BATCH_SELECTOR + encode(
+        [f"{FORWARD_REQUEST_ABI_TYPE}[]", "bytes[]"],
+        [[request_tuple(request) for request in requests], list(signatures)],
+    )
+
+
+def encode_get_nonce(address):
+    """
+    Calldata for MinimalForwarder.getNonce(address).
+    """
+    return GET_NONCE_SELECTOR + _address_word(address)
+
+
+def executed_requests(receipt, forwarder_address):
+    """
+    {(from, nonce): success} from the forwarder's Executed logs in `receipt`.
+    A request of the transaction that is missing was not executed at all
+    (bad signature or stale nonce in executeBatch, or the transaction reverted).
+    """
+    forwarder_address = forwarder_address.lower()
+    executed = {}
+    for log in receipt["logs"]:
+        topics = log["topics"]
+        if log["address"].lower() != forwarder_address or not topics or HexBytes(topics[0]) != EXECUTED_TOPIC:
+            continue
+        data = HexBytes(log["data"])
+        sender = to_checksum_address(HexBytes(topics[1])[12:])
+        executed[(sender, int.from_bytes(data[:32], "big"))] = data[63] == 1
+    return executed
+
+
+def request_to_json(request, signature):
+    """
+    Builds the {"request": ..., "signature": ...} payload written by gassless_renew.py.
+    """
+    return {
+        "request": {
+            "from": request["from"],
+            "to": request["to"],
+            "value": str(request["value"]),
+            "gas": request["gas"],
+            "nonce": request["nonce"],
+            "data": "0x" + request["data"].hex(),
+        },
+        "signature": "0x" + signature.hex(),
+    }
+
+
+def request_from_json(payload):
+    """
+    Inverse of request_to_json: returns (request, signature) with bytes fields decoded.
+    """
+    req_json = payload["request"]
+    data_str = req_json["data"]
+    if data_str.startswith("0x"):
+        data_str = data_str[2:]
+    signature = payload["signature"]
+    if signature.startswith("0x"):
+        signature = signature[2:]
+
+    request = {
+        "from": to_checksum_address(req_json["from"]),
+        "to": to_checksum_address(req_json["to"]),
+        "value": int(req_json["value"]),
+        "gas": int(req_json["gas"]),
+        "nonce": int(req_json["nonce"]),
+        "data": bytes.fromhex(data_str),
+    }
+    return request, bytes.fromhex(signature)
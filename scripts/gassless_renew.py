@@ -145,59 +145,80 @@
 
 
 import os
+import csv
 import json
+import time
+import multiprocessing
 from eth_account import Account
-from eth_account.messages import encode_structured_data
+from eth_account.messages import encode_typed_data
+from eth_utils import to_checksum_address
 from web3 import Web3
 
-def main():
+from scripts.calldata import CalldataBuilder, load_compact_abi
+from scripts.forward_request import load_key, request_to_json, sign_request
+from scripts.metrics import METRICS
+from scripts.renewal_coalescer import plan_renewal
+from scripts.renewal_prep import NonceAllocator, prepare_renewals
+from scripts.request_spool import SpoolWriter, encode_record, is_spool_path
+from scripts.rpc_client import forwarder_nonces, get_client
+
+def main(output_path="signed_request.json"):
     """
     1) Hard-codes or loads user private key
     2) Creates EIP-712 ForwardRequest for metaRenewMembership
     3) Domain EXACTLY matches your forwarder code:
        name="MinimalForwarder", version="1", chainId=0, verifyingContract=0x0000000000000000000000000000000000000000
     4) The request object also must match your forwarder logic
-    5) Writes 'signed_request.json' with the signature
+    5) Writes 'signed_request.json' with the signature, or appends the
+       request to `output_path` if that is a request spool (*.spool)
     """
 
     # --- Step 1: Basic Setup (could read from .env) ---
-    INFURA_PROJECT_ID = os.getenv("INFURA_PROJECT_ID", "YOUR_INFURA_KEY")
     user_private_key = os.getenv("USER_PRIVATE_KEY", "0xb6de2b...")
     # no leading 0x is fine if the library can parse it, but typically we do "0x..."
     forwarder_address = os.getenv("FORWARDER_ADDRESS", "<not actually used in domain>")
     membership_contract = os.getenv("MEMBERSHIP_ADDRESS", "0xA4bb4e1F3787...")
 
-    # We'll connect to Sepolia just to do things like w3.toWei
-    w3 = Web3(Web3.HTTPProvider(f"https://sepolia.infura.io/v3/{INFURA_PROJECT_ID}"))
+    export_payload = sign_single_request(user_private_key, membership_contract, forwarder_address, output_path)
+
+    print(f"Wrote {output_path}:")
+    print(json.dumps(export_payload, indent=2))
+    METRICS.print_report()
+    METRICS.export()
+
 
-    user = Account.from_key(user_private_key)
+def sign_single_request(user_private_key, membership_contract, forwarder_address, output_path="signed_request.json"):
+    """
+    Steps 1-5 of main() for one request, each timed as a METRICS stage.
+    Returns the {"request", "signature"} payload written to `output_path`.
+    """
+    with METRICS.stage("load_keys"):
+        user = Account.from_key(user_private_key)
     print(f"User address: {user.address}\n")
 
     # --- Step 2: Our minimal data for metaRenewMembership ---
     token_id = 1
     duration_seconds = 30*24*3600
-    membership_fee_wei = w3.to_wei("0.01", "ether")
+    # to_wei is a pure conversion; no need to open a provider connection for it
+    membership_fee_wei = Web3.to_wei("0.01", "ether")
     gas_limit = 100000
-    nonce = 0  # if your forwarder is getNonce() logic, we do 0 for now
-
-    # This is your metaRenewMembership function selector + param encoding
-    # 0x48ce240c = metaRenewMembership(uint256,uint256,address)
-    # We'll paste the last param as user.address
-    # Make sure user.address has no uppercase.
-    user_addr_no0x = user.address.lower().replace("0x","")
-
-    call_data_hex = (
-        "0x48ce240c" 
-        "0000000000000000000000000000000000000000000000000000000000000001"  # tokenId=1
-        "0000000000000000000000000000000000000000000000000000000000278d00"  # ~30 days
-        "000000000000000000000000" + user_addr_no0x  # realUser
-    )
-    # Convert to bytes for the EIP-712
-    call_data_bytes = bytes.fromhex(call_data_hex[2:])
+    nonce = 0
+    if forwarder_address.startswith("0x"):
+        # The forwarder only accepts the signer's current getNonce() value
+        with METRICS.stage("fetch_nonce"):
+            nonce = forwarder_nonces(get_client(), forwarder_address, [user.address], "pending")[user.address]
+
+    # metaRenewMembership(tokenId, additionalSeconds, realUser) calldata,
+    # with the selector taken from the NFTMembership ABI in abi/
+    with METRICS.stage("load_abi"):
+        calldata = CalldataBuilder(load_compact_abi("NFTMembership"))
+    with METRICS.stage("encode_calldata"):
+        call_data_bytes = calldata.encode("metaRenewMembership", token_id, duration_seconds, user.address)
+        call_data_hex = "0x" + call_data_bytes.hex()
 
     # --- Step 3: EIP-712 domain EXACTLY as per your forwarder code ---
     # Your forwarder uses "MinimalForwarder", "1", chainId=0, address(0)
-    # -> See lines in _hashTypedData where it sets chainId=0, verifyingContract=address(0)
+    # -> See the _DOMAIN_SEPARATOR constructor where it sets chainId=0, verifyingContract=address(0)
     domain = {
         "name": "MinimalForwarder",
         "version": "1",
@@ -239,9 +260,11 @@ def main():
     }
 
     # --- Step 4: Sign using EIP-712 approach ---
-    encoded_msg = encode_structured_data(structured_data)
-    signed = Account.sign_message(encoded_msg, private_key=user_private_key)
-    signature_hex = signed.signature.hex()
+    with METRICS.stage("encode_typed_data"):
+        encoded_msg = encode_typed_data(full_message=structured_data)
+    with METRICS.stage("sign"):
+        signed = Account.sign_message(encoded_msg, private_key=user_private_key)
+        signature_hex = signed.signature.hex()
 
     print("User script: EIP-712 signature created.\n")
 
@@ -252,7 +275,7 @@ def main():
         "value": str(request["value"]),
         "gas": request["gas"],
         "nonce": request["nonce"],
-        "data": call_data_hex  # revert to the "0x48ce..." for the JSON
+        "data": call_data_hex  # hex form of the same calldata for the JSON
     }
 
     export_payload = {
@@ -260,8 +283,315 @@ def main():
         "signature": signature_hex
     }
 
-    with open("signed_request.json","w") as f:
-        json.dump(export_payload, f, indent=2)
+    # --- Step 5: Write the signed request for the relayer ---
+    if is_spool_path(output_path):
+        with METRICS.stage("write_spool"), SpoolWriter(output_path) as spool:
+            spool.append(request, signed.signature)
+    else:
+        with METRICS.stage("write_json"):
+            with open(output_path,"w") as f:
+                json.dump(export_payload, f, indent=2)
+    METRICS.incr("requests_signed")
+    return export_payload
 
-    print("Wrote signed_request.json:")
-    print(json.dumps(export_payload, indent=2))
+
+def renew_cumulative(token_id=1, seconds=30*24*3600, spool_path="signed_requests.spool"):
+    """
+    Signs one metaRenewMembership request and appends it to the request spool.
+
+    The request takes the next free forwarder nonce after the user's requests
+    still waiting in the spool (not yet acknowledged by the relayer). If the
+    newest waiting request is a renewal of `token_id` that a coalescing
+    relayer is still holding (listed in `<spool>.held`), the new one reuses
+    its nonce and carries both durations, and the relayer sends one renewal
+    for the two clicks. Once the relayer has released a nonce only one
+    request for it can ever be accepted, so it is not reused.
+
+    Usage:
+        brownie run scripts/gassless_renew.py renew_cumulative 1 2592000 signed_requests.spool
+    """
+    user_private_key = os.getenv("USER_PRIVATE_KEY")
+    if not user_private_key:
+        raise ValueError("USER_PRIVATE_KEY not set in environment (or code).")
+    forwarder_address = os.getenv("FORWARDER_ADDRESS")
+    if not forwarder_address:
+        raise ValueError("FORWARDER_ADDRESS not set in environment (or code).")
+    membership_contract = os.getenv("MEMBERSHIP_ADDRESS")
+    if not membership_contract:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+    token_id, seconds = int(token_id), int(seconds)
+
+    with METRICS.stage("load_keys"):
+        address = load_key(user_private_key).public_key.to_checksum_address()
+    with METRICS.stage("fetch_nonce"):
+        chain_nonce = forwarder_nonces(get_client(), forwarder_address, [address], "pending")[address]
+    nonce, held_seconds = plan_renewal(spool_path, address, chain_nonce, token_id)
+
+    with METRICS.stage("load_abi"):
+        calldata = CalldataBuilder(load_compact_abi("NFTMembership"))
+    with METRICS.stage("encode_calldata"):
+        data = calldata.encode("metaRenewMembership", token_id, held_seconds + seconds, address)
+    request = {
+        "from": address,
+        "to": to_checksum_address(membership_contract),
+        "value": 0,
+        "gas": BULK_GAS_LIMIT,
+        "nonce": nonce,
+        "data": data,
+    }
+    with METRICS.stage("sign"):
+        signature = sign_request(request, user_private_key)
+    with METRICS.stage("write_spool"), SpoolWriter(spool_path) as spool:
+        spool.append(request, signature)
+    METRICS.incr("requests_signed")
+
+    if held_seconds:
+        print(f"Token {token_id}: +{seconds}s added to the waiting renewal at nonce {nonce} "
+              f"({held_seconds + seconds}s in total)")
+    else:
+        print(f"Token {token_id}: +{seconds}s at nonce {nonce}")
+    print(f"Appended to {spool_path}")
+    METRICS.print_report()
+    METRICS.export()
+    return request
+
+
+# ----------------- Bulk signing -----------------
+# Gas limit signed into every bulk ForwardRequest (same as main()): the most
+# the forwarder may forward to the call, not a measured cost.
+BULK_GAS_LIMIT = 100000
+
+# Per-process state, filled by _init_signer in each pool worker
+_worker_state = {}
+
+
+def _read_renewals(path):
+    """
+    Streams (user_key, token_id, seconds, nonce) rows from a CSV file with a
+    `user_key,token_id,seconds[,nonce]` header. A missing or blank nonce is
+    None and gets filled in by renewal_prep.prepare_renewals.
+    """
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            nonce = (row.get("nonce") or "").strip()
+            yield (
+                row["user_key"].strip(),
+                int(row["token_id"]),
+                int(row["seconds"]),
+                int(nonce) if nonce else None,
+            )
+
+
+def _init_signer(membership_contract, gas_limit, spool=False):
+    _worker_state["to"] = membership_contract
+    _worker_state["gas"] = gas_limit
+    # Spool records instead of JSON lines
+    _worker_state["spool"] = spool
+    # user_key -> (PrivateKey, address); deriving the address is the slow part
+    _worker_state["keys"] = {}
+    # Read the ABI once per worker, not once per row
+    _worker_state["meta_renew"] = CalldataBuilder(load_compact_abi("NFTMembership")).functions["metaRenewMembership"]
+
+
+def _sign_row(row):
+    user_key, token_id, seconds, nonce = row
+    if nonce is None:
+        raise ValueError(f"No nonce for token {token_id}; set FORWARDER_ADDRESS to fetch nonces")
+
+    cached = _worker_state["keys"].get(user_key)
+    if cached is None:
+        with METRICS.stage("load_keys"):
+            key = load_key(user_key)
+            cached = (key, key.public_key.to_checksum_address())
+        _worker_state["keys"][user_key] = cached
+    key, address = cached
+
+    with METRICS.stage("encode_calldata"):
+        data = _worker_state["meta_renew"].encode(token_id, seconds, address)
+    request = {
+        "from": address,
+        "to": _worker_state["to"],
+        "value": 0,
+        "gas": _worker_state["gas"],
+        "nonce": nonce,
+        "data": data,
+    }
+    with METRICS.stage("sign"):
+        signature = sign_request(request, key)
+    if _worker_state["spool"]:
+        with METRICS.stage("write_spool"):
+            return encode_record(request, signature)
+    with METRICS.stage("write_json"):
+        return json.dumps(request_to_json(request, signature), separators=(",", ":")) + "\n"
+
+
+def _sign_row_measured(row):
+    """
+    _sign_row plus this worker's stage timings for the row, for the parent to merge.
+    """
+    line = _sign_row(row)
+    return line, METRICS.drain()
+
+
+def bulk_sign(input_path="renewals.csv", output_path="signed_requests.jsonl", workers=0):
+    """
+    Bulk mode: pre-signs one metaRenewMembership ForwardRequest per CSV row.
+
+    - Reads (user_key, token_id, seconds, nonce) rows from `input_path`
+    - With FORWARDER_ADDRESS set, fills in blank nonces: each new user's
+      getNonce is read in batched eth_calls (one round-trip per 100 users)
+      and a user with several rows gets consecutive nonces
+    - Uses the precomputed domain separator / ForwardRequest typehash
+      from scripts/forward_request.py instead of encode_typed_data
+    - Spreads signing over `workers` processes (default: one per core)
+    - Streams {"request", "signature"} objects to `output_path` as JSON Lines,
+      in the same order as the input; an `output_path` ending in .spool is
+      appended to as a request spool instead (scripts/request_spool.py)
+
+    metaRenewMembership is not payable, so bulk requests forward value=0.
+
+    Usage:
+        brownie run scripts/gassless_renew.py bulk_sign renewals.csv signed_requests.jsonl 8
+    """
+    membership_contract = os.getenv("MEMBERSHIP_ADDRESS")
+    if not membership_contract:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+    membership_contract = to_checksum_address(membership_contract)
+
+    workers = int(workers) or os.cpu_count() or 1
+
+    rows = _read_renewals(input_path)
+    allocator = None
+    forwarder_address = os.getenv("FORWARDER_ADDRESS")
+    if forwarder_address:
+        allocator = NonceAllocator(get_client(), forwarder_address)
+        rows = prepare_renewals(rows, allocator)
+
+    spool = is_spool_path(output_path)
+    count = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(
+        workers, initializer=_init_signer, initargs=(membership_contract, BULK_GAS_LIMIT, spool)
+    ) as pool, (SpoolWriter(output_path) if spool else open(output_path, "w")) as out:
+        write = out.append_record if spool else out.write
+        if METRICS.enabled:
+            for record, timers in pool.imap(_sign_row_measured, rows, chunksize=256):
+                METRICS.merge(timers)
+                write(record)
+                count += 1
+        else:
+            for record in pool.imap(_sign_row, rows, chunksize=256):
+                write(record)
+                count += 1
+    elapsed = time.perf_counter() - start
+    METRICS.incr("requests_signed", count)
+
+    if allocator is not None:
+        print(f"Fetched nonces for {allocator.fetched} user(s) in "
+              f"{allocator.client.stats.round_trips} RPC round-trip(s)")
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Signed {count} request(s) in {elapsed:.2f}s with {workers} worker(s)")
+    print(f"Throughput: {rate:,.0f} sig/s total, {rate / workers:,.0f} sig/s per core")
+    print(f"Wrote {output_path}")
+    METRICS.print_report()
+    METRICS.export()
+
+
+def benchmark_signing(count=1000):
+    """
+    Single-core comparison of the main() signing path (structured dict +
+    encode_typed_data + Account.sign_message) against the precomputed
+    path used by bulk_sign, in signatures per second.
+
+    Usage:
+        brownie run scripts/gassless_renew.py benchmark_signing 1000
+    """
+    count = int(count)
+    user = Account.create()
+    membership_contract = "0x" + "11" * 20
+    calldata = CalldataBuilder(load_compact_abi("NFTMembership")).encode(
+        "metaRenewMembership", 1, 30 * 24 * 3600, user.address
+    )
+
+    domain = {
+        "name": "MinimalForwarder",
+        "version": "1",
+        "chainId": 0,
+        "verifyingContract": "0x0000000000000000000000000000000000000000"
+    }
+    types = {
+        "EIP712Domain": [
+            {"name": "name", "type": "string"},
+            {"name": "version", "type": "string"},
+            {"name": "chainId", "type": "uint256"},
+            {"name": "verifyingContract", "type": "address"}
+        ],
+        "ForwardRequest": [
+            {"name": "from",   "type": "address"},
+            {"name": "to",     "type": "address"},
+            {"name": "value",  "type": "uint256"},
+            {"name": "gas",    "type": "uint256"},
+            {"name": "nonce",  "type": "uint256"},
+            {"name": "data",   "type": "bytes"}
+        ]
+    }
+
+    start = time.perf_counter()
+    for nonce in range(count):
+        request = {
+            "from": user.address, "to": membership_contract, "value": 0,
+            "gas": BULK_GAS_LIMIT, "nonce": nonce, "data": calldata,
+        }
+        structured_data = {
+            "types": types, "domain": domain,
+            "primaryType": "ForwardRequest", "message": request,
+        }
+        Account.sign_message(encode_typed_data(full_message=structured_data), private_key=user.key)
+    single = count / (time.perf_counter() - start)
+
+    _init_signer(membership_contract, BULK_GAS_LIMIT)
+    user_key = user.key.hex()
+    start = time.perf_counter()
+    for nonce in range(count):
+        _sign_row((user_key, 1, 30 * 24 * 3600, nonce))
+    bulk = count / (time.perf_counter() - start)
+
+    print(f"Single-request path: {single:,.0f} sig/s per core")
+    print(f"Precomputed path:    {bulk:,.0f} sig/s per core ({bulk / single:.1f}x)")
+
+
+def baseline(count=1000, output_path="metrics_baseline.jsonl"):
+    """
+    Records stage timings for one request through the main() path and for
+    `count` requests through the bulk path (in-process, so every stage is
+    seen), prints both and appends them to `output_path` as JSON lines.
+    With METRICS_PROFILE_DIR set, the bulk loop is also sampled.
+
+    Usage:
+        brownie run scripts/gassless_renew.py baseline 1000
+    """
+    count = int(count)
+    METRICS.enabled = True
+    user = Account.create()
+    membership_contract = "0x" + "11" * 20
+
+    METRICS.reset()
+    sign_single_request(user.key.hex(), membership_contract, "<no nonce lookup>", output_path="baseline_request.json")
+    print("One request (main path):")
+    METRICS.print_report()
+    METRICS.export(output_path)
+
+    users = [Account.create().key.hex() for _ in range(max(count // 10, 1))]
+    rows = [(users[i % len(users)], i + 1, 30 * 24 * 3600, i // len(users)) for i in range(count)]
+    METRICS.reset()
+    _init_signer(membership_contract, BULK_GAS_LIMIT)
+    with METRICS.profile("bulk_sign_loop"):
+        with METRICS.stage("bulk_total"):
+            for row in rows:
+                _sign_row(row)
+    METRICS.incr("requests_signed", count)
+    print(f"\n{count:,} requests (bulk path, {len(users):,} users, one core):")
+    METRICS.print_report()
+    METRICS.export(output_path)
+    print(f"\nAppended both snapshots to {output_path}")
@@ -0,0 +1,298 @@
+"""
+End-to-end load test: many simulated members against a local chain.
+
+Deploys fresh MinimalForwarder / NFTMembership contracts, gives each of
+`users` throwaway accounts one token and some ETH, then drives `operations`
+operations drawn from a weighted mix:
+
+    mint        user sends mintMembership for a new token
+    renew       user sends renewMembership for its first token
+    meta_renew  user signs a metaRenewMembership ForwardRequest, relayed by
+                a RelayerPool (relayer_daemon) with `relayers` keys
+
+Every user runs its operations in order (one account nonce and one
+forwarder nonce each), all users at once. The report has overall
+throughput and, per operation, count, failures, latency percentiles
+(submit to receipt) and mean gas. It is written to `output_path` as JSON.
+
+Given a `baseline_path` (an earlier report), the run fails with exit code 1
+when throughput drops or mean gas grows by more than `tolerance`, p99
+latency grows by more than `latency_tolerance`, or more than
+`max_failures` operations fail.
+
+Usage:
+    brownie run scripts/load_test.py
+    brownie run scripts/load_test.py main 200 5000 mint=1,renew=2,meta_renew=3
+    brownie run scripts/load_test.py main 200 5000 mint=1,renew=2,meta_renew=3 load_test_baseline.json
+"""
+
+import json
+import time
+import random
+import asyncio
+
+from eth_account import Account
+from web3.exceptions import TransactionNotFound
+
+from scripts.forward_request import load_key, sign_request
+from scripts.relayer_daemon import RelayerPool, _raw_transaction, percentile
+from scripts.rpc_web3 import async_web3_for
+
+OPERATIONS = ("mint", "renew", "meta_renew")
+DEFAULT_MIX = "mint=1,renew=2,meta_renew=3"
+PRICE = 10**16  # 0.01 ETH in Wei
+DURATION = 30 * 24 * 60 * 60  # 30 days in seconds
+RENEW_SECONDS = 60
+# Fixed gas limits, so the load test does not add an eth_estimateGas per operation
+GAS_LIMITS = {"mint": 300000, "renew": 120000}
+META_GAS = 100000
+
+
+def parse_mix(mix):
+    """
+    "mint=1,renew=2" -> {"mint": 1.0, "renew": 2.0}
+    """
+    weights = {}
+    for part in str(mix).split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r} in mix (expected one of {', '.join(OPERATIONS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class _Recorder:
+    def __init__(self):
+        self.latencies = {name: [] for name in OPERATIONS}
+        self.gas = {name: 0 for name in OPERATIONS}
+        self.confirmed = {name: 0 for name in OPERATIONS}
+        self.failed = {name: 0 for name in OPERATIONS}
+
+    def operation_report(self, name):
+        latencies = sorted(self.latencies[name])
+        return {
+            "count": self.confirmed[name] + self.failed[name],
+            "failed": self.failed[name],
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p99_s": percentile(latencies, 99),
+            "gas_mean": self.gas[name] // self.confirmed[name] if self.confirmed[name] else 0,
+        }
+
+
+async def _wait_for_receipt(w3, tx_hash, poll_interval):
+    while True:
+        try:
+            return await w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            await asyncio.sleep(poll_interval)
+
+
+class _User:
+    def __init__(self, account, token_id):
+        self.account = account
+        # eth_keys key for ForwardRequest signatures, derived once
+        self.signing_key = load_key(account.key.hex())
+        self.token_id = token_id
+        self.nonce = 0
+        self.forwarder_nonce = 0
+
+
+async def _send(w3, recorder, name, user, tx, poll_interval):
+    tx = dict(tx, nonce=user.nonce)
+    start = time.perf_counter()
+    try:
+        tx_hash = await w3.eth.send_raw_transaction(_raw_transaction(user.account.sign_transaction(tx)))
+    except Exception as e:
+        recorder.failed[name] += 1
+        print(f"❌ {name} from {user.account.address} not sent: {e}")
+        return
+    user.nonce += 1
+    receipt = await _wait_for_receipt(w3, tx_hash, poll_interval)
+    recorder.latencies[name].append(time.perf_counter() - start)
+    if receipt["status"] == 1:
+        recorder.confirmed[name] += 1
+        recorder.gas[name] += receipt["gasUsed"]
+    else:
+        recorder.failed[name] += 1
+
+
+async def _session(w3, nft, pool, recorder, user, operations, chain_id, gas_price, poll_interval):
+    base = {"chainId": chain_id, "gasPrice": gas_price, "to": nft.address}
+    for name in operations:
+        if name == "mint":
+            data = nft.mintMembership.encode_input(user.account.address, DURATION)
+            await _send(w3, recorder, name, user, dict(base, data=data, value=PRICE, gas=GAS_LIMITS[name]), poll_interval)
+        elif name == "renew":
+            data = nft.renewMembership.encode_input(user.token_id, RENEW_SECONDS)
+            await _send(w3, recorder, name, user, dict(base, data=data, value=PRICE, gas=GAS_LIMITS[name]), poll_interval)
+        else:
+            request = {
+                "from": user.account.address,
+                "to": nft.address,
+                "value": 0,
+                "gas": META_GAS,
+                "nonce": user.forwarder_nonce,
+                "data": bytes.fromhex(
+                    nft.metaRenewMembership.encode_input(user.token_id, RENEW_SECONDS, user.account.address)[2:]
+                ),
+            }
+            user.forwarder_nonce += 1
+            await pool.submit(request, sign_request(request, user.signing_key))
+
+
+async def run_load(w3, forwarder, nft, users, plans, relayer_keys, poll_interval=0.05):
+    """
+    Runs every user's plan concurrently and returns the report dict.
+    """
+    recorder = _Recorder()
+    pool = RelayerPool(w3, forwarder.address, relayer_keys, poll_interval=poll_interval)
+    chain_id = await w3.eth.chain_id
+    gas_price = await w3.eth.gas_price
+    for user in users:
+        user.nonce = await w3.eth.get_transaction_count(user.account.address, "pending")
+
+    await pool.start()
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            _session(w3, nft, pool, recorder, user, plan, chain_id, gas_price, poll_interval)
+            for user, plan in zip(users, plans)
+        ))
+        await pool.drain()
+    finally:
+        await pool.stop()
+    elapsed = time.perf_counter() - start
+
+    operations = {name: recorder.operation_report(name) for name in ("mint", "renew")}
+    relayed = pool.stats.report()
+    operations["meta_renew"] = {
+        "count": relayed["confirmed"] + relayed["reverted"] + relayed["send_errors"] + relayed["rejected"],
+        "failed": relayed["reverted"] + relayed["send_errors"] + relayed["rejected"],
+        "latency_p50_s": relayed["latency_p50_s"],
+        "latency_p99_s": relayed["latency_p99_s"],
+        "gas_mean": relayed["gas_per_request"],
+    }
+    succeeded = sum(op["count"] - op["failed"] for op in operations.values())
+    return {
+        "users": len(users),
+        "relayers": len(relayer_keys),
+        "elapsed_s": elapsed,
+        "ops_per_s": succeeded / elapsed if elapsed > 0 else 0.0,
+        "failed": sum(op["failed"] for op in operations.values()),
+        "operations": operations,
+    }
+
+
+def check_regressions(report, baseline=None, tolerance=0.10, latency_tolerance=0.50, max_failures=0):
+    """
+    Returns a list of human-readable regressions of `report` against
+    `baseline` (both load test reports); empty if the run passes.
+    """
+    problems = []
+    if report["failed"] > max_failures:
+        problems.append(f"{report['failed']} failed operation(s) (allowed: {max_failures})")
+    if not baseline:
+        return problems
+
+    floor = baseline["ops_per_s"] * (1 - tolerance)
+    if report["ops_per_s"] < floor:
+        problems.append(f"throughput {report['ops_per_s']:.1f} ops/s < {floor:.1f} "
+                        f"(baseline {baseline['ops_per_s']:.1f})")
+    for name, op in report["operations"].items():
+        before = baseline["operations"].get(name)
+        if not before or not op["count"] or not before["count"]:
+            continue
+        if op["gas_mean"] > before["gas_mean"] * (1 + tolerance):
+            problems.append(f"{name} gas {op['gas_mean']:,} > baseline {before['gas_mean']:,} + {tolerance:.0%}")
+        if op["latency_p99_s"] > before["latency_p99_s"] * (1 + latency_tolerance):
+            problems.append(f"{name} p99 latency {op['latency_p99_s'] * 1000:.0f}ms > baseline "
+                            f"{before['latency_p99_s'] * 1000:.0f}ms + {latency_tolerance:.0%}")
+    return problems
+
+
+def print_load_report(report):
+    print(f"\n📊 {report['users']} user(s), {report['relayers']} relayer key(s): "
+          f"{report['ops_per_s']:.1f} ops/s over {report['elapsed_s']:.2f}s, {report['failed']} failed")
+    print("| **Operation** | **Count** | **Failed** | **p50 (ms)** | **p99 (ms)** | **Gas (mean)** |")
+    print("|---------------|----------:|-----------:|-------------:|-------------:|---------------:|")
+    for name, op in report["operations"].items():
+        print(f"| `{name}` | {op['count']} | {op['failed']} | {op['latency_p50_s'] * 1000:.0f} "
+              f"| {op['latency_p99_s'] * 1000:.0f} | {op['gas_mean']:,} |")
+
+
+def main(
+    users=50,
+    operations=1000,
+    mix=DEFAULT_MIX,
+    baseline_path=None,
+    output_path="load_test.json",
+    relayers=4,
+    tolerance=0.10,
+    latency_tolerance=0.50,
+    max_failures=0,
+):
+    """
+    Deploys, runs the load test and exits non-zero on a regression.
+    """
+    from brownie import MinimalForwarder, NFTMembership, accounts, network, web3
+
+    active = network.show_active()
+    print(f"\n🔗 Connected to network: {active}")
+    if "fork" not in active and active not in ("development", "anvil", "hardhat", "geth-dev"):
+        print("⚠️ This deploys contracts and funds throwaway accounts; run it on a local dev chain.")
+
+    users, operations, relayers = int(users), int(operations), int(relayers)
+    weights = parse_mix(mix)
+    deployer = accounts[0]
+
+    forwarder = MinimalForwarder.deploy({"from": deployer})
+    nft = NFTMembership.deploy("MembershipPass", "MBR", PRICE, forwarder, {"from": deployer})
+    simulated = [_User(Account.create(), token_id) for token_id in range(1, users + 1)]
+    for start in range(0, users, 100):
+        chunk = [user.account.address for user in simulated[start:start + 100]]
+        nft.batchMintMembership(chunk, [DURATION] * len(chunk), {"from": deployer, "value": PRICE * len(chunk)})
+
+    rng = random.Random(5)
+    names = list(weights)
+    plans = [[] for _ in simulated]
+    for i, name in enumerate(rng.choices(names, weights=[weights[name] for name in names], k=operations)):
+        plans[i % users].append(name)
+    # Enough ETH for each user's direct operations plus gas
+    for user, plan in zip(simulated, plans):
+        deployer.transfer(user.account.address, PRICE * len(plan) + 10**17)
+    relayer_accounts = [Account.create() for _ in range(relayers)]
+    for relayer in relayer_accounts:
+        deployer.transfer(relayer.address, "10 ether")
+
+    expiries_before = sum(nft.validUntil(user.token_id) for user in simulated)
+    report = asyncio.run(run_load(
+        async_web3_for(web3.provider.endpoint_uri), forwarder, nft, simulated, plans,
+        [relayer.key.hex() for relayer in relayer_accounts],
+    ))
+    report["mix"] = weights
+
+    # execute() succeeds even when the forwarded call reverts, so compare the
+    # renewals that landed with the ones that were reported as confirmed
+    renewed = (sum(nft.validUntil(user.token_id) for user in simulated) - expiries_before) // RENEW_SECONDS
+    confirmed = sum(report["operations"][name]["count"] - report["operations"][name]["failed"]
+                    for name in ("renew", "meta_renew"))
+    if renewed < confirmed:
+        report["operations"]["meta_renew"]["failed"] += confirmed - renewed
+        report["failed"] += confirmed - renewed
+    print_load_report(report)
+
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\n📝 Wrote {output_path}")
+
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    problems = check_regressions(report, baseline, float(tolerance), float(latency_tolerance), int(max_failures))
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        raise SystemExit(1)
+    print("✅ No regressions")
@@ -0,0 +1,327 @@
+"""
+Reorg-safe streaming consumer for NFTMembership / MinimalForwarder logs.
+
+data_analysis.py and the indexers read logs right up to the latest block,
+so anything they store can include events that a reorg later drops.
+LogStream follows the head instead, `confirmations` blocks behind it, and
+remembers the hashes of recent blocks it has delivered:
+
+  - each poll fetches only the blocks after the last delivered one (one
+    eth_getLogs per MAX_LOG_RANGE blocks), so nothing is re-scanned
+  - before that, the hash of the last delivered block is compared with the
+    chain; if it changed, the remembered hashes are walked back to the
+    newest block still on the chain, and a rollback item tells consumers
+    to drop everything after it
+  - the target block's hash is read before and after eth_getLogs, so a
+    reorg during the fetch is retried instead of delivered
+  - logs are decoded with the compact ABIs in abi/ (MinimalForwarder has no
+    events today, so its address only matters once it emits some)
+
+Items are plain dicts, yielded in chain order:
+
+    {"type": "log", "block_number", "block_hash", "tx_hash", "log_index",
+     "address", "event", "args"}
+    {"type": "rollback", "block_number"}    # drop rows with block_number > this
+    {"type": "checkpoint", "block_number", "block_hash"}
+
+With confirmations=0 logs arrive one poll after they are mined and a reorg
+shows up as a rollback; with confirmations=N only reorgs deeper than N
+blocks do. SqliteEventSink is a downstream store that applies all three
+item types and remembers enough hashes to resume safely after a restart.
+
+Usage:
+    brownie run scripts/log_stream.py main stream_events.db 12 --network sepolia
+
+Environment:
+    MEMBERSHIP_ADDRESS  Deployed NFTMembership
+    FORWARDER_ADDRESS   Deployed MinimalForwarder (optional)
+"""
+
+import os
+import json
+import time
+import sqlite3
+
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+from web3.exceptions import BlockNotFound
+
+from scripts.calldata import load_compact_abi
+from scripts.read_cache import MAX_LOG_RANGE
+
+
+class ReorgTooDeepError(Exception):
+    """
+    Raised when none of the remembered block hashes is on the chain any more.
+    """
+
+
+def _hex(value):
+    return "0x" + HexBytes(value).hex().removeprefix("0x")
+
+
+class EventDecoder:
+    """
+    topic0 -> event decoding for the events of one or more compact ABIs.
+    """
+
+    def __init__(self, abis):
+        self._events = {}
+        for abi in abis:
+            for event in abi:
+                if event["type"] != "event":
+                    continue
+                signature = f"{event['name']}({','.join(arg['type'] for arg in event['inputs'])})"
+                self._events["0x" + keccak(text=signature).hex()] = event
+
+    @classmethod
+    def for_contracts(cls, *contract_names):
+        return cls([load_compact_abi(name) for name in contract_names])
+
+    def decode(self, log):
+        """
+        Returns (event name, {arg: value}) or (None, {}) for unknown topics.
+        """
+        event = self._events.get(_hex(log["topics"][0]))
+        if event is None:
+            return None, {}
+        topics = iter(log["topics"][1:])
+        data_inputs = [arg for arg in event["inputs"] if not arg.get("indexed")]
+        data_values = iter(decode([arg["type"] for arg in data_inputs], HexBytes(log["data"])))
+        args = {}
+        for arg in event["inputs"]:
+            if arg.get("indexed"):
+                args[arg["name"]] = decode([arg["type"]], HexBytes(next(topics)))[0]
+            else:
+                args[arg["name"]] = next(data_values)
+            if arg["type"] == "address":
+                args[arg["name"]] = to_checksum_address(args[arg["name"]])
+        return event["name"], args
+
+
+class LogStream:
+    """
+    Follows `addresses` from `start_block`, `confirmations` blocks behind the head.
+    """
+
+    def __init__(
+        self,
+        web3,
+        addresses,
+        start_block=0,
+        confirmations=12,
+        max_reorg_depth=128,
+        poll_interval=2.0,
+        decoder=None,
+        known_hashes=None,
+    ):
+        self.web3 = web3
+        self.addresses = [to_checksum_address(address) for address in addresses]
+        self.confirmations = int(confirmations)
+        self.max_reorg_depth = int(max_reorg_depth)
+        self.poll_interval = poll_interval
+        self.decoder = decoder or EventDecoder.for_contracts("NFTMembership", "MinimalForwarder")
+
+        # block number -> hash of delivered blocks (tips and blocks with logs)
+        self._hashes = dict(known_hashes or {})
+        self.last_block = max(self._hashes, default=int(start_block) - 1)
+        self.rollbacks = 0
+
+    def _block_hash(self, block_number):
+        """
+        Canonical hash of `block_number`, or None past the head (after a reorg to a shorter chain).
+        """
+        try:
+            return _hex(self.web3.eth.get_block(block_number)["hash"])
+        except BlockNotFound:
+            return None
+
+    def _find_fork_point(self):
+        """
+        Newest remembered block that is still on the chain.
+        """
+        for block_number in sorted(self._hashes, reverse=True):
+            if self._block_hash(block_number) == self._hashes[block_number]:
+                return block_number
+        raise ReorgTooDeepError(
+            f"None of the {len(self._hashes)} remembered block(s) since "
+            f"{min(self._hashes, default=self.last_block)} is on the chain any more"
+        )
+
+    def _rollback(self, block_number):
+        self._hashes = {number: h for number, h in self._hashes.items() if number <= block_number}
+        self.last_block = block_number
+        self.rollbacks += 1
+        return {"type": "rollback", "block_number": block_number}
+
+    def _remember(self, block_number, block_hash):
+        self._hashes[block_number] = block_hash
+        oldest = block_number - self.max_reorg_depth
+        if min(self._hashes) < oldest:
+            self._hashes = {number: h for number, h in self._hashes.items() if number >= oldest}
+
+    def _log_item(self, log):
+        event, args = self.decoder.decode(log)
+        return {
+            "type": "log",
+            "block_number": log["blockNumber"],
+            "block_hash": _hex(log["blockHash"]),
+            "tx_hash": _hex(log["transactionHash"]),
+            "log_index": log["logIndex"],
+            "address": to_checksum_address(log["address"]),
+            "event": event,
+            "args": args,
+        }
+
+    def poll(self):
+        """
+        One step: returns the rollback / log / checkpoint items for the blocks
+        that became available since the last poll (possibly none).
+        """
+        items = []
+        target = self.web3.eth.block_number - self.confirmations
+        # Read first: if it is unchanged after eth_getLogs, the chain up to
+        # `target` did not move while this poll was looking at it
+        target_hash = self._block_hash(target) if target > self.last_block else None
+
+        tip_hash = self._hashes.get(self.last_block)
+        if tip_hash is not None and self._block_hash(self.last_block) != tip_hash:
+            items.append(self._rollback(self._find_fork_point()))
+        if target <= self.last_block:
+            return items
+        if target_hash is None:
+            target_hash = self._block_hash(target)
+
+        logs = []
+        start = self.last_block + 1
+        while start <= target:
+            end = min(start + MAX_LOG_RANGE - 1, target)
+            logs += self.web3.eth.get_logs({"address": self.addresses, "fromBlock": start, "toBlock": end})
+            start = end + 1
+        if self._block_hash(target) != target_hash:
+            # The chain changed under eth_getLogs; deliver nothing and retry next poll
+            return items
+
+        for log in logs:
+            if log.get("removed"):
+                continue
+            item = self._log_item(log)
+            self._remember(item["block_number"], item["block_hash"])
+            items.append(item)
+        self._remember(target, target_hash)
+        self.last_block = target
+        items.append({"type": "checkpoint", "block_number": target, "block_hash": target_hash})
+        return items
+
+    def follow(self):
+        """
+        Generator over poll() items, forever; sleeps poll_interval when idle.
+        """
+        while True:
+            items = self.poll()
+            yield from items
+            if not any(item["type"] == "log" for item in items):
+                time.sleep(self.poll_interval)
+
+
+SINK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    block_hash   TEXT    NOT NULL,
+    tx_hash      TEXT    NOT NULL,
+    log_index    INTEGER NOT NULL,
+    address      TEXT    NOT NULL,
+    event        TEXT,
+    args         TEXT    NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_events_block ON events (block_number);
+CREATE TABLE IF NOT EXISTS stream_blocks (
+    block_number INTEGER PRIMARY KEY,
+    block_hash   TEXT    NOT NULL
+);
+"""
+
+
+def _json_value(value):
+    return _hex(value) if isinstance(value, bytes) else value
+
+
+class SqliteEventSink:
+    """
+    Stores stream items in SQLite. Rollbacks delete the rows after the fork
+    point; checkpoints record block hashes so known_hashes() can seed a
+    LogStream after a restart.
+    """
+
+    def __init__(self, db_path="stream_events.db", keep_hashes=128):
+        self.keep_hashes = keep_hashes
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SINK_SCHEMA)
+        self._pending = []
+
+    def close(self):
+        self.db.close()
+
+    def known_hashes(self):
+        return dict(self.db.execute("SELECT block_number, block_hash FROM stream_blocks"))
+
+    def apply(self, item):
+        if item["type"] == "log":
+            args = json.dumps({name: _json_value(value) for name, value in item["args"].items()})
+            self._pending.append((
+                item["block_number"], item["block_hash"], item["tx_hash"],
+                item["log_index"], item["address"], item["event"], args,
+            ))
+        elif item["type"] == "rollback":
+            with self.db:
+                self.db.execute("DELETE FROM events WHERE block_number > ?", (item["block_number"],))
+                self.db.execute("DELETE FROM stream_blocks WHERE block_number > ?", (item["block_number"],))
+        else:
+            # Rows and the checkpoint hash commit together
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", self._pending)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO stream_blocks VALUES (?, ?)", (item["block_number"], item["block_hash"])
+                )
+                self.db.execute(
+                    "DELETE FROM stream_blocks WHERE block_number < ?", (item["block_number"] - self.keep_hashes,)
+                )
+            self._pending = []
+
+    def events(self, from_block=0):
+        return self.db.execute(
+            "SELECT block_number, event, args FROM events WHERE block_number >= ? ORDER BY block_number, log_index",
+            (from_block,),
+        ).fetchall()
+
+
+def main(db_path="stream_events.db", confirmations=12, start_block=0):
+    """
+    Streams NFTMembership (and MinimalForwarder) events into `db_path` until interrupted.
+    """
+    from brownie import network
+
+    contract_address = os.getenv("MEMBERSHIP_ADDRESS")
+    if not contract_address:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+    addresses = [contract_address] + ([os.getenv("FORWARDER_ADDRESS")] if os.getenv("FORWARDER_ADDRESS") else [])
+
+    sink = SqliteEventSink(db_path)
+    stream = LogStream(
+        network.web3, addresses, start_block=int(start_block),
+        confirmations=int(confirmations), known_hashes=sink.known_hashes(),
+    )
+    print(f"🔄 Streaming from block {stream.last_block + 1}, {stream.confirmations} confirmation(s)")
+    try:
+        for item in stream.follow():
+            sink.apply(item)
+            if item["type"] == "log":
+                print(f"📥 {item['block_number']} {item['event']} {item['args']}")
+            elif item["type"] == "rollback":
+                print(f"↩️ Reorg: rolled back to block {item['block_number']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.close()
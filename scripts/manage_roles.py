@@ -1,6 +1,98 @@
-from brownie import accounts, NFTMembership
+"""
+ADMIN_ROLE management for NFTMembership.
+
+main() is the interactive walk-through: grant ADMIN_ROLE to one address,
+check it, and optionally revoke it again.
+
+sync() makes the set of ADMIN_ROLE holders match a file, non-interactively:
+
+  - the file lists one address per line (blank lines and # comments ignored)
+  - current holders are every address that ever received the role
+    (RoleGranted logs since `from_block`) or is listed in the file, filtered
+    by one batched hasRole read
+  - only the difference is sent, as grantAdminRoles / revokeAdminRoles
+    transactions of up to `chunk_size` addresses each
+  - the result is checked with another batched hasRole read; any mismatch
+    exits with status 1
+
+Usage:
+    brownie run scripts/manage_roles.py --network sepolia
+    brownie run scripts/manage_roles.py sync admins.txt --network sepolia
+    brownie run scripts/manage_roles.py sync admins.txt 4200000 --network sepolia   # RoleGranted logs from block
+    brownie run scripts/manage_roles.py sync admins.txt 0 true --network sepolia    # dry run
+
+Environment:
+    MEMBERSHIP_ADDRESS  Deployed NFTMembership
+"""
+
+from brownie import accounts, NFTMembership, web3
+from eth_utils import is_address, to_checksum_address
 import os
 
+from scripts.read_cache import MAX_LOG_RANGE, ROLE_GRANTED_TOPIC
+from scripts.rpc_client import get_client, role_holders
+
+# grantAdminRoles costs ~27k gas per new holder; 200 stays well under block limits
+ROLE_CHUNK_SIZE = 200
+
+
+def read_role_file(path):
+    """
+    Checksummed addresses from `path`, in file order without duplicates.
+    """
+    addresses = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            entry = line.split("#", 1)[0].strip()
+            if not entry:
+                continue
+            if not is_address(entry):
+                raise ValueError(f"{path}:{line_number}: not an address: {entry!r}")
+            address = to_checksum_address(entry)
+            if address not in addresses:
+                addresses.append(address)
+    return addresses
+
+
+def plan_role_changes(desired, current):
+    """
+    Returns (to_grant, to_revoke): addresses in `desired` but not in `current`
+    and the other way round, in input order.
+    """
+    desired_set, current_set = set(desired), set(current)
+    return (
+        [address for address in desired if address not in current_set],
+        [address for address in current if address not in desired_set],
+    )
+
+
+def _chunks(addresses, size):
+    return [addresses[i:i + size] for i in range(0, len(addresses), size)]
+
+
+def _granted_accounts(client, contract_address, role, from_block):
+    """
+    Every account named in a RoleGranted(role) log since `from_block`, one batch of eth_getLogs.
+    """
+    head = client.block_number()
+    calls = [
+        ("eth_getLogs", [{
+            "address": contract_address,
+            "topics": [ROLE_GRANTED_TOPIC, role],
+            "fromBlock": hex(start),
+            "toBlock": hex(min(start + MAX_LOG_RANGE - 1, head)),
+        }])
+        for start in range(from_block, head + 1, MAX_LOG_RANGE)
+    ]
+    accounts_seen = []
+    for logs in client.batch(calls):
+        for log in logs:
+            account = to_checksum_address("0x" + log["topics"][2][-40:])
+            if account not in accounts_seen:
+                accounts_seen.append(account)
+    return accounts_seen
+
+
 def main():
     # Load admin account (deployer)
     admin = accounts.load("myDeployerAccount")  # You will enter your password here
@@ -35,3 +127,56 @@ def main():
     else:
         print("Skipping revoke.")
 
+
+def sync(path, from_block=0, dry_run=False, chunk_size=ROLE_CHUNK_SIZE, admin=None):
+    """
+    Grants / revokes ADMIN_ROLE so that exactly the addresses in `path` hold it.
+    """
+    dry_run = str(dry_run).lower() in ("1", "true", "yes")
+    chunk_size = int(chunk_size)
+
+    contract_address = os.getenv("MEMBERSHIP_ADDRESS")
+    if not contract_address:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+    contract = NFTMembership.at(contract_address)
+    client = get_client(web3.provider.endpoint_uri)
+    admin_role = "0x" + bytes(contract.ADMIN_ROLE()).hex()
+
+    desired = read_role_file(path)
+    candidates = _granted_accounts(client, contract.address, admin_role, int(from_block))
+    candidates += [address for address in desired if address not in candidates]
+    holding = role_holders(client, contract.address, admin_role, candidates)
+    current = [address for address in candidates if holding[address]]
+    to_grant, to_revoke = plan_role_changes(desired, current)
+
+    print(f"👥 ADMIN_ROLE: {len(current)} holder(s) now, {len(desired)} wanted "
+          f"→ grant {len(to_grant)}, revoke {len(to_revoke)}")
+    for address in to_grant:
+        print(f"   + {address}")
+    for address in to_revoke:
+        print(f"   - {address}")
+    if dry_run or not (to_grant or to_revoke):
+        client.stats.print_report()
+        return to_grant, to_revoke
+
+    admin = admin or accounts.load("myDeployerAccount")
+    if admin.address in to_revoke:
+        print(f"⚠️ {admin.address} (the sending account) is not in {path} and loses ADMIN_ROLE")
+    for chunk in _chunks(to_grant, chunk_size):
+        tx = contract.grantAdminRoles(chunk, {"from": admin})
+        tx.wait(1)
+        print(f"✅ Granted {len(chunk)} in {tx.txid} ({tx.gas_used:,} gas)")
+    for chunk in _chunks(to_revoke, chunk_size):
+        tx = contract.revokeAdminRoles(chunk, {"from": admin})
+        tx.wait(1)
+        print(f"✅ Revoked {len(chunk)} in {tx.txid} ({tx.gas_used:,} gas)")
+
+    holding = role_holders(client, contract.address, admin_role, candidates)
+    wrong = [address for address in candidates if holding[address] != (address in desired)]
+    client.stats.print_report()
+    if wrong:
+        for address in wrong:
+            print(f"❌ {address}: hasRole is {holding[address]}")
+        raise SystemExit(1)
+    print(f"🎉 ADMIN_ROLE holders match {path} ({len(desired)} address(es))")
+    return to_grant, to_revoke
@@ -0,0 +1,474 @@
+"""
+Columnar membership analytics over the whole history of an NFTMembership contract.
+
+data_analysis.py prints the MembershipRenewed events of the last few
+thousand blocks one by one. EventStore keeps every mint, renewal, transfer
+and burn instead, as NumPy columns in one .npz file, and the aggregates
+below work on whole columns at once:
+
+  - block / time / token / kind / expiry, one row per event in chain order
+    (uint64 / int64 / uint64 / uint8 / int64; expiry is the validUntil set
+    by a mint or renewal, 0 for transfers and burns)
+  - time is the block timestamp, interpolated from one eth_getBlockByNumber
+    anchor per MAX_LOG_RANGE blocks instead of one per event
+  - sync() only reads blocks after the last synced one; mint expiries come
+    from one batched validUntil read per sync (mints emit no MembershipRenewed)
+
+Every aggregate starts from coverage_intervals(): each mint or renewal keeps
+its token active from its own time until the earlier of its expiry and the
+token's next mint/renew/burn, so one token's intervals never overlap.
+
+  - renewals_per_day      bincount of renewal days
+  - expiry_histogram      days until the latest expiry of each live token
+  - active_members        active tokens at the end of each day (+1 / -1 at
+                          interval edges, cumulative sum)
+  - churn_per_period      lapses (coverage ran out before the next event, or
+                          the token was burned) and reactivations per period
+  - retention_cohorts     share of each mint cohort active at the end of
+                          every later period
+
+Usage:
+    brownie run scripts/data_analysis.py analytics membership_events.npz 8170000 --network sepolia
+    brownie run scripts/membership_analytics.py benchmark 5000000
+
+Environment:
+    MEMBERSHIP_ADDRESS  Deployed NFTMembership
+"""
+
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from hexbytes import HexBytes
+
+from scripts.event_indexer import MEMBERSHIP_RENEWED_TOPIC
+from scripts.expiry_index import TRANSFER_TOPIC, valid_until_resolver
+from scripts.read_cache import MAX_LOG_RANGE
+
+MINT, RENEW, TRANSFER, BURN = 0, 1, 2, 3
+DAY = 24 * 60 * 60
+
+COLUMNS = {
+    "block": np.uint64,
+    "time": np.int64,
+    "token": np.uint64,
+    "kind": np.uint8,
+    "expiry": np.int64,
+}
+
+# Days until expiry, for expiry_histogram
+EXPIRY_BUCKETS = (-np.inf, -90, -30, 0, 7, 30, 90, 365, np.inf)
+
+_NO_NEXT = np.iinfo(np.int64).max
+
+
+def empty_columns():
+    return {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+
+
+class EventStore:
+    """
+    Event columns of one contract, persisted as an uncompressed .npz file.
+    """
+
+    def __init__(self, path="membership_events.npz"):
+        self.path = path
+        self.columns = empty_columns()
+        self.synced_block = -1
+        self.anchor_block = np.empty(0, np.int64)
+        self.anchor_time = np.empty(0, np.int64)
+
+    @classmethod
+    def load(cls, path="membership_events.npz"):
+        store = cls(path)
+        if os.path.exists(path):
+            with np.load(path) as data:
+                store.columns = {name: data[name] for name in COLUMNS}
+                store.synced_block = int(data["synced_block"])
+                store.anchor_block = data["anchor_block"]
+                store.anchor_time = data["anchor_time"]
+        return store
+
+    def save(self):
+        # np.savez appends .npz to names without it; write next to the target and swap
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            synced_block=np.int64(self.synced_block),
+            anchor_block=self.anchor_block,
+            anchor_time=self.anchor_time,
+            **self.columns,
+        )
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.columns["block"])
+
+    def append(self, columns):
+        self.columns = {
+            name: np.concatenate([self.columns[name], np.asarray(columns[name], dtype)])
+            for name, dtype in COLUMNS.items()
+        }
+
+    def _block_times(self, client, blocks):
+        """
+        Timestamps for `blocks`, interpolated between anchors (fetched in one batch).
+        """
+        anchors = sorted(set(blocks) - set(self.anchor_block.tolist()))
+        if anchors:
+            results = client.batch([("eth_getBlockByNumber", [hex(block), False]) for block in anchors])
+            times = [int(result["timestamp"], 16) for result in results]
+            anchor_block = np.concatenate([self.anchor_block, np.array(anchors, np.int64)])
+            anchor_time = np.concatenate([self.anchor_time, np.array(times, np.int64)])
+            order = np.argsort(anchor_block)
+            self.anchor_block, self.anchor_time = anchor_block[order], anchor_time[order]
+        return self.anchor_block, self.anchor_time
+
+    def sync(self, client, contract_address, start_block=0, to_block=None):
+        """
+        Appends the events of every block after the last synced one (or from
+        `start_block`) up to `to_block` (default: head). Returns the number of rows added.
+        """
+        to_block = client.block_number() if to_block is None else to_block
+        start = max(self.synced_block + 1, start_block)
+        if start > to_block:
+            return 0
+
+        rows = []
+        mints = []
+        boundaries = []
+        for chunk_start in range(start, to_block + 1, MAX_LOG_RANGE):
+            chunk_end = min(chunk_start + MAX_LOG_RANGE - 1, to_block)
+            boundaries.append(chunk_start)
+            logs = client.call("eth_getLogs", [{
+                "address": contract_address,
+                "topics": [[TRANSFER_TOPIC, MEMBERSHIP_RENEWED_TOPIC]],
+                "fromBlock": hex(chunk_start),
+                "toBlock": hex(chunk_end),
+            }])
+            for log in logs:
+                block = int(log["blockNumber"], 16)
+                topic = "0x" + HexBytes(log["topics"][0]).hex().removeprefix("0x")
+                if topic == MEMBERSHIP_RENEWED_TOPIC:
+                    token = int.from_bytes(HexBytes(log["topics"][1]), "big")
+                    rows.append((block, token, RENEW, int.from_bytes(HexBytes(log["data"])[:32], "big")))
+                    continue
+                token = int.from_bytes(HexBytes(log["topics"][3]), "big")
+                if not any(HexBytes(log["topics"][1])):
+                    mints.append((len(rows), token, block))
+                    rows.append((block, token, MINT, 0))
+                elif not any(HexBytes(log["topics"][2])):
+                    rows.append((block, token, BURN, 0))
+                else:
+                    rows.append((block, token, TRANSFER, 0))
+
+        if mints:
+            expiries = valid_until_resolver(client, contract_address)([(token, block) for _, token, block in mints])
+            for (row, token, block), expiry in zip(mints, expiries):
+                rows[row] = (block, token, MINT, expiry)
+
+        self.synced_block = to_block
+        if not rows:
+            return 0
+        blocks = np.array([row[0] for row in rows], np.int64)
+        anchor_block, anchor_time = self._block_times(client, boundaries + [to_block])
+        self.append({
+            "block": blocks,
+            "time": np.interp(blocks, anchor_block, anchor_time).round().astype(np.int64),
+            "token": np.array([row[1] for row in rows], np.uint64),
+            "kind": np.array([row[2] for row in rows], np.uint8),
+            "expiry": np.array([row[3] for row in rows], np.int64),
+        })
+        return len(rows)
+
+
+# --------------- aggregates ---------------
+
+def coverage_intervals(columns):
+    """
+    Returns {"token", "start", "end", "expiry", "lapsed", "burned", "first"}
+    arrays, one entry per mint / renewal, grouped by token: the token is
+    active on [start, end). `lapsed` marks intervals whose coverage ran out
+    (expiry passed before the token's next event, or a burn ended it);
+    `first` marks each token's first interval.
+    """
+    keep = columns["kind"] != TRANSFER
+    token = columns["token"][keep]
+    when = columns["time"][keep]
+    kind = columns["kind"][keep]
+    expiry = columns["expiry"][keep]
+
+    # Group by token, chain order inside each group
+    order = np.argsort(token, kind="stable")
+    token, when, kind, expiry = token[order], when[order], kind[order], expiry[order]
+
+    same_next = np.zeros(len(token), bool)
+    same_next[:-1] = token[1:] == token[:-1]
+    next_time = np.where(same_next, np.roll(when, -1), _NO_NEXT)
+    next_burn = same_next & (np.roll(kind, -1) == BURN)
+    first = np.ones(len(token), bool)
+    first[1:] = token[1:] != token[:-1]
+
+    active = kind != BURN
+    covered_until = expiry[active] + 1  # active while now <= validUntil
+    end = np.minimum(covered_until, next_time[active])
+    burned = next_burn[active]
+    return {
+        "token": token[active],
+        "start": when[active],
+        "end": end,
+        "expiry": expiry[active],
+        "lapsed": (covered_until <= next_time[active]) | burned,
+        "burned": burned,
+        "first": first[active],
+    }
+
+
+def renewals_per_day(columns):
+    """
+    (days, counts): epoch day numbers from the first to the last renewal, and renewals on each.
+    """
+    days = columns["time"][columns["kind"] == RENEW] // DAY
+    if not len(days):
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    first = days.min()
+    counts = np.bincount(days - first)
+    return np.arange(first, first + len(counts)), counts
+
+
+def expiry_histogram(intervals, now, buckets=EXPIRY_BUCKETS):
+    """
+    Counts of live tokens by days until their latest expiry, per `buckets` edges.
+    Burned tokens are left out.
+    """
+    token = intervals["token"]
+    last = np.ones(len(token), bool)
+    last[:-1] = token[1:] != token[:-1]
+    live = last & ~intervals["burned"]
+    days_left = (intervals["expiry"][live] - now) / DAY
+    counts, _ = np.histogram(days_left, bins=np.array(buckets, float))
+    return counts
+
+
+def active_members(intervals, first_day, last_day):
+    """
+    Active tokens at the end (23:59:59) of each day in [first_day, last_day].
+    """
+    days = last_day - first_day + 1
+    start = np.clip(intervals["start"] // DAY - first_day, 0, days)
+    end = np.clip(intervals["end"] // DAY - first_day, 0, days)
+    edges = np.bincount(start, minlength=days + 1) - np.bincount(end, minlength=days + 1)
+    return np.cumsum(edges[:days])
+
+
+def churn_per_period(intervals, now, period=30 * DAY):
+    """
+    (periods, lapsed, reactivated) per `period`-long window, where a
+    reactivation is a renewal that starts a token's coverage again after it lapsed.
+    """
+    lapsed_at = intervals["end"][intervals["lapsed"] & (intervals["end"] <= now)]
+    follows_lapse = np.zeros(len(intervals["token"]), bool)
+    follows_lapse[1:] = intervals["lapsed"][:-1] & ~intervals["first"][1:]
+    reactivated_at = intervals["start"][follows_lapse]
+
+    first = intervals["start"].min() // period if len(intervals["start"]) else 0
+    last = max(now // period, first)
+    size = last - first + 1
+    lapsed = np.bincount(np.clip(lapsed_at // period - first, 0, size - 1), minlength=size)
+    reactivated = np.bincount(np.clip(reactivated_at // period - first, 0, size - 1), minlength=size)
+    return np.arange(first, last + 1), lapsed, reactivated
+
+
+def retention_cohorts(intervals, now, period=30 * DAY):
+    """
+    (cohorts, sizes, retention): cohort = period of a token's first mint;
+    retention[c, k] is the share of cohort c active at the end of its k-th
+    period (k = 0 is the mint period). Cells in the future are NaN.
+    """
+    token_start = intervals["start"][intervals["first"]]
+    token_cohort = token_start // period
+    if not len(token_cohort):
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty((0, 0))
+    first = token_cohort.min()
+    last = now // period
+    cohorts = last - first + 1
+
+    # Cohort of each interval's token; intervals are grouped by token
+    per_token = np.cumsum(intervals["first"]) - 1
+    cohort = token_cohort[per_token] - first
+
+    # Periods whose end-of-period snapshot each interval covers
+    horizon = last + 1
+    start = np.minimum(intervals["start"] // period, horizon)
+    end = np.minimum(intervals["end"] // period, horizon)
+    covered = np.maximum(end - start, 0)
+    index = np.repeat(np.arange(len(covered)), covered)
+    offsets = np.arange(len(index)) - np.repeat(np.cumsum(covered) - covered, covered)
+    snapshot = start[index] + offsets - first
+    age = snapshot - cohort[index]
+
+    counts = np.bincount(cohort[index] * cohorts + age, minlength=cohorts * cohorts).reshape(cohorts, cohorts)
+    sizes = np.bincount(token_cohort - first, minlength=cohorts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        retention = counts / sizes[:, None]
+    # Snapshots after `now` have not happened yet
+    snapshot_period = first + np.arange(cohorts)[:, None] + np.arange(cohorts)[None, :]
+    retention[(snapshot_period + 1) * period - 1 > now] = np.nan
+    return np.arange(first, last + 1), sizes, retention
+
+
+def summarize(columns, now=None, period_days=30):
+    """
+    Runs every aggregate over `columns`.
+    """
+    now = int(time.time()) if now is None else int(now)
+    period = int(period_days) * DAY
+    intervals = coverage_intervals(columns)
+    days, renewals = renewals_per_day(columns)
+    first_day = int(columns["time"].min()) // DAY if len(columns["time"]) else now // DAY
+    periods, lapsed, reactivated = churn_per_period(intervals, now, period)
+    cohorts, sizes, retention = retention_cohorts(intervals, now, period)
+    return {
+        "now": now,
+        "period_days": int(period_days),
+        "events": len(columns["time"]),
+        "tokens": int(intervals["first"].sum()),
+        "renewal_days": days,
+        "renewals_per_day": renewals,
+        "expiry_histogram": expiry_histogram(intervals, now),
+        "first_day": first_day,
+        "active_members": active_members(intervals, first_day, now // DAY),
+        "churn_periods": periods,
+        "lapsed": lapsed,
+        "reactivated": reactivated,
+        "cohorts": cohorts,
+        "cohort_sizes": sizes,
+        "retention": retention,
+    }
+
+
+def _date(epoch_days):
+    return str(np.datetime64(int(epoch_days), "D"))
+
+
+def print_summary(summary, max_rows=12):
+    period = summary["period_days"]
+    print(f"\n📊 {summary['events']:,} event(s), {summary['tokens']:,} token(s)")
+
+    days, renewals = summary["renewal_days"], summary["renewals_per_day"]
+    if len(days):
+        busiest = int(np.argmax(renewals))
+        print(f"\n🔁 Renewals: {int(renewals.sum()):,} over {len(days):,} day(s), "
+              f"{renewals.mean():.1f}/day, busiest {_date(days[busiest])} ({int(renewals[busiest]):,})")
+        busy = np.flatnonzero(renewals)[-max_rows:]
+        for day, count in zip(days[busy], renewals[busy]):
+            print(f"   {_date(day)}  {int(count):>8,}")
+
+    print("\n⏳ Days until expiry (live tokens)")
+    for low, high, count in zip(EXPIRY_BUCKETS[:-1], EXPIRY_BUCKETS[1:], summary["expiry_histogram"]):
+        print(f"   [{low:>5}, {high:>5})  {int(count):>10,}")
+
+    active = summary["active_members"]
+    if len(active):
+        step = max(len(active) // max_rows, 1)
+        print(f"\n👥 Active tokens (end of day, every {step} day(s))")
+        offsets = list(range(0, len(active) - 1, step)) + [len(active) - 1]
+        for offset in offsets:
+            print(f"   {_date(summary['first_day'] + offset)}  {int(active[offset]):>10,}")
+
+    print(f"\n📉 Churn per {period}-day period")
+    for p, lapsed, back in list(zip(summary["churn_periods"], summary["lapsed"], summary["reactivated"]))[-max_rows:]:
+        print(f"   {_date(p * period)}  lapsed {int(lapsed):>8,}  reactivated {int(back):>8,}")
+
+    print(f"\n🧪 Retention by mint cohort ({period}-day periods)")
+    rows = [row for row in zip(summary["cohorts"], summary["cohort_sizes"], summary["retention"]) if row[1]]
+    for cohort, size, row in rows[-max_rows:]:
+        cells = " ".join(f"{value:4.0%}" for value in row[:max_rows] if not np.isnan(value))
+        print(f"   {_date(cohort * period)}  n={int(size):<8,} {cells}")
+
+
+# --------------- benchmark ---------------
+
+def synthetic_columns(events=5_000_000, years=2, seed=7):
+    """
+    `events` rows in chain order: one mint per token (a fifth of the rows),
+    renewals spread over each token's life, and a few transfers and burns.
+    """
+    rng = np.random.default_rng(seed)
+    start = 1_700_000_000
+    span = int(years * 365 * DAY)
+    tokens = events // 5
+    renewals = events - tokens - tokens // 50
+
+    mint_time = start + rng.integers(0, span, tokens)
+    renew_token = rng.integers(1, tokens + 1, renewals)
+    renew_time = mint_time[renew_token - 1] + rng.integers(0, span // 2, renewals)
+    moved_token = rng.integers(1, tokens + 1, tokens // 50)
+    moved_time = mint_time[moved_token - 1] + rng.integers(1, span // 2, tokens // 50)
+    durations = np.array([30, 90, 365]) * DAY
+
+    time_ = np.concatenate([mint_time, renew_time, moved_time])
+    token = np.concatenate([np.arange(1, tokens + 1), renew_token, moved_token]).astype(np.uint64)
+    kind = np.concatenate([
+        np.full(tokens, MINT), np.full(renewals, RENEW),
+        np.where(rng.random(tokens // 50) < 0.2, BURN, TRANSFER),
+    ]).astype(np.uint8)
+    expiry = time_ + rng.choice(durations, len(time_), p=[0.7, 0.2, 0.1])
+    expiry[kind >= TRANSFER] = 0
+
+    order = np.argsort(time_, kind="stable")
+    return {
+        "block": ((time_[order] - start) // 12).astype(np.uint64),
+        "time": time_[order],
+        "token": token[order],
+        "kind": kind[order],
+        "expiry": expiry[order],
+    }
+
+
+def _timed(label, fn, results):
+    start = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - start
+    results.append((label, elapsed))
+    print(f"   {label:<46} {elapsed * 1000:>9.0f} ms")
+    return value
+
+
+def benchmark(events=5_000_000, path="analytics_benchmark.npz", loop_rows=500_000):
+    """
+    Times storing, loading and aggregating `events` synthetic events, next to
+    the per-event datetime loop data_analysis.py uses (on `loop_rows` renewals, scaled up).
+    """
+    events = int(events)
+    results = []
+    print(f"⏱️ {events:,} synthetic events")
+    columns = _timed("generate", lambda: synthetic_columns(events), results)
+    now = int(columns["time"].max())
+
+    store = EventStore(path)
+    store.columns = columns
+    _timed("save .npz", store.save, results)
+    print(f"   {'file size':<46} {os.path.getsize(path) / 1e6:>9.1f} MB")
+    columns = _timed("load .npz", lambda: EventStore.load(path).columns, results)
+
+    intervals = _timed("coverage_intervals", lambda: coverage_intervals(columns), results)
+    _timed("renewals_per_day", lambda: renewals_per_day(columns), results)
+    _timed("expiry_histogram", lambda: expiry_histogram(intervals, now), results)
+    first_day = int(columns["time"].min()) // DAY
+    _timed("active_members (daily)", lambda: active_members(intervals, first_day, now // DAY), results)
+    _timed("churn_per_period (30 days)", lambda: churn_per_period(intervals, now), results)
+    _timed("retention_cohorts (30 days)", lambda: retention_cohorts(intervals, now), results)
+    _timed("summarize (all of the above)", lambda: summarize(columns, now), results)
+
+    # The old path: one datetime per renewal in a Python loop
+    renew_times = columns["time"][columns["kind"] == RENEW]
+    sample = renew_times[:int(loop_rows)].tolist()
+    start = time.perf_counter()
+    Counter(datetime.utcfromtimestamp(t).strftime("%Y-%m-%d") for t in sample)
+    loop_s = (time.perf_counter() - start) * len(renew_times) / max(len(sample), 1)
+    print(f"   {'renewals per day, Python datetime loop (scaled)':<46} {loop_s * 1000:>9.0f} ms")
+    os.remove(path)
+    return results, loop_s
@@ -0,0 +1,248 @@
+"""
+In-memory membership gate: "is this address (or token) an active member?"
+
+Answering that on-chain takes an ownerOf and a validUntil call per token, and
+the contract cannot list the tokens of an owner at all. MembershipGate keeps
+an owner -> tokens map and the token expiries (an ExpiryIndex) in memory,
+fed by the contract's Transfer and MembershipRenewed logs:
+
+  - sync() reads the logs since the last synced block (eth_getLogs in ranges
+    of MAX_LOG_RANGE blocks) and applies them in chain order; expiries of new
+    mints are read with one batched validUntil call per sync
+  - is_member(address) / is_valid(token_id) / tokens_of(address) are answered
+    from dicts and arrays, without RPC, and use the same rule as the
+    contract's isValid: active while now <= validUntil
+  - with `max_lag_blocks` set, queries raise StaleIndexError once the index
+    is more than that many blocks behind the last head it saw, or has not
+    synced for (max_lag_blocks + 1) * block_time seconds, so a gate whose
+    sync loop died fails closed instead of serving old answers
+  - owner token sets are replaced, not mutated, so a start()ed background
+    sync thread can run next to request handlers
+
+Callers that have to ask the chain directly can use NFTMembership.isValid.
+
+Usage:
+    brownie run scripts/membership_gate.py main 0xD56521A2bc066ACFAf2cB398D38Be0C560b6abfD
+    brownie run scripts/membership_gate.py benchmark 100000 500000
+
+Environment:
+    RPC_URL             JSON-RPC endpoint (default http://127.0.0.1:8545)
+    MEMBERSHIP_ADDRESS  Deployed NFTMembership
+"""
+
+import os
+import time
+import random
+import threading
+
+from hexbytes import HexBytes
+
+from scripts.event_indexer import MEMBERSHIP_RENEWED_TOPIC
+from scripts.expiry_index import TRANSFER_TOPIC, ExpiryIndex, valid_until_resolver
+from scripts.read_cache import MAX_LOG_RANGE
+from scripts.rpc_client import get_client
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+
+class StaleIndexError(Exception):
+    """
+    Raised by MembershipGate queries when the index is older than its freshness limit.
+    """
+
+
+def _topic_address(topic):
+    return "0x" + HexBytes(topic)[-20:].hex().removeprefix("0x")
+
+
+class MembershipGate:
+    """
+    Owner -> tokens -> expiry map of one NFTMembership contract, kept up to date from logs.
+    """
+
+    def __init__(self, client, contract_address, start_block=0, max_lag_blocks=None, block_time=12):
+        self.client = client
+        self.contract_address = contract_address
+        self.max_lag_blocks = max_lag_blocks
+        self.block_time = block_time
+
+        self.expiries = ExpiryIndex()
+        self._owner = {}
+        self._tokens = {}
+
+        self.synced_block = start_block - 1
+        self.head_block = self.synced_block
+        self.synced_at = time.monotonic()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --------------- sync ---------------
+
+    def sync(self):
+        """
+        Applies the logs of every block up to the current head. Returns the
+        number of logs applied.
+        """
+        self.head_block = self.client.block_number()
+        applied = 0
+        resolve = valid_until_resolver(self.client, self.contract_address)
+        while self.synced_block < self.head_block:
+            to_block = min(self.synced_block + MAX_LOG_RANGE, self.head_block)
+            logs = self.client.call("eth_getLogs", [{
+                "address": self.contract_address,
+                "topics": [[TRANSFER_TOPIC, MEMBERSHIP_RENEWED_TOPIC]],
+                "fromBlock": hex(self.synced_block + 1),
+                "toBlock": hex(to_block),
+            }])
+            for log in logs:
+                log["blockNumber"] = int(log["blockNumber"], 16)
+            self.apply_logs(logs, resolve)
+            self.synced_block = to_block
+            applied += len(logs)
+        self.synced_at = time.monotonic()
+        return applied
+
+    def apply_logs(self, logs, resolve_mint_expiry):
+        """
+        Applies Transfer and MembershipRenewed logs (blockNumber as int) in chain order.
+        """
+        for log in logs:
+            if "0x" + HexBytes(log["topics"][0]).hex().removeprefix("0x") != TRANSFER_TOPIC:
+                continue
+            token_id = int.from_bytes(HexBytes(log["topics"][3]), "big")
+            sender = _topic_address(log["topics"][1])
+            recipient = _topic_address(log["topics"][2])
+            if sender != ZERO_ADDRESS:
+                self._tokens[sender] = self._tokens.get(sender, frozenset()) - {token_id}
+                if not self._tokens[sender]:
+                    del self._tokens[sender]
+            if recipient == ZERO_ADDRESS:
+                self._owner.pop(token_id, None)
+            else:
+                self._owner[token_id] = recipient
+                self._tokens[recipient] = self._tokens.get(recipient, frozenset()) | {token_id}
+        self.expiries.apply_logs(logs, resolve_mint_expiry)
+
+    def start(self, poll_interval=2.0):
+        """
+        Keeps syncing in a daemon thread until stop(). Sync errors are printed
+        and retried; queries go stale if they persist.
+        """
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"⚠️ Membership gate sync failed at block {self.synced_block + 1}: {e}")
+                self._stop.wait(poll_interval)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name="membership-gate-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # --------------- queries ---------------
+
+    def _check_fresh(self):
+        if self.max_lag_blocks is None:
+            return
+        lag = self.head_block - self.synced_block
+        age = time.monotonic() - self.synced_at
+        if lag > self.max_lag_blocks or age > (self.max_lag_blocks + 1) * self.block_time:
+            raise StaleIndexError(
+                f"Index at block {self.synced_block} is {lag} block(s) behind head {self.head_block} "
+                f"and last synced {age:.0f}s ago (limit {self.max_lag_blocks} blocks)"
+            )
+
+    def tokens_of(self, address):
+        self._check_fresh()
+        return sorted(self._tokens.get(address.lower(), ()))
+
+    def is_valid(self, token_id, now=None):
+        """
+        Same rule as NFTMembership.isValid; `now` defaults to the wall clock.
+        """
+        self._check_fresh()
+        if token_id not in self._owner:
+            return False
+        return (time.time() if now is None else now) <= (self.expiries.get(token_id) or 0)
+
+    def is_member(self, address, now=None):
+        """
+        True if `address` owns at least one token that has not lapsed.
+        """
+        self._check_fresh()
+        tokens = self._tokens.get(address.lower())
+        if not tokens:
+            return False
+        now = time.time() if now is None else now
+        get = self.expiries.get
+        return any(now <= (get(token_id) or 0) for token_id in tokens)
+
+
+def main(*addresses):
+    """
+    Syncs the gate for MEMBERSHIP_ADDRESS from block 0 and checks `addresses`.
+    """
+    contract_address = os.getenv("MEMBERSHIP_ADDRESS")
+    if not contract_address:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+
+    client = get_client()
+    gate = MembershipGate(client, contract_address)
+    start = time.perf_counter()
+    applied = gate.sync()
+    print(f"🔄 Applied {applied:,} log(s) up to block {gate.synced_block} in {time.perf_counter() - start:.2f}s "
+          f"({len(gate._owner):,} tokens, {len(gate._tokens):,} holders)")
+    for address in addresses:
+        tokens = gate.tokens_of(address)
+        status = "✅ active member" if gate.is_member(address) else "❌ not an active member"
+        print(f"{address}: {status} (tokens {tokens})")
+    client.stats.print_report()
+
+
+def benchmark(members=100_000, queries=500_000):
+    """
+    Builds a gate from `members` synthetic mints (half of them lapsed) and
+    times is_member / is_valid lookups.
+    """
+    members, queries = int(members), int(queries)
+    rng = random.Random(11)
+    now = 1_750_000_000
+    holders = ["0x" + rng.randbytes(20).hex() for _ in range(members)]
+
+    logs = []
+    for token_id, holder in enumerate(holders, start=1):
+        token_topic = token_id.to_bytes(32, "big")
+        expiry = now + rng.randrange(-30, 30) * 24 * 3600
+        logs.append({"topics": [TRANSFER_TOPIC, bytes(32), bytes(12) + bytes.fromhex(holder[2:]), token_topic],
+                     "data": "0x", "blockNumber": token_id})
+        logs.append({"topics": [MEMBERSHIP_RENEWED_TOPIC, token_topic],
+                     "data": expiry.to_bytes(32, "big"), "blockNumber": token_id})
+
+    gate = MembershipGate(None, None, max_lag_blocks=5)
+    start = time.perf_counter()
+    gate.apply_logs(logs, lambda mints: [])
+    gate.synced_block = gate.head_block = members
+    load_s = time.perf_counter() - start
+
+    # 80% holders, 20% unknown addresses
+    probes = [rng.choice(holders) if rng.random() < 0.8 else "0x" + rng.randbytes(20).hex() for _ in range(queries)]
+    start = time.perf_counter()
+    active = sum(gate.is_member(address, now) for address in probes)
+    member_s = time.perf_counter() - start
+
+    token_probes = [rng.randrange(1, members * 2) for _ in range(queries)]
+    start = time.perf_counter()
+    for token_id in token_probes:
+        gate.is_valid(token_id, now)
+    token_s = time.perf_counter() - start
+
+    print(f"Holders indexed:   {members:,} ({load_s:.2f}s to apply {len(logs):,} logs)")
+    print(f"is_member:         {queries / member_s:,.0f} queries/s ({active / queries:.0%} active)")
+    print(f"is_valid:          {queries / token_s:,.0f} queries/s")
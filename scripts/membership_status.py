@@ -0,0 +1,130 @@
+"""
+Batched membership status client for access gates.
+
+Checking tokens one by one costs an ownerOf and a validUntil round-trip per
+token. NFTMembership.membershipStatusBatch(uint256[]) returns owner, expiry
+and an is-active flag for a whole list of ids in one eth_call. This client
+splits large id lists into chunks that stay under the node's eth_call gas
+cap, sends the chunks concurrently, and pins all of them to the same block
+so the answer is one consistent snapshot.
+
+Usage:
+    brownie run scripts/membership_status.py main 1 5000
+
+Environment:
+    RPC_URL             JSON-RPC endpoint (default http://127.0.0.1:8545)
+    MEMBERSHIP_ADDRESS  Deployed NFTMembership
+"""
+
+import os
+import time
+import asyncio
+
+from eth_abi import decode, encode
+from eth_utils import keccak, to_checksum_address
+from web3 import AsyncWeb3
+
+from scripts.rpc_client import DEFAULT_RPC_URL, get_client
+from scripts.rpc_web3 import async_web3_for
+
+STATUS_BATCH_SELECTOR = keccak(text="membershipStatusBatch(uint256[])")[:4]
+
+# Most providers cap eth_call gas (geth's default RPCGasCap is 50M); stay well below
+DEFAULT_GAS_CAP = 25_000_000
+# Used when the per-id cost is not probed: two cold SLOADs plus loop/ABI overhead
+DEFAULT_GAS_PER_ID = 6_000
+PROBE_IDS = 100
+
+
+def encode_status_batch(token_ids):
+    return STATUS_BATCH_SELECTOR + encode(["uint256[]"], [list(token_ids)])
+
+
+def decode_status_batch(result):
+    """
+    Returns [(owner, expiry, active), ...] from membershipStatusBatch return data.
+    """
+    owners, expiries, active = decode(["address[]", "uint256[]", "bool[]"], bytes(result))
+    return [
+        (to_checksum_address(owner), expiry, is_active)
+        for owner, expiry, is_active in zip(owners, expiries, active)
+    ]
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def probe_chunk_size(w3, contract_address, gas_cap=DEFAULT_GAS_CAP, sample_ids=None):
+    """
+    Estimates membershipStatusBatch gas for PROBE_IDS ids and returns how many
+    ids fit in 80% of `gas_cap`.
+    """
+    sample_ids = list(sample_ids or range(1, PROBE_IDS + 1))
+    base = await w3.eth.estimate_gas({"to": contract_address, "data": encode_status_batch([])})
+    full = await w3.eth.estimate_gas({"to": contract_address, "data": encode_status_batch(sample_ids)})
+    per_id = max((full - base) // len(sample_ids), 1)
+    return max(int(gas_cap * 0.8 - base) // per_id, 1)
+
+
+async def fetch_status(
+    w3,
+    contract_address,
+    token_ids,
+    chunk_size=None,
+    concurrency=8,
+    gas_cap=DEFAULT_GAS_CAP,
+    block_identifier=None,
+):
+    """
+    Returns {token_id: (owner, expiry, active)} for every id in `token_ids`.
+
+    chunk_size defaults to gas_cap / DEFAULT_GAS_PER_ID; use probe_chunk_size
+    for a measured value. Up to `concurrency` chunks are in flight at once.
+    """
+    token_ids = list(dict.fromkeys(int(token_id) for token_id in token_ids))
+    if chunk_size is None:
+        chunk_size = max(gas_cap // DEFAULT_GAS_PER_ID, 1)
+    if block_identifier is None:
+        block_identifier = await w3.eth.block_number
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call_chunk(chunk):
+        async with semaphore:
+            result = await w3.eth.call(
+                {"to": contract_address, "data": encode_status_batch(chunk), "gas": gas_cap},
+                block_identifier,
+            )
+        return zip(chunk, decode_status_batch(result))
+
+    results = await asyncio.gather(*(call_chunk(chunk) for chunk in chunks(token_ids, int(chunk_size))))
+    return {token_id: status for pairs in results for token_id, status in pairs}
+
+
+def main(first_token_id=1, count=1000, concurrency=8):
+    """
+    Resolves `count` consecutive token ids and prints how many are active.
+    """
+    contract_address = os.getenv("MEMBERSHIP_ADDRESS")
+    if not contract_address:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+    contract_address = AsyncWeb3.to_checksum_address(contract_address)
+    rpc_url = os.getenv("RPC_URL", DEFAULT_RPC_URL)
+
+    token_ids = list(range(int(first_token_id), int(first_token_id) + int(count)))
+
+    async def run():
+        w3 = async_web3_for(rpc_url)
+        chunk_size = await probe_chunk_size(w3, contract_address)
+        start = time.perf_counter()
+        status = await fetch_status(w3, contract_address, token_ids, chunk_size, int(concurrency))
+        return chunk_size, status, time.perf_counter() - start
+
+    chunk_size, status, elapsed = asyncio.run(run())
+    calls = -(-len(token_ids) // chunk_size)
+    active = sum(1 for _owner, _expiry, is_active in status.values() if is_active)
+    print(f"🔍 Resolved {len(status)} token(s) in {calls} call(s) of up to {chunk_size} ids ({elapsed * 1000:.0f}ms)")
+    print(f"✅ Active: {active} | Inactive or unminted: {len(status) - active}")
+    get_client(rpc_url).stats.print_report()
@@ -0,0 +1,279 @@
+"""
+Stage timers and counters for the gasless renewal pipeline.
+
+gassless_renew.py and relayer_execute.py wrap each step (load keys, encode
+calldata, encode_typed_data, sign, write JSON, load ABI, build, send,
+wait) in METRICS.stage("..."):
+
+    with METRICS.stage("sign"):
+        signature = sign_request(request, key)
+    METRICS.incr("requests_signed")
+
+  - disabled (the default), stage() hands back one shared no-op context
+    manager and incr() returns at once, so instrumented code pays a method
+    call and an attribute check per stage
+  - enabled, each stage keeps count / sum / max seconds and each counter a
+    total; export() writes them as Prometheus text (a .prom file for the
+    node_exporter textfile collector) or appends one JSON line per export
+  - METRICS.profile("...") runs SamplingProfiler around a hot loop and
+    writes collapsed stacks (flamegraph.pl / speedscope input) to
+    METRICS_PROFILE_DIR; without that directory it is a no-op too
+
+Usage:
+    METRICS_EXPORT=renewals.prom brownie run scripts/gassless_renew.py
+    METRICS_EXPORT=relay.jsonl brownie run scripts/relayer_execute.py
+    METRICS_PROFILE_DIR=profiles brownie run scripts/gassless_renew.py baseline 1000
+
+Environment:
+    METRICS              1 to record without exporting (METRICS_EXPORT implies it)
+    METRICS_EXPORT       Output path; *.prom -> Prometheus text, anything else -> JSON Lines
+    METRICS_PROFILE_DIR  Directory for sampled profiles (enables METRICS.profile)
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter
+
+PROMETHEUS_PREFIX = "membership"
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    Registry of stage timers ({name: [count, sum_s, max_s]}) and counters.
+    """
+
+    def __init__(self, enabled=False, export_path=None, profile_dir=None):
+        self.enabled = enabled or bool(export_path)
+        self.export_path = export_path
+        self.profile_dir = profile_dir
+        self.timers = {}
+        self.counters = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.getenv("METRICS", "").lower() in ("1", "true", "yes"),
+            export_path=os.getenv("METRICS_EXPORT") or None,
+            profile_dir=os.getenv("METRICS_PROFILE_DIR") or None,
+        )
+
+    def stage(self, name):
+        """
+        Context manager timing one run of stage `name`.
+        """
+        if not self.enabled:
+            return _NOOP
+        return _Stage(self, name)
+
+    def observe(self, name, seconds):
+        self.merge({name: (1, seconds, seconds)})
+
+    def merge(self, timers):
+        """
+        Folds {name: (count, sum_s, max_s)} from another registry (e.g. a worker's drain()) into this one.
+        """
+        with self._lock:
+            for name, (count, total, peak) in timers.items():
+                timer = self.timers.get(name)
+                if timer is None:
+                    self.timers[name] = [count, total, peak]
+                else:
+                    timer[0] += count
+                    timer[1] += total
+                    timer[2] = max(timer[2], peak)
+
+    def drain(self):
+        """
+        Returns the stage timers and clears them; pool workers send this back with each result.
+        """
+        with self._lock:
+            timers, self.timers = self.timers, {}
+        return timers
+
+    def incr(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+    def reset(self):
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "stages": {
+                    name: {"count": count, "sum_s": total, "mean_ms": total / count * 1000 if count else 0.0,
+                           "max_ms": peak * 1000}
+                    for name, (count, total, peak) in sorted(self.timers.items())
+                },
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    # --------------- export ---------------
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        snapshot = self.snapshot()
+        stages = snapshot["stages"]
+        lines = []
+        if stages:
+            lines += [
+                f"# HELP {prefix}_stage_seconds Time spent per pipeline stage.",
+                f"# TYPE {prefix}_stage_seconds summary",
+            ]
+            for name, stage in stages.items():
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stage["sum_s"]:.9f}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stage["count"]}')
+            lines += [
+                f"# HELP {prefix}_stage_seconds_max Slowest single run per pipeline stage.",
+                f"# TYPE {prefix}_stage_seconds_max gauge",
+            ]
+            for name, stage in stages.items():
+                lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {stage["max_ms"] / 1000:.9f}')
+        for name, value in snapshot["counters"].items():
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """
+        Writes the metrics to `path` (default METRICS_EXPORT): replaces a .prom
+        file atomically, appends a JSON line otherwise. Returns the path, or None.
+        """
+        path = path or self.export_path
+        if not path or not self.enabled:
+            return None
+        if str(path).endswith(".prom"):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        else:
+            with open(path, "a") as f:
+                f.write(json.dumps(self.snapshot(), separators=(",", ":")) + "\n")
+        return path
+
+    def print_report(self):
+        snapshot = self.snapshot()
+        if not snapshot["stages"] and not snapshot["counters"]:
+            return
+        print("\n⏱️ Stage timings")
+        for name, stage in snapshot["stages"].items():
+            print(f"   {name:<28} runs={stage['count']:<7} total={stage['sum_s'] * 1000:9.1f}ms "
+                  f"mean={stage['mean_ms']:.3f}ms max={stage['max_ms']:.3f}ms")
+        for name, value in snapshot["counters"].items():
+            print(f"   {name:<28} {value}")
+
+    # --------------- profiling ---------------
+
+    def profile(self, name, interval=0.001):
+        """
+        Samples the calling thread while the block runs and writes
+        `<profile_dir>/<name>.folded`; a no-op without profile_dir.
+        """
+        if not self.profile_dir:
+            return _NOOP
+        return _ProfiledBlock(os.path.join(self.profile_dir, f"{name}.folded"), interval)
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for one thread: a background thread reads
+    the target's stack from sys._current_frames() every `interval` seconds
+    and counts collapsed stacks ("outer;inner;leaf" -> samples).
+    """
+
+    def __init__(self, interval=0.001, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def write_collapsed(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class _ProfiledBlock:
+    def __init__(self, path, interval):
+        self.path = path
+        self.profiler = SamplingProfiler(interval)
+
+    def __enter__(self):
+        self.profiler.start()
+        return self.profiler
+
+    def __exit__(self, *exc):
+        self.profiler.stop().write_collapsed(self.path)
+        print(f"🔬 Wrote {sum(self.profiler.samples.values())} sample(s) to {self.path}")
+        return False
+
+
+# Process-wide registry, configured from the environment at import
+METRICS = Metrics.from_env()
@@ -11,3 +11,24 @@ def main():
     tx.wait(1)
 
     print("✅ Membership minted.")
+
+def batch(count=10):
+    """
+    Mints `count` memberships to the deployer with one batchMintMembership call.
+
+    Usage:
+        brownie run scripts/mint_membership.py batch 50 --network sepolia
+    """
+    deployer = accounts.load("myDeployerAccount")
+    contract = NFTMembership.at("0xAaf086EC89D311f3fcAB1B17A735d4c8D746DFcF")
+
+    count = int(count)
+    recipients = [deployer.address] * count
+    durations = [30 * 24 * 60 * 60] * count  # 30 days in seconds
+
+    price = contract.membershipPrice()
+    tx = contract.batchMintMembership(recipients, durations, {"from": deployer, "value": price * count})
+    tx.wait(1)
+
+    print(f"✅ {count} memberships minted.")
+    print(f"Gas used: {tx.gas_used:,} ({tx.gas_used / count:,.0f} per token)")
@@ -0,0 +1,360 @@
+"""
+Block-aware read-through cache for NFTMembership and MinimalForwarder views.
+
+Services call membershipPrice(), ADMIN_ROLE(), hasRole(), ownerOf(),
+validUntil() and getNonce() over and over, although those values only change
+when a transaction touches them. ReadCache answers them from memory:
+
+  - every eth_call is pinned to the block the cache is synced to, and each
+    entry is tagged with that block
+  - refresh() moves the cache to the current head, fetching the logs of the
+    new blocks in one eth_getLogs call and applying them: MembershipRenewed,
+    RoleGranted / RoleRevoked and MembershipPriceUpdated overwrite the
+    cached value in place; Transfer updates ownerOf and drops the two
+    balanceOf entries
+  - MinimalForwarder emits no events, so getNonce results are only served
+    for the block they were read at
+  - constants (ADMIN_ROLE, DEFAULT_ADMIN_ROLE, name, symbol,
+    trustedForwarder) are kept forever, outside the LRU
+  - everything else lives in an LRU bounded by `max_entries`
+
+stats() reports hits, misses, hit rate, invalidations, evictions and an
+estimate of the memory held by the entries, so the cache can be sized.
+
+Usage:
+    brownie run scripts/read_cache.py main 20000 1000
+
+Environment:
+    RPC_URL             JSON-RPC endpoint (default http://127.0.0.1:8545)
+    MEMBERSHIP_ADDRESS  Deployed NFTMembership
+"""
+
+import os
+import sys
+import time
+import random
+from collections import OrderedDict
+
+from eth_abi import decode, encode
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+from scripts.event_indexer import MEMBERSHIP_RENEWED_TOPIC
+from scripts.expiry_index import TRANSFER_TOPIC
+from scripts.rpc_client import get_client
+
+PERMANENT = "permanent"
+LOGS = "logs"
+BLOCK = "block"
+
+# name -> (input types, output type, invalidation policy)
+VIEWS = {
+    "ADMIN_ROLE": ((), "bytes32", PERMANENT),
+    "DEFAULT_ADMIN_ROLE": ((), "bytes32", PERMANENT),
+    "name": ((), "string", PERMANENT),
+    "symbol": ((), "string", PERMANENT),
+    "trustedForwarder": ((), "address", PERMANENT),
+    "membershipPrice": ((), "uint256", LOGS),
+    "hasRole": (("bytes32", "address"), "bool", LOGS),
+    "ownerOf": (("uint256",), "address", LOGS),
+    "balanceOf": (("address",), "uint256", LOGS),
+    "validUntil": (("uint256",), "uint256", LOGS),
+    "getNonce": (("address",), "uint256", BLOCK),
+}
+
+ROLE_GRANTED_TOPIC = "0x" + keccak(text="RoleGranted(bytes32,address,address)").hex()
+ROLE_REVOKED_TOPIC = "0x" + keccak(text="RoleRevoked(bytes32,address,address)").hex()
+PRICE_UPDATED_TOPIC = "0x" + keccak(text="MembershipPriceUpdated(uint256)").hex()
+WATCHED_TOPICS = [
+    TRANSFER_TOPIC,
+    MEMBERSHIP_RENEWED_TOPIC,
+    ROLE_GRANTED_TOPIC,
+    ROLE_REVOKED_TOPIC,
+    PRICE_UPDATED_TOPIC,
+]
+
+# Past this many new blocks, dropping every log-invalidated entry is cheaper
+# than fetching (and possibly being refused) all of their logs
+MAX_LOG_RANGE = 2000
+
+_SELECTORS = {
+    name: keccak(text=f"{name}({','.join(inputs)})")[:4] for name, (inputs, _output, _policy) in VIEWS.items()
+}
+
+
+def _normalize(abi_type, value):
+    if abi_type == "address":
+        return to_checksum_address(value)
+    if abi_type == "bytes32":
+        return bytes(HexBytes(value))
+    return int(value)
+
+
+def _decode_output(abi_type, result):
+    value = decode([abi_type], result)[0]
+    return to_checksum_address(value) if abi_type == "address" else value
+
+
+def _topic(log, index):
+    return bytes(HexBytes(log["topics"][index]))
+
+
+def _word_int(word):
+    return int.from_bytes(word, "big")
+
+
+def _word_address(word):
+    return to_checksum_address(word[-20:])
+
+
+def _block_number(value):
+    return int(value, 16) if isinstance(value, str) else value
+
+
+class ReadCache:
+    """
+    Read-through cache of view calls keyed by (contract, function, args).
+    """
+
+    def __init__(self, client=None, max_entries=100_000):
+        self.client = client or get_client()
+        self.max_entries = max_entries
+        self.block = None
+        self.contracts = set()
+
+        self._permanent = {}
+        self._entries = OrderedDict()  # key -> (value, block, size_bytes)
+        self._memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def _key(self, contract, name, args):
+        inputs = VIEWS[name][0]
+        if len(args) != len(inputs):
+            raise TypeError(f"{name} expects {len(inputs)} argument(s), got {len(args)}")
+        return (
+            to_checksum_address(contract),
+            name,
+            tuple(_normalize(abi_type, value) for abi_type, value in zip(inputs, args)),
+        )
+
+    def _lookup(self, key):
+        if VIEWS[key[1]][2] == PERMANENT:
+            if key in self._permanent:
+                return True, self._permanent[key]
+            return False, None
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if VIEWS[key[1]][2] == BLOCK and entry[1] != self.block:
+            self._drop(key)
+            self.expired += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[0]
+
+    def _store(self, key, value, block):
+        if VIEWS[key[1]][2] == PERMANENT:
+            self._permanent[key] = value
+            return
+        if key in self._entries:
+            self._drop(key)
+        size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key) + sys.getsizeof(value)
+        self._entries[key] = (value, block, size)
+        self._memory += size
+        while len(self._entries) > self.max_entries:
+            _key, (_value, _block, evicted_size) = self._entries.popitem(last=False)
+            self._memory -= evicted_size
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._memory -= entry[2]
+        return entry is not None
+
+    def _calldata(self, key):
+        inputs = VIEWS[key[1]][0]
+        return _SELECTORS[key[1]] + (encode(list(inputs), list(key[2])) if inputs else b"")
+
+    def get(self, contract, name, *args):
+        """
+        Returns contract.name(*args), from the cache when possible. Raises
+        RpcError if the call reverts (e.g. ownerOf for an unminted id).
+        """
+        return self.get_many(contract, name, [args], raise_errors=True)[0]
+
+    def get_many(self, contract, name, args_list, raise_errors=True):
+        """
+        Returns contract.name(*args) for every args tuple; all misses go out
+        as one batched eth_call. With raise_errors=False a reverted call comes
+        back as its RpcError (and is not cached).
+        """
+        if self.block is None:
+            self.refresh()
+        self.contracts.add(to_checksum_address(contract))
+
+        keys = [self._key(contract, name, tuple(args)) for args in args_list]
+        results = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+                results[i] = value
+            else:
+                self.misses += 1
+                missing.append(i)
+
+        if missing:
+            output = VIEWS[name][1]
+            block = self.block
+            responses = self.client.call_many(
+                [(keys[i][0], self._calldata(keys[i])) for i in missing], block, raise_errors=raise_errors
+            )
+            for i, response in zip(missing, responses):
+                if isinstance(response, Exception):
+                    results[i] = response
+                    continue
+                results[i] = _decode_output(output, response)
+                self._store(keys[i], results[i], block)
+        return results
+
+    def refresh(self):
+        """
+        Syncs to the current head block, applying the logs of every block
+        since the last refresh. Returns the new block number.
+        """
+        head = self.client.block_number()
+        if self.block is None or not self.contracts:
+            self.block = head
+            return head
+        if head <= self.block:
+            return self.block
+
+        if head - self.block > MAX_LOG_RANGE:
+            self.invalidations += sum(1 for key in self._entries if VIEWS[key[1]][2] == LOGS)
+            self._entries = OrderedDict(
+                (key, entry) for key, entry in self._entries.items() if VIEWS[key[1]][2] != LOGS
+            )
+            self._memory = sum(entry[2] for entry in self._entries.values())
+        else:
+            logs = self.client.call("eth_getLogs", [{
+                "address": sorted(self.contracts),
+                "topics": [WATCHED_TOPICS],
+                "fromBlock": hex(self.block + 1),
+                "toBlock": hex(head),
+            }])
+            self.apply_logs(logs)
+        self.block = head
+        return head
+
+    def _update(self, key, value, block):
+        # Only overwrite entries someone has asked for; do not fill the LRU from logs
+        if key in self._entries:
+            self._store(key, value, block)
+            self.updates += 1
+
+    def _invalidate(self, key):
+        if self._drop(key):
+            self.invalidations += 1
+
+    def apply_logs(self, logs):
+        """
+        Applies raw logs (as returned by eth_getLogs) in chain order.
+        """
+        for log in logs:
+            contract = to_checksum_address(log["address"])
+            topic = "0x" + _topic(log, 0).hex()
+            block = _block_number(log["blockNumber"])
+
+            if topic == MEMBERSHIP_RENEWED_TOPIC:
+                token_id = _word_int(_topic(log, 1))
+                self._update((contract, "validUntil", (token_id,)), _word_int(bytes(HexBytes(log["data"]))[:32]), block)
+            elif topic == TRANSFER_TOPIC:
+                sender, recipient = _word_address(_topic(log, 1)), _word_address(_topic(log, 2))
+                token_id = _word_int(_topic(log, 3))
+                if _word_int(_topic(log, 1)) == 0:
+                    # A mint sets validUntil without a MembershipRenewed event
+                    self._invalidate((contract, "validUntil", (token_id,)))
+                if _word_int(_topic(log, 2)) == 0:
+                    self._invalidate((contract, "ownerOf", (token_id,)))
+                else:
+                    self._update((contract, "ownerOf", (token_id,)), recipient, block)
+                self._invalidate((contract, "balanceOf", (sender,)))
+                self._invalidate((contract, "balanceOf", (recipient,)))
+            elif topic in (ROLE_GRANTED_TOPIC, ROLE_REVOKED_TOPIC):
+                role, account = _topic(log, 1), _word_address(_topic(log, 2))
+                self._update((contract, "hasRole", (role, account)), topic == ROLE_GRANTED_TOPIC, block)
+            elif topic == PRICE_UPDATED_TOPIC:
+                self._update((contract, "membershipPrice", ()), _word_int(bytes(HexBytes(log["data"]))[:32]), block)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "block": self.block,
+            "entries": len(self._entries),
+            "permanent_entries": len(self._permanent),
+            "max_entries": self.max_entries,
+            "memory_bytes": self._memory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "updates": self.updates,
+            "invalidations": self.invalidations,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(
+            f"\n🗄️ Read cache @ block {stats['block']}: {stats['entries']:,}/{stats['max_entries']:,} entries "
+            f"(+{stats['permanent_entries']} permanent), ~{stats['memory_bytes'] / 1024:.0f} KiB"
+        )
+        print(
+            f"   Hit rate: {stats['hit_rate']:.1%} ({stats['hits']:,} hits / {stats['misses']:,} misses) | "
+            f"Updated from logs: {stats['updates']:,} | Invalidated: {stats['invalidations']:,} | "
+            f"Expired: {stats['expired']:,} | Evicted: {stats['evictions']:,}"
+        )
+
+
+def main(reads=20000, tokens=1000, max_entries=100_000):
+    """
+    Replays a skewed read workload (a few hot tokens, a long tail) of
+    validUntil / ownerOf / membershipPrice / hasRole against
+    MEMBERSHIP_ADDRESS and prints cache and RPC statistics.
+    """
+    contract_address = os.getenv("MEMBERSHIP_ADDRESS")
+    if not contract_address:
+        raise ValueError("MEMBERSHIP_ADDRESS not set in environment (or code).")
+
+    reads, tokens = int(reads), int(tokens)
+    client = get_client()
+    cache = ReadCache(client, max_entries=int(max_entries))
+    admin_role = cache.get(contract_address, "ADMIN_ROLE")
+    rng = random.Random(7)
+
+    start = time.perf_counter()
+    for i in range(reads):
+        if i % 500 == 0:
+            cache.refresh()
+        token_id = min(int(rng.paretovariate(1.2)), tokens)
+        choice = rng.random()
+        if choice < 0.5:
+            cache.get(contract_address, "validUntil", token_id)
+        elif choice < 0.8:
+            cache.get_many(contract_address, "ownerOf", [(token_id,)], raise_errors=False)
+        elif choice < 0.9:
+            cache.get(contract_address, "membershipPrice")
+        else:
+            cache.get(contract_address, "hasRole", admin_role, cache.get(contract_address, "trustedForwarder"))
+    elapsed = time.perf_counter() - start
+
+    print(f"⏱️ {reads:,} reads in {elapsed:.2f}s ({reads / elapsed:,.0f} reads/s)")
+    cache.print_stats()
+    client.stats.print_report()
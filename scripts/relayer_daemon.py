@@ -0,0 +1,928 @@
+"""
+Long-running, pipelined relayer for signed ForwardRequests.
+
+relayer_execute.py sends one request and blocks on tx.wait(1), which caps
+throughput at roughly one meta-transaction per block. This daemon splits the
+work into two asyncio stages joined by queues:
+
+    request queue -> submitter -> receipt queue -> confirmers
+
+The submitter signs MinimalForwarder.execute transactions locally, assigning
+the relayer account's nonce from a local counter, and sends them without
+waiting for inclusion. Up to `max_in_flight` transactions can be pending at
+once; confirmer tasks poll for receipts and release those slots. The gas
+price is re-read at most every `gas_price_refresh` seconds, and a
+transaction still without a receipt after `replace_after` seconds is sent
+again at the same nonce with a higher gas price (at least 12.5% more, or
+the current price if that is higher), so one stuck transaction does not
+hold up every later nonce of the key.
+
+With `bundle_gas_budget` set, the submitter instead packs whatever is queued
+into a single MinimalForwarder.executeBatch transaction, adding requests
+while the sum of their gas limits (plus BUNDLE_GAS_PER_REQUEST each) stays
+within the budget. The 21k base cost and the relayer nonce are then paid once
+per bundle rather than once per request.
+
+RelayerPool runs one daemon per relayer key, so traffic is no longer
+serialized on a single account nonce. Each key keeps its own nonce counter,
+in-flight window and balance, and a request is routed by its signer address:
+all requests of one user go through the same key, in order, which keeps the
+user's forwarder nonces sequential. A transaction stuck on one key only holds
+up that key's shard; a key whose balance cannot cover the next transaction is
+taken out of rotation.
+
+Signed requests come from the JSON Lines file written by
+`gassless_renew.py bulk_sign` (one {"request", "signature"} object per line),
+or from a request spool (*.spool, scripts/request_spool.py). A spool is read
+through mmap, and progress is acknowledged in `<spool>.ack` as receipts come
+in, so a restarted daemon continues where it stopped without resending.
+With `coalesce_window` set, requests are first held that many seconds in a
+CoalescingFeed, which merges cumulative renewals of the same token and
+owner into one (scripts/renewal_coalescer.py).
+
+Usage:
+    brownie run scripts/relayer_daemon.py main signed_requests.jsonl
+    brownie run scripts/relayer_daemon.py main signed_requests.jsonl True   # keep following the file
+    brownie run scripts/relayer_daemon.py main signed_requests.jsonl False 3000000   # executeBatch bundles
+    brownie run scripts/relayer_daemon.py main signed_requests.spool True   # resumable, acked spool
+    brownie run scripts/relayer_daemon.py main signed_requests.spool True 0 60   # merge renewals within 60 s
+
+Environment:
+    RPC_URL               JSON-RPC endpoint (default http://127.0.0.1:8545)
+    RELAYER_PRIVATE_KEY   Account that pays gas
+    RELAYER_PRIVATE_KEYS  Comma-separated pool of relayer keys (overrides
+                          RELAYER_PRIVATE_KEY)
+    FORWARDER_ADDRESS    Deployed MinimalForwarder
+"""
+
+import os
+import json
+import time
+import asyncio
+
+from eth_account import Account
+from eth_utils import keccak
+from web3 import AsyncWeb3
+from web3.exceptions import TransactionNotFound
+
+from scripts.forward_request import (
+    encode_execute,
+    encode_execute_batch,
+    encode_get_nonce,
+    executed_requests,
+    request_from_json,
+)
+from scripts.renewal_coalescer import RenewalCoalescer, save_held
+from scripts.request_spool import AckTracker, SpoolCursor, SpoolReader, is_spool_path
+from scripts.request_verifier import RequestVerifier
+from scripts.rpc_client import DEFAULT_RPC_URL, forwarder_nonces, get_client
+from scripts.rpc_web3 import async_web3_for
+# executeBatch cost per request on top of its own gas limit: signature check,
+# nonce SSTORE, the CALL itself and ABI decoding of the request
+BUNDLE_GAS_PER_REQUEST = 40000
+
+
+def _raw_transaction(signed_tx):
+    # eth-account renamed rawTransaction -> raw_transaction in 0.13
+    raw = getattr(signed_tx, "raw_transaction", None)
+    return raw if raw is not None else signed_tx.rawTransaction
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class RelayerStats:
+    """
+    Counters and submit-to-receipt latencies collected by the daemon.
+    """
+
+    def __init__(self):
+        self.submitted = 0
+        self.confirmed = 0
+        self.reverted = 0
+        self.send_errors = 0
+        self.rejected = 0
+        # Transactions re-sent at a higher gas price, not requests
+        self.replacements = 0
+        self.gas_used = 0
+        self.latencies = []
+        self.started_at = None
+        self.finished_at = None
+
+    @classmethod
+    def merge(cls, all_stats):
+        """
+        Combines the stats of several daemons into one, spanning all of them.
+        """
+        merged = cls()
+        for stats in all_stats:
+            for name in ("submitted", "confirmed", "reverted", "send_errors", "rejected", "replacements", "gas_used"):
+                setattr(merged, name, getattr(merged, name) + getattr(stats, name))
+            merged.latencies.extend(stats.latencies)
+        started = [stats.started_at for stats in all_stats if stats.started_at is not None]
+        finished = [stats.finished_at for stats in all_stats if stats.finished_at is not None]
+        merged.started_at = min(started) if started else None
+        merged.finished_at = max(finished) if finished else None
+        return merged
+
+    def report(self):
+        elapsed = (self.finished_at or time.perf_counter()) - (self.started_at or time.perf_counter())
+        latencies = sorted(self.latencies)
+        done = self.confirmed + self.reverted
+        return {
+            "submitted": self.submitted,
+            "confirmed": self.confirmed,
+            "reverted": self.reverted,
+            "send_errors": self.send_errors,
+            "rejected": self.rejected,
+            "replacements": self.replacements,
+            "gas_per_request": self.gas_used // done if done else 0,
+            "elapsed_s": elapsed,
+            "requests_per_s": done / elapsed if elapsed > 0 else 0.0,
+            "latency_p50_s": percentile(latencies, 50),
+            "latency_p90_s": percentile(latencies, 90),
+            "latency_p99_s": percentile(latencies, 99),
+            "latency_max_s": latencies[-1] if latencies else 0.0,
+        }
+
+
+class RelayerDaemon:
+    """
+    Pipelined relayer for a single relayer key.
+
+    - submit(): enqueue a signed (request, signature) pair; with a
+      RequestVerifier, requests that MinimalForwarder.verify would reject are
+      dropped here instead of reverting on-chain
+    - start() / stop(): run and cancel the submitter and confirmer tasks
+    - drain(): wait until every queued request has a receipt
+
+    Counters and latencies in `stats` are per request, also when bundling.
+    """
+
+    def __init__(
+        self,
+        w3,
+        forwarder_address,
+        relayer_key,
+        max_in_flight=64,
+        confirmers=8,
+        gas_buffer=60000,
+        poll_interval=0.2,
+        verifier=None,
+        bundle_gas_budget=None,
+        max_bundle_size=100,
+        gas_price_refresh=15.0,
+        replace_after=60.0,
+    ):
+        self.w3 = w3
+        self.forwarder_address = AsyncWeb3.to_checksum_address(forwarder_address)
+        self.relayer = Account.from_key(relayer_key)
+        self.max_in_flight = max_in_flight
+        self.confirmers = confirmers
+        self.gas_buffer = gas_buffer
+        self.poll_interval = poll_interval
+        self.verifier = verifier
+        self.bundle_gas_budget = bundle_gas_budget
+        self.max_bundle_size = max_bundle_size
+        self.gas_price_refresh = gas_price_refresh
+        self.replace_after = replace_after
+
+        self.requests = asyncio.Queue()
+        self.receipts = asyncio.Queue()
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.stats = RelayerStats()
+
+        self.nonce = None
+        self.balance = None
+        self.exhausted = False
+        self.chain_id = None
+        self.gas_price = None
+        self._gas_price_at = None
+        self._tasks = []
+        self._carry = None
+        # Set by RelayerPool: callable taking (request, signature) pairs off an
+        # out-of-funds key; returns False, taking nothing, if no other key can
+        # take them. Synchronous, so nothing can be queued in between
+        self.reroute = None
+        # Optional callable (bundle, receipt) run once a bundle's receipt is in
+        # (receipt None: sending failed), e.g. relay_spool acknowledging the
+        # spool records it came from
+        self.on_settled = None
+
+    async def forwarder_nonce(self, address):
+        # "pending" so requests of this sender already in the mempool are counted
+        result = await self.w3.eth.call({"to": self.forwarder_address, "data": encode_get_nonce(address)}, "pending")
+        return int.from_bytes(result, "big")
+
+    async def submit(self, request, signature):
+        """
+        Queues a signed request. Returns False if the verifier rejected it.
+        """
+        if self.verifier is not None:
+            sender = request["from"]
+            if self.verifier.needs_nonce(sender):
+                self.verifier.set_nonce(sender, await self.forwarder_nonce(sender))
+            reason = self.verifier.check(request, signature)
+            if reason is not None:
+                self.stats.rejected += 1
+                print(f"⚠️ Rejected {sender} nonce={request['nonce']}: {reason}")
+                return False
+        # The key may have run dry while the nonce was being read
+        if self.exhausted and self.reroute is not None and self.reroute([(request, signature)]):
+            return True
+        await self.requests.put((request, signature))
+        return True
+
+    async def _sync_nonce(self):
+        # "pending" so transactions already in the mempool are counted
+        self.nonce = await self.w3.eth.get_transaction_count(self.relayer.address, "pending")
+
+    async def _sync_balance(self):
+        self.balance = await self.w3.eth.get_balance(self.relayer.address, "pending")
+
+    async def _sync_gas_price(self):
+        self.gas_price = await self.w3.eth.gas_price
+        self._gas_price_at = time.monotonic()
+
+    async def start(self):
+        self.chain_id = await self.w3.eth.chain_id
+        await self._sync_gas_price()
+        await self._sync_nonce()
+        await self._sync_balance()
+        self.stats.started_at = time.perf_counter()
+
+        self._tasks = [asyncio.create_task(self._submitter())]
+        for _ in range(self.confirmers):
+            self._tasks.append(asyncio.create_task(self._confirmer()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.stats.finished_at = time.perf_counter()
+
+    async def drain(self):
+        """
+        Waits until every request put on the queue has been sent and confirmed.
+        """
+        await self.requests.join()
+        await self.receipts.join()
+
+    def _bundle_gas(self, request):
+        return request["gas"] + BUNDLE_GAS_PER_REQUEST
+
+    async def _next_bundle(self):
+        """
+        Takes the next request off the queue and, when bundling, as many more
+        already-queued requests as fit in bundle_gas_budget. A request that
+        does not fit is held back as the first one of the next bundle.
+        """
+        if self._carry is not None:
+            bundle, self._carry = [self._carry], None
+        else:
+            bundle = [await self.requests.get()]
+        if not self.bundle_gas_budget:
+            return bundle
+
+        gas = self._bundle_gas(bundle[0][0])
+        while len(bundle) < self.max_bundle_size:
+            try:
+                item = self.requests.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            gas += self._bundle_gas(item[0])
+            if gas > self.bundle_gas_budget:
+                self._carry = item
+                break
+            bundle.append(item)
+        return bundle
+
+    def _build_transaction(self, bundle):
+        if self.bundle_gas_budget:
+            requests = [request for request, _ in bundle]
+            gas = sum(self._bundle_gas(request) for request in requests)
+            data = encode_execute_batch(requests, [signature for _, signature in bundle])
+        else:
+            (request, signature), = bundle
+            requests = [request]
+            gas = request["gas"]
+            data = encode_execute(request, signature)
+
+        tx = {
+            "from": self.relayer.address,
+            "to": self.forwarder_address,
+            "nonce": self.nonce,
+            "gas": gas + self.gas_buffer,
+            "gasPrice": self.gas_price,
+            "value": sum(request["value"] for request in requests),
+            "data": data,
+            "chainId": self.chain_id,
+        }
+        return tx, _raw_transaction(self.relayer.sign_transaction(tx))
+
+    def _take_queued(self):
+        """
+        Empties the request queue (and the carried item), in order.
+        """
+        items = []
+        if self._carry is not None:
+            items.append(self._carry)
+            self._carry = None
+            self.requests.task_done()
+        while True:
+            try:
+                items.append(self.requests.get_nowait())
+            except asyncio.QueueEmpty:
+                return items
+            self.requests.task_done()
+
+    def _invalidate_senders(self, items):
+        """
+        Drops the verifier's cached nonce for every sender in `items`. Their
+        requests did not execute, so the forwarder nonce never moved past
+        them: the sender's next submit re-reads it and a re-signed request
+        for the same nonce is accepted.
+        """
+        if self.verifier is not None:
+            for sender in {request["from"] for request, _ in items}:
+                self.verifier.invalidate(sender)
+
+    def _settle_failed(self, items):
+        self.stats.send_errors += len(items)
+        self._invalidate_senders(items)
+        if self.on_settled is not None:
+            self.on_settled(items, None)
+
+    async def _reroute_all(self, bundle):
+        """
+        Takes this key out of rotation and hands the bundle, then everything
+        still queued, to the other keys. Waits for the receipts of the
+        transactions already in flight first: a user's next nonces must not
+        be sent from another key before the earlier ones are mined. Until
+        then the key still receives its users' new requests, behind the
+        bundle. On False nothing has left this daemon.
+        """
+        if self.reroute is None:
+            self.exhausted = True
+            return False
+        await self.receipts.join()
+        self.exhausted = True
+        if not self.reroute(list(bundle)):
+            return False
+        # Nothing ran since the bundle was taken, so this cannot fail
+        queued = self._take_queued()
+        if queued:
+            self.reroute(queued)
+        return True
+
+    async def _submitter(self):
+        while True:
+            bundle = await self._next_bundle()
+            await self.in_flight.acquire()
+            try:
+                if time.monotonic() - self._gas_price_at >= self.gas_price_refresh:
+                    await self._sync_gas_price()
+                tx, raw_tx = self._build_transaction(bundle)
+                # Worst-case cost; the local balance is only re-read when it looks too low
+                cost = tx["gas"] * tx["gasPrice"] + tx["value"]
+                if cost > self.balance:
+                    await self._sync_balance()
+                    if cost > self.balance:
+                        if await self._reroute_all(bundle):
+                            self.in_flight.release()
+                            continue
+                        raise ValueError(f"relayer {self.relayer.address} balance {self.balance} < {cost} wei")
+                submitted_at = time.perf_counter()
+                tx_hash = await self.w3.eth.send_raw_transaction(raw_tx)
+            except Exception as e:
+                # Most likely a nonce clash (another sender, dropped tx): resync and move on
+                self.in_flight.release()
+                request = bundle[0][0]
+                print(f"❌ Send failed for {request['from']} nonce={request['nonce']} (+{len(bundle) - 1} bundled): {e}")
+                await self._sync_nonce()
+                self._settle_failed(bundle)
+            else:
+                self.nonce += 1
+                self.balance -= cost
+                self.stats.submitted += len(bundle)
+                await self.receipts.put((tx, tx_hash, submitted_at, bundle))
+            finally:
+                for _ in bundle:
+                    self.requests.task_done()
+
+    async def _find_receipt(self, tx_hashes):
+        """
+        The receipt of whichever of `tx_hashes` (one nonce, several gas prices) was mined, or None.
+        """
+        for tx_hash in tx_hashes:
+            try:
+                return await self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+        return None
+
+    async def _replace(self, tx):
+        """
+        Sends `tx` again at the same nonce with a higher gas price. Returns
+        the transaction to bump from next time and the new hash, which is
+        None if nothing was sent: the key cannot pay the higher price, or the
+        node refused the replacement (an earlier version was mined meanwhile,
+        "nonce too low", or the bump was too small; the next attempt then
+        still starts from the higher price).
+        """
+        await self._sync_gas_price()
+        # Nodes only accept a replacement that pays at least ~10% more
+        replacement = dict(tx, gasPrice=max(tx["gasPrice"] * 9 // 8 + 1, self.gas_price))
+        extra_cost = (replacement["gasPrice"] - tx["gasPrice"]) * tx["gas"]
+        if extra_cost > self.balance:
+            print(f"⚠️ Relayer nonce {tx['nonce']} is stuck; balance too low to re-send it at a higher gas price")
+            return tx, None
+        try:
+            tx_hash = await self.w3.eth.send_raw_transaction(
+                _raw_transaction(self.relayer.sign_transaction(replacement))
+            )
+        except Exception as e:
+            print(f"⚠️ Replacement of relayer nonce {tx['nonce']} not accepted: {e}")
+            return replacement, None
+        self.balance -= extra_cost
+        self.stats.replacements += 1
+        print(f"⛽ Relayer nonce {tx['nonce']} re-sent at {replacement['gasPrice']} wei/gas")
+        return replacement, tx_hash
+
+    async def _confirmer(self):
+        while True:
+            tx, tx_hash, submitted_at, bundle = await self.receipts.get()
+            size = len(bundle)
+            try:
+                tx_hashes = [tx_hash]
+                sent_at = submitted_at
+                while True:
+                    receipt = await self._find_receipt(tx_hashes)
+                    if receipt is not None:
+                        break
+                    if self.replace_after is not None and time.perf_counter() - sent_at >= self.replace_after:
+                        tx, tx_hash = await self._replace(tx)
+                        if tx_hash is not None:
+                            tx_hashes.append(tx_hash)
+                        sent_at = time.perf_counter()
+                    await asyncio.sleep(self.poll_interval)
+
+                self.stats.latencies.extend([time.perf_counter() - submitted_at] * size)
+                self.stats.gas_used += receipt["gasUsed"]
+                # A mined bundle can still hold requests that failed: count each
+                # one by its Executed event, not by the transaction status
+                executed = executed_requests(receipt, self.forwarder_address) if receipt["status"] == 1 else {}
+                confirmed = sum(
+                    1 for request, _ in bundle if executed.get((request["from"], request["nonce"])) is True
+                )
+                self.stats.confirmed += confirmed
+                self.stats.reverted += size - confirmed
+                # Without an Executed event the nonce was not used
+                self._invalidate_senders(
+                    [item for item in bundle if (item[0]["from"], item[0]["nonce"]) not in executed]
+                )
+                if self.on_settled is not None:
+                    self.on_settled(bundle, receipt)
+            finally:
+                self.in_flight.release()
+                self.receipts.task_done()
+
+
+class RelayerPool:
+    """
+    Shards signed requests over one RelayerDaemon per relayer key.
+
+    Same interface as RelayerDaemon (submit / start / stop / drain / stats).
+    A request goes to the key picked by its `from` address, so one user's
+    requests stay ordered on one nonce stream while different users are
+    relayed in parallel. Keys are picked by rendezvous hashing: every user
+    ranks the keys by keccak(user || relayer) and takes the first one that
+    is not exhausted (balance too low). When a key runs out of funds, only
+    its own users move, each to its next-ranked key, and only once the
+    key's transactions in flight have their receipts; everyone else stays
+    where they were. `options` are passed to every daemon; a verifier is
+    shared.
+    """
+
+    def __init__(self, w3, forwarder_address, relayer_keys, **options):
+        if not relayer_keys:
+            raise ValueError("RelayerPool needs at least one relayer key")
+        self.daemons = [RelayerDaemon(w3, forwarder_address, key, **options) for key in relayer_keys]
+        for daemon in self.daemons:
+            daemon.reroute = self._reroute
+        self.poll_interval = self.daemons[0].poll_interval
+        # user address -> daemons in rendezvous order
+        self._rankings = {}
+        # Requests moved between keys so far (see drain)
+        self._moved = 0
+
+    @property
+    def stats(self):
+        return RelayerStats.merge([daemon.stats for daemon in self.daemons])
+
+    def daemon_for(self, address):
+        ranking = self._rankings.get(address)
+        if ranking is None:
+            user = bytes.fromhex(address[2:])
+            ranking = self._rankings[address] = sorted(
+                self.daemons, key=lambda daemon: keccak(user + bytes.fromhex(daemon.relayer.address[2:])), reverse=True
+            )
+        for daemon in ranking:
+            if not daemon.exhausted:
+                return daemon
+        return ranking[0]
+
+    def _reroute(self, items):
+        if all(daemon.exhausted for daemon in self.daemons):
+            return False
+        print(f"💸 Moving {len(items)} queued request(s) off an out-of-funds relayer key")
+        for request, signature in items:
+            self.daemon_for(request["from"]).requests.put_nowait((request, signature))
+        self._moved += len(items)
+        return True
+
+    async def submit(self, request, signature):
+        return await self.daemon_for(request["from"]).submit(request, signature)
+
+    async def start(self):
+        await asyncio.gather(*(daemon.start() for daemon in self.daemons))
+
+    async def stop(self):
+        await asyncio.gather(*(daemon.stop() for daemon in self.daemons))
+
+    async def drain(self):
+        # Requests moved to a key whose drain had already returned are waited for in another round
+        while True:
+            moved = self._moved
+            await asyncio.gather(*(daemon.drain() for daemon in self.daemons))
+            if self._moved == moved:
+                return
+
+    def key_report(self):
+        """
+        Per-key request counts and (locally tracked) balances.
+        """
+        return [
+            {
+                "address": daemon.relayer.address,
+                "submitted": daemon.stats.submitted,
+                "send_errors": daemon.stats.send_errors,
+                "balance_wei": daemon.balance,
+                "exhausted": daemon.exhausted,
+            }
+            for daemon in self.daemons
+        ]
+
+
+def read_signed_requests(path):
+    """
+    Yields (request, signature) pairs from a JSON Lines file.
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield request_from_json(json.loads(line))
+
+
+async def _follow_signed_requests(path, poll_interval):
+    """
+    Like read_signed_requests, but keeps waiting for new lines (tail -f).
+    """
+    with open(path) as f:
+        pending = ""
+        while True:
+            line = f.readline()
+            if not line:
+                await asyncio.sleep(poll_interval)
+                continue
+            pending += line
+            if not pending.endswith("\n"):
+                continue
+            if pending.strip():
+                yield request_from_json(json.loads(pending))
+            pending = ""
+
+
+class CoalescingFeed:
+    """
+    Passes signed requests on to `send(request, signature, tags)`, through a
+    RenewalCoalescer when `window` is set.
+
+    With a window, a background task releases the requests whose window is
+    over every `poll_interval` seconds, and close() sends whatever is still
+    held. `tags` are the caller's handles (spool offsets) for a request and
+    for everything it superseded. With `spool_path`, what is held (and
+    until when) is published in `<spool>.held` for plan_renewal: it is
+    rewritten at most every `poll_interval` after new requests arrive, and
+    always before released requests are sent, so a signer never sees a
+    nonce as held once it may be on its way to the chain.
+    """
+
+    def __init__(self, send, window=0, poll_interval=0.2, spool_path=None):
+        self.send = send
+        self.coalescer = RenewalCoalescer(window) if window else None
+        self.poll_interval = poll_interval
+        self.spool_path = spool_path
+        self._stop = asyncio.Event()
+        self._task = None
+        self._held_changed = False
+
+    def __len__(self):
+        return len(self.coalescer) if self.coalescer is not None else 0
+
+    async def start(self):
+        if self.coalescer is not None:
+            self._save_held()
+            self._task = asyncio.create_task(self._release_due())
+
+    def _save_held(self):
+        self._held_changed = False
+        if self.spool_path is None:
+            return
+        # Coalescer deadlines are time.monotonic(); the file is read by other processes
+        offset = time.time() - time.monotonic()
+        save_held(self.spool_path, {
+            sender: {nonce: deadline + offset for nonce, deadline in nonces.items()}
+            for sender, nonces in self.coalescer.deadlines().items()
+        })
+
+    async def _send_released(self, released):
+        if released:
+            self._save_held()
+        for request, signature, tags in released:
+            await self.send(request, signature, tags)
+
+    async def _release_due(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            released = self.coalescer.due(time.monotonic())
+            if self._held_changed and not released:
+                self._save_held()
+            await self._send_released(released)
+
+    async def add(self, request, signature, tag=None):
+        """
+        Returns the tags of requests dropped as conflicting (never sent).
+        """
+        if self.coalescer is None:
+            await self.send(request, signature, [] if tag is None else [tag])
+            return []
+        self._held_changed = True
+        return self.coalescer.add(request, signature, time.monotonic(), tag)
+
+    async def close(self):
+        """
+        Stops the release task and sends everything still held.
+        """
+        if self.coalescer is None:
+            return
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self._send_released(self.coalescer.flush())
+
+
+async def relay_file(w3, forwarder_address, relayer_keys, path, follow=False, coalesce_window=0, **options):
+    """
+    Relays every signed request in `path` and returns the stats report, with
+    a per-key breakdown under "keys". `relayer_keys` is one key or a list of
+    keys for a RelayerPool. With follow=True it keeps reading new lines until
+    cancelled. A non-zero `coalesce_window` holds requests that long and
+    merges cumulative renewals (scripts/renewal_coalescer.py).
+    """
+    if isinstance(relayer_keys, str):
+        relayer_keys = [relayer_keys]
+    daemon = RelayerPool(w3, forwarder_address, relayer_keys, **options)
+
+    async def send(request, signature, tags):
+        await daemon.submit(request, signature)
+
+    feed = CoalescingFeed(send, coalesce_window, daemon.poll_interval)
+    await daemon.start()
+    await feed.start()
+    try:
+        if follow:
+            async for request, signature in _follow_signed_requests(path, daemon.poll_interval):
+                await feed.add(request, signature)
+        else:
+            for request, signature in read_signed_requests(path):
+                await feed.add(request, signature)
+        await feed.close()
+        await daemon.drain()
+    finally:
+        await daemon.stop()
+    report = daemon.stats.report()
+    report["keys"] = daemon.key_report()
+    if feed.coalescer is not None:
+        report["coalescer"] = feed.coalescer.stats.report()
+    return report
+
+
+async def relay_spool(
+    w3,
+    forwarder_address,
+    relayer_keys,
+    path,
+    follow=False,
+    client=None,
+    max_pending=10000,
+    save_interval=1.0,
+    coalesce_window=0,
+    **options,
+):
+    """
+    Relays the unacknowledged records of a request spool (see
+    scripts/request_spool.py) and returns the stats report.
+
+    Records are read from the memory-mapped spool starting at the cursor's
+    `acked` offset, with at most `max_pending` of them awaiting a receipt. The
+    send lease is written to `<spool>.ack` before a record past it is
+    submitted, and `acked` is saved at most every `save_interval` seconds
+    and on exit. On start, senders of records inside the old lease get their
+    forwarder nonce read at "pending" (one batch), and records whose nonce is
+    already used are acknowledged without sending them again. Requests the
+    verifier rejects are acknowledged too; send errors are not, so they are
+    retried on the next run. With `coalesce_window`, records go through a
+    CoalescingFeed first; a record merged into a later one is acknowledged
+    together with it, and the nonces being held are published in
+    `<spool>.held` for gassless_renew.py renew_cumulative.
+    """
+    if isinstance(relayer_keys, str):
+        relayer_keys = [relayer_keys]
+    client = client or get_client(w3.provider.endpoint_uri)
+    cursor = SpoolCursor(path)
+    tracker = AckTracker(cursor.acked)
+    pending = {}
+    last_save = time.monotonic()
+
+    def ack(offset):
+        nonlocal last_save
+        if tracker.ack(offset) and time.monotonic() - last_save >= save_interval:
+            cursor.acked = tracker.acked
+            cursor.save()
+            last_save = time.monotonic()
+
+    def on_settled(bundle, receipt):
+        for request, _ in bundle:
+            offsets = pending.pop((request["from"], request["nonce"]), ())
+            # A failed send stays unacknowledged: `acked` stops below it and
+            # the next run retries it
+            if receipt is not None:
+                for offset in offsets:
+                    ack(offset)
+
+    daemon = RelayerPool(w3, forwarder_address, relayer_keys, **options)
+    for relayer in daemon.daemons:
+        relayer.on_settled = on_settled
+    verifier = options.get("verifier")
+
+    async def send(request, signature, offsets):
+        key = (request["from"], request["nonce"])
+        if key in pending:
+            # Same sender and nonce as a request still in flight: only one can execute
+            print(f"⚠️ Dropped {key[0]} nonce={key[1]}: that nonce is already in flight")
+            for offset in offsets:
+                ack(offset)
+            return
+        cursor.lease(max(tracker.end(offset) for offset in offsets))
+        pending[key] = offsets
+        if not await daemon.submit(request, signature):
+            del pending[key]
+            for offset in offsets:
+                ack(offset)
+
+    feed = CoalescingFeed(send, coalesce_window, daemon.poll_interval, spool_path=path)
+
+    reader = SpoolReader(path)
+    used_nonces = {}
+    if cursor.sent > cursor.acked:
+        senders = reader.senders(cursor.acked, cursor.sent)
+        used_nonces = forwarder_nonces(client, forwarder_address, senders, "pending")
+        if verifier is not None:
+            for sender, nonce in used_nonces.items():
+                verifier.set_nonce(sender, nonce)
+        print(f"♻️ Resuming {path} at offset {cursor.acked}: checked {len(senders)} sender(s) "
+              f"of possibly sent records")
+
+    skipped = 0
+    resume_limit = cursor.sent
+    next_offset = cursor.acked
+    await daemon.start()
+    await feed.start()
+    try:
+        while True:
+            for offset, end, request, signature in reader.records(next_offset):
+                next_offset = end
+                while len(pending) + len(feed) >= max_pending:
+                    await asyncio.sleep(daemon.poll_interval)
+                tracker.track(offset, end)
+                if offset < resume_limit and request["nonce"] < used_nonces.get(request["from"], 0):
+                    skipped += 1
+                    ack(offset)
+                    continue
+                for dropped in await feed.add(request, signature, offset):
+                    ack(dropped)
+            if not follow:
+                break
+            if not reader.remap():
+                await asyncio.sleep(daemon.poll_interval)
+        await feed.close()
+        await daemon.drain()
+    finally:
+        await daemon.stop()
+        reader.close()
+        cursor.acked = tracker.acked
+        cursor.save()
+    report = daemon.stats.report()
+    report["keys"] = daemon.key_report()
+    report["resumed_skipped"] = skipped
+    if feed.coalescer is not None:
+        report["coalescer"] = feed.coalescer.stats.report()
+    return report
+
+
+def print_report(report):
+    print(f"\n📊 Relayed {report['confirmed'] + report['reverted']} request(s) in {report['elapsed_s']:.2f}s")
+    print(
+        f"   Confirmed: {report['confirmed']} | Reverted: {report['reverted']} | "
+        f"Send errors: {report['send_errors']} | Rejected off-chain: {report['rejected']}"
+    )
+    if report.get("replacements"):
+        print(f"   Stuck transactions re-sent at a higher gas price: {report['replacements']}")
+    print(f"   Sustained throughput: {report['requests_per_s']:.1f} req/s")
+    print(f"   Relayer gas per request: {report['gas_per_request']:,}")
+    print(
+        "   Submit-to-receipt latency: "
+        f"p50={report['latency_p50_s'] * 1000:.0f}ms "
+        f"p90={report['latency_p90_s'] * 1000:.0f}ms "
+        f"p99={report['latency_p99_s'] * 1000:.0f}ms "
+        f"max={report['latency_max_s'] * 1000:.0f}ms"
+    )
+    if len(report.get("keys", ())) > 1:
+        for key in report["keys"]:
+            flag = " (out of funds)" if key["exhausted"] else ""
+            print(f"   {key['address']}: {key['submitted']} sent, {key['send_errors']} failed, "
+                  f"~{key['balance_wei'] / 10**18:.4f} ETH left{flag}")
+    if report.get("coalescer"):
+        coalescer = report["coalescer"]
+        print(f"   Coalesced: {coalescer['received']} request(s) in, {coalescer['released']} relayed, "
+              f"{coalescer['merged']} merged, {coalescer['conflicts']} conflicting dropped")
+    if report.get("resumed_skipped"):
+        print(f"   Already relayed before the restart (skipped): {report['resumed_skipped']}")
+
+
+def main(input_path="signed_requests.jsonl", follow=False, bundle_gas_budget=0, coalesce_window=0):
+    """
+    Relays signed requests from `input_path` through the pipelined daemon
+    and prints throughput and latency percentiles. A non-zero
+    `bundle_gas_budget` relays through executeBatch bundles of up to that much gas;
+    a non-zero `coalesce_window` (seconds) merges cumulative renewals first.
+    """
+    relayer_keys = [key.strip() for key in os.getenv("RELAYER_PRIVATE_KEYS", "").split(",") if key.strip()]
+    if not relayer_keys and os.getenv("RELAYER_PRIVATE_KEY"):
+        relayer_keys = [os.getenv("RELAYER_PRIVATE_KEY")]
+    if not relayer_keys:
+        raise ValueError("RELAYER_PRIVATE_KEY not set in environment (or code).")
+
+    forwarder_address = os.getenv("FORWARDER_ADDRESS")
+    if not forwarder_address:
+        raise ValueError("FORWARDER_ADDRESS not set in environment (or code).")
+
+    rpc_url = os.getenv("RPC_URL", DEFAULT_RPC_URL)
+    w3 = async_web3_for(rpc_url)
+
+    follow = follow in (True, "True", "true", "1")
+    bundle_gas_budget = int(bundle_gas_budget) or None
+    coalesce_window = float(coalesce_window)
+    print(
+        f"🔗 Relaying {input_path} via {rpc_url} with {len(relayer_keys)} key(s) "
+        f"(follow={follow}, bundle_gas_budget={bundle_gas_budget}, coalesce_window={coalesce_window:g}s)"
+    )
+    relay = relay_spool if is_spool_path(input_path) else relay_file
+    report = asyncio.run(
+        relay(
+            w3,
+            forwarder_address,
+            relayer_keys,
+            input_path,
+            follow=follow,
+            coalesce_window=coalesce_window,
+            verifier=RequestVerifier(),
+            bundle_gas_budget=bundle_gas_budget,
+        )
+    )
+    print_report(report)
+    get_client(rpc_url).stats.print_report()
@@ -75,7 +75,8 @@
 import os
 import json
 from brownie import accounts, Contract
-from web3 import Web3
+
+from scripts.metrics import METRICS
 
 def main():
     """
@@ -93,7 +94,7 @@ def main():
         raise ValueError("FORWARDER_ADDRESS not set in environment (or code).")
 
     # 2) Load the signed EIP-712 request
-    with open("signed_request.json","r") as f:
+    with METRICS.stage("load_request"), open("signed_request.json","r") as f:
         payload = json.load(f)
 
     req_json = payload["request"]
@@ -119,22 +120,30 @@ def main():
     ]
 
     # 5) Relayer account
-    relayer_acct = accounts.add(relayer_key)
+    with METRICS.stage("load_keys"):
+        relayer_acct = accounts.add(relayer_key)
 
     # 6) Load forwarder from build
-    with open("build/contracts/MinimalForwarder.json") as f_abi:
-        forwarder_abi = json.load(f_abi)["abi"]
-
-    forwarder = Contract.from_abi("MinimalForwarder", forwarder_address, forwarder_abi)
+    with METRICS.stage("load_abi"):
+        with open("build/contracts/MinimalForwarder.json") as f_abi:
+            forwarder_abi = json.load(f_abi)["abi"]
+        forwarder = Contract.from_abi("MinimalForwarder", forwarder_address, forwarder_abi)
 
-    # 7) Execute
-    tx = forwarder.execute(
-        forward_req,
-        signature,
-        {"from": relayer_acct}
-    )
-    tx.wait(1)
+    # 7) Execute: build (gas estimate), send without waiting, then wait for the receipt
+    with METRICS.stage("build_transaction"):
+        gas_limit = forwarder.execute.estimate_gas(forward_req, signature, {"from": relayer_acct})
+    with METRICS.stage("send"):
+        tx = forwarder.execute(
+            forward_req,
+            signature,
+            {"from": relayer_acct, "gas_limit": gas_limit, "required_confs": 0}
+        )
+    with METRICS.stage("wait"):
+        tx.wait(1)
+    METRICS.incr("requests_relayed")
 
     print("Forwarder.execute(...) called successfully!")
     print(f"Tx hash: {tx.txid}")
     print(f"Status: {'Success' if tx.status == 1 else 'Failed'}")
+    METRICS.print_report()
+    METRICS.export()
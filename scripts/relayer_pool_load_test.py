@@ -0,0 +1,110 @@
+"""
+Load test for RelayerPool: relayed renewals per second against 1..8 relayer keys.
+
+Deploys fresh MinimalForwarder / NFTMembership contracts on the active
+(local) network, mints one token for each of USERS members and funds
+max(KEY_COUNTS) throwaway relayer accounts. Then, for every pool size in
+KEY_COUNTS, it signs `requests` metaRenewMembership requests spread evenly
+over the members and relays them with relayer_daemon.relay_file using the
+first N keys, printing throughput and latency per pool size.
+
+On an automining dev chain every transaction is mined as soon as it
+arrives, so the gain from more keys mostly comes from overlapping
+signing, submission and receipt polling; against a node with real block
+times each key also adds its own nonce stream per block.
+
+Usage:
+    brownie run scripts/relayer_pool_load_test.py
+    brownie run scripts/relayer_pool_load_test.py main 1000   # requests per pool size
+"""
+
+import json
+import asyncio
+
+from brownie import MinimalForwarder, NFTMembership, accounts, network, web3
+
+from scripts.forward_request import request_to_json, sign_request
+from scripts.relayer_daemon import relay_file
+from scripts.rpc_web3 import async_web3_for
+
+KEY_COUNTS = (1, 2, 4, 8)
+USERS = 50
+PRICE = 10**16  # 0.01 ETH in Wei
+DURATION = 30 * 24 * 60 * 60  # 30 days in seconds
+RENEW_SECONDS = 60
+
+
+def _setup(deployer):
+    forwarder = MinimalForwarder.deploy({"from": deployer})
+    nft = NFTMembership.deploy("MembershipPass", "MBR", PRICE, forwarder, {"from": deployer})
+
+    users = [accounts.add() for _ in range(USERS)]
+    nft.batchMintMembership(users, [DURATION] * USERS, {"from": deployer, "value": PRICE * USERS})
+    relayers = [accounts.add() for _ in range(max(KEY_COUNTS))]
+    for relayer in relayers:
+        deployer.transfer(relayer, "10 ether")
+    return forwarder, nft, users, relayers
+
+
+def _signed_requests(nft, users, nonces, count):
+    """
+    `count` signed renewals, round-robin over `users`; token ids follow mint order.
+    """
+    signed = []
+    for i in range(count):
+        index = i % len(users)
+        user = users[index]
+        request = {
+            "from": user.address,
+            "to": nft.address,
+            "value": 0,
+            "gas": 100000,
+            "nonce": nonces[index],
+            "data": bytes.fromhex(nft.metaRenewMembership.encode_input(index + 1, RENEW_SECONDS, user.address)[2:]),
+        }
+        nonces[index] += 1
+        signed.append((request, sign_request(request, user.private_key)))
+    return signed
+
+
+def _write_jsonl(signed, path):
+    with open(path, "w") as f:
+        for request, signature in signed:
+            f.write(json.dumps(request_to_json(request, signature)) + "\n")
+
+
+def main(requests=400, output_path="pool_load_test.jsonl"):
+    """
+    Runs the load test for every pool size in KEY_COUNTS and prints a table.
+    """
+    active = network.show_active()
+    print(f"\n🔗 Connected to network: {active}")
+    if "fork" not in active and active not in ("development", "anvil", "hardhat", "geth-dev"):
+        print("⚠️ This deploys contracts and funds throwaway accounts; run it on a local dev chain.")
+
+    requests = int(requests)
+    forwarder, nft, users, relayers = _setup(accounts[0])
+    nonces = [0] * len(users)
+
+    rows = []
+    for key_count in KEY_COUNTS:
+        _write_jsonl(_signed_requests(nft, users, nonces, requests), output_path)
+        # A fresh AsyncWeb3 per asyncio.run: its HTTP session belongs to one event loop
+        w3 = async_web3_for(web3.provider.endpoint_uri)
+        report = asyncio.run(
+            relay_file(w3, forwarder.address, [r.private_key for r in relayers[:key_count]], output_path)
+        )
+        rows.append((key_count, report))
+        print(f"   {key_count} key(s): {report['requests_per_s']:.1f} req/s, "
+              f"{report['send_errors']} send error(s)")
+
+    expected = sum(nonces)
+    relayed = sum(forwarder.getNonce(user) for user in users)
+    print(f"\n📊 Relayed {relayed}/{expected} renewal(s) across {len(users)} member(s)\n")
+    print("| **Keys** | **Req/s** | **p50 (ms)** | **p99 (ms)** | **Send errors** |")
+    print("|---------:|----------:|-------------:|-------------:|----------------:|")
+    for key_count, report in rows:
+        print(
+            f"| {key_count} | {report['requests_per_s']:.1f} | {report['latency_p50_s'] * 1000:.0f} "
+            f"| {report['latency_p99_s'] * 1000:.0f} | {report['send_errors']} |"
+        )
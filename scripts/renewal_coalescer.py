@@ -0,0 +1,407 @@
+"""
+Coalescing stage for gasless renewals, in front of the relayer.
+
+Every "renew" click (or every small step of an automated top-up) used to
+become its own metaRenewMembership(tokenId, additionalSeconds, realUser)
+ForwardRequest, so each one paid the 21k base cost, a signature check, a
+forwarder nonce write, a validUntil write and a MembershipRenewed event.
+Separately signed requests cannot be merged by the relayer (the signature
+covers the calldata), so merging is split between signer and relayer:
+
+  - the signer makes renewals cumulative: while a renewal of the same token
+    is the newest request the relayer is still holding for that signer, a
+    new click is signed at the same nonce with the summed duration; any
+    other request takes the next free nonce after the waiting ones
+    (gassless_renew.py renew_cumulative reads them from the spool via
+    plan_renewal). The relayer lists what it holds, and until when, in
+    `<spool>.held`; a nonce it has released (sent, but maybe not mined yet)
+    is never signed over again
+  - RenewalCoalescer holds requests for `window` seconds after the first one
+    of a (from, nonce) arrives. A later metaRenewMembership for the same
+    nonce, token and owner with at least the same duration supersedes the
+    held one; anything else at a nonce already held is a conflict and is
+    dropped (MinimalForwarder would only ever accept one of them)
+  - held requests are released per sender in nonce order, and a nonce is
+    only released once every lower nonce held for that sender is, so the
+    relayer still sees each signer's nonces in the order the forwarder
+    expects
+
+Requests that are not metaRenewMembership calls are held and released in
+the same order, but never merged. replay() runs a click workload through
+the signer rule and the coalescer and reports the transactions saved; it
+does not sign or send anything, so it makes no gas measurement.
+
+Usage:
+    brownie run scripts/renewal_coalescer.py
+    brownie run scripts/renewal_coalescer.py main 5000 30 60,3600   # members, days, windows (s)
+    brownie run scripts/relayer_daemon.py main signed_requests.spool True 0 60   # 60 s coalescing window
+"""
+
+import os
+import heapq
+import json
+import random
+import time
+
+from eth_utils import keccak, to_checksum_address
+
+from scripts.request_spool import SpoolCursor, SpoolReader
+
+META_RENEW_SELECTOR = keccak(text="metaRenewMembership(uint256,uint256,address)")[:4]
+
+# plan_renewal only signs over a held nonce if the relayer will hold it at
+# least this many seconds longer: the relayer picks up new spool records by
+# polling, and one that arrives after its nonce was released is dropped
+HOLD_MARGIN = 10.0
+
+
+def encode_meta_renew(token_id, seconds, real_user):
+    # All three arguments are static words
+    return (
+        META_RENEW_SELECTOR
+        + int(token_id).to_bytes(32, "big")
+        + int(seconds).to_bytes(32, "big")
+        + bytes(12) + bytes.fromhex(real_user[2:])
+    )
+
+
+def decode_meta_renew(data):
+    """
+    (token_id, seconds, real_user) for metaRenewMembership calldata, else None.
+    """
+    data = bytes(data)
+    if len(data) != 100 or data[:4] != META_RENEW_SELECTOR:
+        return None
+    return (
+        int.from_bytes(data[4:36], "big"),
+        int.from_bytes(data[36:68], "big"),
+        to_checksum_address(data[80:100]),
+    )
+
+
+def held_path(spool_path):
+    return f"{spool_path}.held"
+
+
+def save_held(spool_path, held):
+    """
+    Writes `<spool>.held`: {sender: {nonce: deadline}} for the requests a
+    coalescing relayer is holding, deadlines in time.time() seconds.
+    """
+    path = held_path(spool_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({sender: {str(nonce): deadline for nonce, deadline in nonces.items()}
+                   for sender, nonces in held.items()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_held(spool_path):
+    """
+    Inverse of save_held; {} when no coalescing relayer has written one.
+    """
+    path = held_path(spool_path)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        held = json.load(f)
+    return {sender: {int(nonce): deadline for nonce, deadline in nonces.items()} for sender, nonces in held.items()}
+
+
+def plan_renewal(spool_path, sender, chain_nonce, token_id, now=None, margin=HOLD_MARGIN):
+    """
+    (nonce, held_seconds) for a new metaRenewMembership of `token_id` by
+    `sender`, given the sender's pending forwarder nonce `chain_nonce`.
+
+    The nonce is the next one after the sender's not yet acknowledged spool
+    records, so a waiting request for another token is never shadowed. Only
+    when the newest waiting record at the sender's highest nonce renews the
+    same token, and `<spool>.held` says the relayer holds that nonce until
+    at least `margin` seconds after `now` (default time.time()), is that
+    nonce reused, with its seconds returned to add onto. A record the
+    relayer has already released may be on its way to the chain: signing
+    over its nonce would lose the new renewal, so it gets the next nonce.
+    """
+    nonce, last = int(chain_nonce), None
+    if not os.path.exists(spool_path):
+        return nonce, 0
+    with SpoolReader(spool_path) as reader:
+        for _, _, request, _ in reader.records(SpoolCursor(spool_path).acked):
+            if request["from"] != sender or request["nonce"] < chain_nonce:
+                continue
+            if last is None or request["nonce"] >= last["nonce"]:
+                last = request
+    if last is None:
+        return nonce, 0
+    renewal = decode_meta_renew(last["data"])
+    if renewal is not None and renewal[0] == token_id and renewal[2] == sender:
+        deadline = load_held(spool_path).get(sender, {}).get(last["nonce"])
+        now = time.time() if now is None else now
+        if deadline is not None and deadline >= now + margin:
+            return last["nonce"], renewal[1]
+    return last["nonce"] + 1, 0
+
+
+class CoalescerStats:
+    def __init__(self):
+        self.received = 0
+        self.released = 0
+        self.merged = 0
+        self.conflicts = 0
+        self.seconds_merged = 0
+
+    def report(self):
+        return {
+            "received": self.received,
+            "released": self.released,
+            "merged": self.merged,
+            "conflicts": self.conflicts,
+            "seconds_merged": self.seconds_merged,
+        }
+
+
+class RenewalCoalescer:
+    """
+    Holds signed requests for `window` seconds and merges cumulative renewals.
+
+    - add(request, signature, now, tag): returns the tags to acknowledge at
+      once (a conflicting request that will never be sent); tags of a
+      superseded request travel with the request that replaced it
+    - due(now): releases [(request, signature, tags)] whose window is over
+    - flush(): releases everything, e.g. at the end of a finite input
+    - held(sender, nonce): the request waiting at that nonce, or None
+    - last_held(sender): the request waiting at the sender's highest nonce
+    - deadlines(): {sender: {nonce: deadline}} for everything held
+
+    `now` is any monotonic clock in seconds (time.monotonic() live, event
+    timestamps in a replay).
+    """
+
+    def __init__(self, window=60.0):
+        self.window = float(window)
+        # sender -> {nonce: [deadline, request, signature, tags]}
+        self._pending = {}
+        # (deadline, sender, nonce) for every held request, soonest first
+        self._deadlines = []
+        self._held = 0
+        self.stats = CoalescerStats()
+
+    def __len__(self):
+        return self._held
+
+    def held(self, sender, nonce):
+        entry = self._pending.get(sender, {}).get(nonce)
+        return None if entry is None else entry[1]
+
+    def last_held(self, sender):
+        """
+        The request held at the sender's highest nonce, or None.
+        """
+        entries = self._pending.get(sender)
+        return entries[max(entries)][1] if entries else None
+
+    def deadlines(self):
+        return {sender: {nonce: entry[0] for nonce, entry in entries.items()}
+                for sender, entries in self._pending.items()}
+
+    def add(self, request, signature, now, tag=None):
+        self.stats.received += 1
+        tags = [] if tag is None else [tag]
+        entries = self._pending.setdefault(request["from"], {})
+        entry = entries.get(request["nonce"])
+        if entry is None:
+            entries[request["nonce"]] = [now + self.window, request, signature, tags]
+            heapq.heappush(self._deadlines, (now + self.window, request["from"], request["nonce"]))
+            self._held += 1
+            return []
+
+        old, new = decode_meta_renew(entry[1]["data"]), decode_meta_renew(request["data"])
+        if (
+            old is not None and new is not None
+            and old[0] == new[0] and old[2] == new[2] == request["from"]
+            and new[1] >= old[1]
+            and request["to"] == entry[1]["to"] and request["value"] == entry[1]["value"]
+        ):
+            self.stats.merged += 1
+            self.stats.seconds_merged += old[1]
+            entry[1], entry[2] = request, signature
+            entry[3].extend(tags)
+            return []
+        self.stats.conflicts += 1
+        print(f"⚠️ Dropped {request['from']} nonce={request['nonce']}: conflicts with a held request")
+        return tags
+
+    def _release(self, sender, nonces):
+        entries = self._pending[sender]
+        released = []
+        for nonce in nonces:
+            _, request, signature, tags = entries.pop(nonce)
+            released.append((request, signature, tags))
+        if not entries:
+            del self._pending[sender]
+        self._held -= len(released)
+        self.stats.released += len(released)
+        return released
+
+    def _is_held(self, deadline, sender, nonce):
+        entry = self._pending.get(sender, {}).get(nonce)
+        return entry is not None and entry[0] == deadline
+
+    def due(self, now):
+        released = []
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, sender, nonce = heapq.heappop(self._deadlines)
+            if not self._is_held(deadline, sender, nonce):
+                continue
+            entries = self._pending[sender]
+            # Lower nonces of the same sender go first, even if they arrived later
+            released += self._release(sender, sorted(n for n in entries if n <= nonce))
+        return released
+
+    def flush(self):
+        released = []
+        for sender in list(self._pending):
+            released += self._release(sender, sorted(self._pending[sender]))
+        self._deadlines = []
+        return released
+
+    def next_deadline(self):
+        # Drop heap entries of requests already released with a higher nonce
+        while self._deadlines:
+            if self._is_held(*self._deadlines[0]):
+                return self._deadlines[0][0]
+            heapq.heappop(self._deadlines)
+        return None
+
+
+# ----------------- Workload replay -----------------
+
+DAY = 24 * 3600
+# Unsigned replay: the coalescer never looks at signatures
+REPLAY_SIGNATURE = b"\x5a" * 65
+
+
+def synthetic_clicks(members=1000, days=30, seed=1):
+    """
+    Sorted (timestamp, member, token_id, seconds, segment) renewal clicks:
+
+      - "single": 75% renew 30 days once a month
+      - "repeat": 20% do the same but click 2-4 times within ~20 s (double
+        clicks, retries after a slow confirmation)
+      - "automation": 5% are bots topping up one hour every hour
+    """
+    rng = random.Random(seed)
+    clicks = []
+    for member in range(members):
+        token_id = member + 1
+        kind = rng.random()
+        if kind < 0.95:
+            segment = "single" if kind < 0.75 else "repeat"
+            t = rng.uniform(0, 30 * DAY)
+            while t < days * DAY:
+                repeats = 1 if segment == "single" else rng.randint(2, 4)
+                for i in range(repeats):
+                    clicks.append((t + i * rng.uniform(1, 7), member, token_id, 30 * DAY, segment))
+                t += 30 * DAY
+        else:
+            t = rng.uniform(0, 3600)
+            while t < days * DAY:
+                clicks.append((t, member, token_id, 3600, "automation"))
+                t += 3600 + rng.uniform(-30, 30)
+    clicks.sort()
+    return clicks
+
+
+def _member_address(member):
+    return to_checksum_address((member + 1).to_bytes(20, "big"))
+
+
+def replay(members=1000, days=30, window=60, contract="0x" + "11" * 20, clicks=None):
+    """
+    Replays `clicks` (default synthetic_clicks(members, days)) with and
+    without coalescing and returns the report. Without coalescing every click
+    is its own request at the member's next nonce. With it, a click follows
+    the plan_renewal rule: it is signed cumulatively at the member's highest
+    held nonce if that holds a renewal of the same token, and at the next
+    free nonce otherwise. A released request counts as mined at once (the
+    member's nonce moves on).
+    """
+    clicks = synthetic_clicks(int(members), int(days)) if clicks is None else clicks
+    coalescer = RenewalCoalescer(window)
+    nonces = {}
+    coalesced_txs = 0
+    seconds_renewed = {"baseline": 0, "coalesced": 0}
+
+    def mine(released):
+        nonlocal coalesced_txs
+        for request, signature, _ in released:
+            nonces[request["from"]] = request["nonce"] + 1
+            coalesced_txs += 1
+            seconds_renewed["coalesced"] += decode_meta_renew(request["data"])[1]
+
+    start = time.perf_counter()
+    for timestamp, member, token_id, seconds, *_ in clicks:
+        mine(coalescer.due(timestamp))
+        sender = _member_address(member)
+        request = {"from": sender, "to": contract, "value": 0, "gas": 100000, "data": None}
+        seconds_renewed["baseline"] += seconds
+
+        # Cumulative signing: add onto the newest held renewal of the same token
+        nonce = nonces.get(sender, 0)
+        held = coalescer.last_held(sender)
+        if held is not None:
+            held_token, held_seconds, _ = decode_meta_renew(held["data"])
+            if held_token == token_id:
+                nonce, seconds = held["nonce"], seconds + held_seconds
+            else:
+                nonce = held["nonce"] + 1
+        request.update(nonce=nonce, data=encode_meta_renew(token_id, seconds, sender))
+        coalescer.add(request, REPLAY_SIGNATURE, timestamp)
+    mine(coalescer.flush())
+    elapsed = time.perf_counter() - start
+
+    assert seconds_renewed["baseline"] == seconds_renewed["coalesced"], seconds_renewed
+    baseline_txs = len(clicks)
+    return {
+        "window_s": coalescer.window,
+        "clicks": baseline_txs,
+        "baseline_txs": baseline_txs,
+        "coalesced_txs": coalesced_txs,
+        "txs_saved": baseline_txs - coalesced_txs,
+        "txs_saved_pct": 100.0 * (baseline_txs - coalesced_txs) / baseline_txs if baseline_txs else 0.0,
+        "replay_s": elapsed,
+        "coalescer": coalescer.stats.report(),
+    }
+
+
+def print_replay(report, label="all"):
+    print(
+        f"🔁 {label:<10} window={report['window_s']:>6.0f}s: {report['clicks']:,} click(s) -> "
+        f"{report['coalesced_txs']:,} transaction(s), {report['txs_saved']:,} saved "
+        f"({report['txs_saved_pct']:.1f}%)"
+    )
+
+
+def main(members=1000, days=30, windows="10,60,3600,21600", output_path=None):
+    """
+    Replays the synthetic workload once per coalescing window, for all
+    members and per segment, and prints the transactions saved.
+    """
+    clicks = synthetic_clicks(int(members), int(days))
+    segments = sorted({click[4] for click in clicks})
+    reports = []
+    for window in str(windows).split(","):
+        report = replay(window=float(window), clicks=clicks)
+        print_replay(report)
+        report["segments"] = {}
+        for segment in segments:
+            subset = [click for click in clicks if click[4] == segment]
+            report["segments"][segment] = replay(window=float(window), clicks=subset)
+            print_replay(report["segments"][segment], segment)
+        reports.append(report)
+    if output_path:
+        with open(output_path, "w") as f:
+            json.dump(reports, f, indent=2)
+    return reports
@@ -0,0 +1,79 @@
+"""
+Preparation stage for bulk gasless renewals: forwarder nonce prefetch.
+
+MinimalForwarder keeps one `_nonces[from]` counter per signer, and a request
+only verifies if it carries exactly that value. Reading getNonce(from) for
+every user before signing is one round-trip per user. NonceAllocator reads
+the nonces for a whole cohort of new users at once (batched eth_calls
+through rpc_client, up to MAX_BATCH_SIZE per HTTP request) and then hands
+out consecutive nonces locally, so a user with several queued renewals gets
+n, n+1, n+2, ... without further reads.
+
+prepare_renewals() applies this to the (user_key, token_id, seconds, nonce)
+rows that gassless_renew.bulk_sign feeds to its signing workers: rows are
+processed in cohorts, so the input is still streamed, and rows that already
+carry a nonce are passed through unchanged.
+"""
+
+from itertools import islice
+
+from scripts.forward_request import load_key
+from scripts.rpc_client import forwarder_nonces
+
+DEFAULT_COHORT_SIZE = 5000
+
+
+class NonceAllocator:
+    """
+    Hands out MinimalForwarder nonces per signer, reading each signer's
+    on-chain nonce once.
+    """
+
+    def __init__(self, client, forwarder_address, block="pending"):
+        self.client = client
+        self.forwarder_address = forwarder_address
+        # "pending" so requests already relayed but not yet mined are counted
+        self.block = block
+        self._next = {}
+        self.fetched = 0
+
+    def prefetch(self, addresses):
+        """
+        Reads getNonce for every address not seen before, in one batched call.
+        """
+        unknown = [address for address in dict.fromkeys(addresses) if address not in self._next]
+        if unknown:
+            self._next.update(forwarder_nonces(self.client, self.forwarder_address, unknown, self.block))
+            self.fetched += len(unknown)
+
+    def assign(self, address, nonce=None):
+        """
+        Returns the nonce to sign with. An explicit `nonce` is kept, and later
+        assignments for the same address continue after it.
+        """
+        if address not in self._next:
+            self.prefetch([address])
+        if nonce is None:
+            nonce = self._next[address]
+        self._next[address] = max(self._next[address], nonce + 1)
+        return nonce
+
+
+def prepare_renewals(rows, allocator, cohort_size=DEFAULT_COHORT_SIZE):
+    """
+    Yields (user_key, token_id, seconds, nonce) rows with missing nonces
+    (None) filled in from `allocator`, in input order. Nonces for the new
+    users of each cohort of `cohort_size` rows are prefetched together.
+    """
+    addresses = {}
+    rows = iter(rows)
+    while True:
+        cohort = list(islice(rows, cohort_size))
+        if not cohort:
+            return
+        for user_key, _token_id, _seconds, _nonce in cohort:
+            if user_key not in addresses:
+                addresses[user_key] = load_key(user_key).public_key.to_checksum_address()
+        allocator.prefetch(addresses[row[0]] for row in cohort if row[3] is None)
+        for user_key, token_id, seconds, nonce in cohort:
+            yield user_key, token_id, seconds, allocator.assign(addresses[user_key], nonce)
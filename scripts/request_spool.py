@@ -0,0 +1,355 @@
+"""
+Append-only spool of signed ForwardRequests.
+
+signed_request.json holds one pretty-printed request and is overwritten on
+every signing run; signed_requests.jsonl holds many but has to be re-parsed
+from the top after a relayer restart, with no record of what was already
+sent. A spool file is the replacement for both:
+
+  - an 8-byte magic header, then length-prefixed binary records:
+
+        u32 payload length | u32 crc32(payload) | payload
+        payload = from (20) | to (20) | value (32) | gas (8) | nonce (32)
+                  | signature (65) | data (rest)
+
+    a metaRenewMembership request is 285 bytes on disk, about half its
+    JSON Lines size, and decoding it is slicing instead of json + hex
+  - writers only ever append; a crash mid-append leaves a short last record,
+    which SpoolWriter truncates away when it reopens the file
+  - SpoolReader memory-maps the file and yields (offset, end, request,
+    signature), so resident memory does not grow with the spool size; in
+    follow mode it re-maps as the file grows
+  - progress lives next to the spool in `<spool>.ack` (SpoolCursor):
+    `acked` is the offset below which every record is settled (confirmed,
+    reverted or rejected) and `sent` is a lease the relayer extends before
+    it submits anything past it. After a crash, records in [acked, sent)
+    may or may not have been sent; relayer_daemon.relay_spool checks those
+    against the pending forwarder nonces before sending them again
+
+Usage:
+    brownie run scripts/gassless_renew.py bulk_sign renewals.csv signed_requests.spool
+    brownie run scripts/relayer_daemon.py main signed_requests.spool
+    python -m scripts.request_spool signed_requests.spool      # progress summary
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import zlib
+from collections import deque
+
+from eth_utils import to_checksum_address
+
+SPOOL_MAGIC = b"FWDSPL1\n"
+HEADER_SIZE = len(SPOOL_MAGIC)
+SPOOL_SUFFIX = ".spool"
+
+# payload length, crc32 of the payload
+RECORD_HEADER = struct.Struct(">II")
+# from, to, value, gas, nonce, signature; calldata follows
+RECORD_FIXED = struct.Struct(">20s20s32sQ32s65s")
+MAX_RECORD_SIZE = 1 << 20
+
+# Bytes of spool the relayer may submit per lease write (~1,000 renewals)
+SENT_LEASE_BYTES = 256 * 1024
+
+
+class SpoolCorruptError(Exception):
+    """
+    Raised for a complete record whose checksum or length does not match.
+    """
+
+
+def is_spool_path(path):
+    return str(path).endswith(SPOOL_SUFFIX)
+
+
+def encode_record(request, signature):
+    """
+    One spool record (header included) for a signed request.
+    """
+    payload = RECORD_FIXED.pack(
+        bytes.fromhex(request["from"][2:]),
+        bytes.fromhex(request["to"][2:]),
+        int(request["value"]).to_bytes(32, "big"),
+        int(request["gas"]),
+        int(request["nonce"]).to_bytes(32, "big"),
+        bytes(signature),
+    ) + bytes(request["data"])
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _scan(buffer, offset, size):
+    """
+    End offset of the complete record at `offset`, or None if it is cut short.
+    """
+    if offset + RECORD_HEADER.size > size:
+        return None
+    length, _ = RECORD_HEADER.unpack_from(buffer, offset)
+    if length < RECORD_FIXED.size or length > MAX_RECORD_SIZE:
+        raise SpoolCorruptError(f"bad record length {length} at offset {offset}")
+    end = offset + RECORD_HEADER.size + length
+    return end if end <= size else None
+
+
+class SpoolWriter:
+    """
+    Appends signed requests to a spool, creating it if needed.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.truncated = 0
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self._repair()
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(SPOOL_MAGIC)
+        self.appended = 0
+
+    def _repair(self):
+        """
+        Drops a record left half-written by a crashed writer.
+        """
+        with open(self.path, "r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                if buffer[:HEADER_SIZE] != SPOOL_MAGIC:
+                    raise SpoolCorruptError(f"{self.path} is not a request spool")
+                offset = HEADER_SIZE
+                while offset < size:
+                    end = _scan(buffer, offset, size)
+                    if end is None:
+                        break
+                    offset = end
+            if offset < size:
+                f.truncate(offset)
+                self.truncated = size - offset
+
+    def append(self, request, signature):
+        """
+        Appends one record and returns its offset.
+        """
+        return self.append_record(encode_record(request, signature))
+
+    def append_record(self, record):
+        offset = self._file.tell()
+        self._file.write(record)
+        self.appended += 1
+        return offset
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class SpoolReader:
+    """
+    Memory-mapped reader over a spool file.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, "rb")
+        self._map = None
+        self.size = 0
+        # 20 raw bytes -> checksummed address; senders repeat a lot
+        self._addresses = {}
+        self.remap()
+        if self.size < HEADER_SIZE or self._map[:HEADER_SIZE] != SPOOL_MAGIC:
+            self.close()
+            raise SpoolCorruptError(f"{self.path} is not a request spool")
+
+    def remap(self):
+        """
+        Maps the file again if it grew; returns True if there is new data.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        if size == self.size:
+            return False
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.size = size
+        return True
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _address(self, raw):
+        address = self._addresses.get(raw)
+        if address is None:
+            address = self._addresses[raw] = to_checksum_address(raw)
+        return address
+
+    def read(self, offset):
+        """
+        (end, request, signature) for the record at `offset`, or None if it is not complete yet.
+        """
+        end = _scan(self._map, offset, self.size)
+        if end is None:
+            return None
+        length, crc = RECORD_HEADER.unpack_from(self._map, offset)
+        start = offset + RECORD_HEADER.size
+        payload = self._map[start:end]
+        if zlib.crc32(payload) != crc:
+            raise SpoolCorruptError(f"checksum mismatch in record at offset {offset}")
+        sender, to, value, gas, nonce, signature = RECORD_FIXED.unpack_from(payload)
+        request = {
+            "from": self._address(sender),
+            "to": self._address(to),
+            "value": int.from_bytes(value, "big"),
+            "gas": gas,
+            "nonce": int.from_bytes(nonce, "big"),
+            "data": payload[RECORD_FIXED.size:],
+        }
+        return end, request, signature
+
+    def records(self, offset=HEADER_SIZE):
+        """
+        Yields (offset, end, request, signature) for the complete records from `offset` on.
+        """
+        while True:
+            record = self.read(offset)
+            if record is None:
+                return
+            end, request, signature = record
+            yield offset, end, request, signature
+            offset = end
+
+    def senders(self, start, stop):
+        """
+        Distinct `from` addresses of the records in [start, stop), in order.
+        """
+        seen = {}
+        for offset, _, request, _ in self.records(start):
+            if offset >= stop:
+                break
+            seen.setdefault(request["from"], None)
+        return list(seen)
+
+
+class SpoolCursor:
+    """
+    Relayer progress for one spool, persisted in `<spool>.ack` as JSON.
+    """
+
+    def __init__(self, spool_path):
+        self.path = f"{spool_path}.ack"
+        self.acked = HEADER_SIZE
+        self.sent = HEADER_SIZE
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            self.acked = int(state["acked"])
+            self.sent = max(int(state["sent"]), self.acked)
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"acked": self.acked, "sent": self.sent}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def lease(self, end, lease_bytes=SENT_LEASE_BYTES):
+        """
+        Makes sure the record ending at `end` is inside the persisted send
+        lease, extending it by `lease_bytes` if not. Returns True if it wrote.
+        """
+        if end <= self.sent:
+            return False
+        self.sent = end + lease_bytes
+        self.save()
+        return True
+
+
+class AckTracker:
+    """
+    Turns out-of-order acknowledgements into a contiguous `acked` offset.
+
+    Records are tracked in spool order; ack() can arrive in any order (the
+    relayer confirms receipts concurrently, across several keys), and
+    `acked` only moves past a record once everything before it is acked too.
+    """
+
+    def __init__(self, acked=HEADER_SIZE):
+        self.acked = acked
+        # [offset, end, done], in spool order
+        self._window = deque()
+        self._index = {}
+
+    def __len__(self):
+        return len(self._window)
+
+    def track(self, offset, end):
+        entry = [offset, end, False]
+        self._window.append(entry)
+        self._index[offset] = entry
+
+    def end(self, offset):
+        """
+        End offset of a tracked record that is not acknowledged yet.
+        """
+        return self._index[offset][1]
+
+    def ack(self, offset):
+        """
+        Marks the record at `offset` settled; returns True if `acked` moved.
+        """
+        self._index.pop(offset)[2] = True
+        moved = False
+        while self._window and self._window[0][2]:
+            self.acked = self._window.popleft()[1]
+            moved = True
+        return moved
+
+
+def status(path):
+    """
+    Record counts and progress for a spool and its ack file.
+    """
+    cursor = SpoolCursor(path)
+    total = acked = in_lease = 0
+    with SpoolReader(path) as reader:
+        for offset, _, _, _ in reader.records():
+            total += 1
+            if offset < cursor.acked:
+                acked += 1
+            elif offset < cursor.sent:
+                in_lease += 1
+        size = reader.size
+    return {"records": total, "acked": acked, "in_lease": in_lease, "pending": total - acked, "bytes": size}
+
+
+if __name__ == "__main__":
+    for spool_path in sys.argv[1:]:
+        summary = status(spool_path)
+        print(
+            f"📦 {spool_path}: {summary['records']:,} record(s), {summary['acked']:,} acked, "
+            f"{summary['pending']:,} pending ({summary['in_lease']:,} possibly sent), {summary['bytes']:,} bytes"
+        )
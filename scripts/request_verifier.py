@@ -0,0 +1,136 @@
+"""
+Off-chain pre-verification of signed ForwardRequests.
+
+MinimalForwarder.verify accepts a request when
+    _recover(_hashTypedData(req), signature) == req.from
+    and _nonces[req.from] == req.nonce
+The relayer otherwise only finds out about a bad signature or a stale nonce
+when execute reverts, after paying gas and an RPC round-trip. RequestVerifier
+runs the same checks locally: the digest and ecrecover mirror come from
+scripts/forward_request.py and nonces come from a cache of getNonce reads.
+
+Requests are checked in order. Each accepted request advances the cached nonce
+for its sender, matching what the contract will see once the earlier requests
+have been executed.
+
+Usage:
+    brownie run scripts/request_verifier.py benchmark 1000
+"""
+
+import time
+
+from eth_account import Account
+
+from scripts.forward_request import recover_signer, sign_request
+
+# Rejection reasons returned by RequestVerifier.verify
+BAD_SIGNATURE = "signature does not match request"
+NONCE_MISMATCH = "nonce mismatch"
+
+
+class RequestVerifier:
+    """
+    Mirrors MinimalForwarder.verify with a local nonce cache.
+
+    `get_nonce` is a callable address -> forwarder nonce (e.g. forwarder.getNonce).
+    It is only used for senders that are not already cached; callers that fetch
+    nonces themselves can use set_nonce instead and pass get_nonce=None.
+    """
+
+    def __init__(self, get_nonce=None):
+        self.get_nonce = get_nonce
+        self._nonces = {}
+        self.accepted = 0
+        self.rejected = 0
+
+    def needs_nonce(self, address):
+        return address not in self._nonces
+
+    def set_nonce(self, address, nonce):
+        self._nonces[address] = int(nonce)
+
+    def expected_nonce(self, address):
+        nonce = self._nonces.get(address)
+        if nonce is None:
+            if self.get_nonce is None:
+                raise KeyError(f"No cached forwarder nonce for {address}")
+            nonce = int(self.get_nonce(address))
+            self._nonces[address] = nonce
+        return nonce
+
+    def invalidate(self, address=None):
+        """
+        Drops one cached nonce (or all of them), e.g. after a relayed execute reverted.
+        """
+        if address is None:
+            self._nonces.clear()
+        else:
+            self._nonces.pop(address, None)
+
+    def verify(self, request, signature):
+        """
+        Returns None if MinimalForwarder.verify would accept the request
+        right now, otherwise the rejection reason. Does not change any state.
+        """
+        if recover_signer(request, signature) != request["from"]:
+            return BAD_SIGNATURE
+        if self.expected_nonce(request["from"]) != request["nonce"]:
+            return NONCE_MISMATCH
+        return None
+
+    def accept(self, request):
+        """
+        Records that `request` will be executed, so the sender's next request
+        is expected at nonce + 1.
+        """
+        self._nonces[request["from"]] = request["nonce"] + 1
+        self.accepted += 1
+
+    def check(self, request, signature):
+        """
+        verify() followed by accept() when the request is valid.
+        """
+        reason = self.verify(request, signature)
+        if reason is None:
+            self.accept(request)
+        else:
+            self.rejected += 1
+        return reason
+
+    def verify_batch(self, items):
+        """
+        Checks (request, signature) pairs in order and returns one reason
+        (or None) per pair. Several requests from the same sender are valid
+        only if their nonces are consecutive.
+        """
+        return [self.check(request, signature) for request, signature in items]
+
+
+def benchmark(count=1000):
+    """
+    Times verify_batch over `count` valid requests from 10 senders and prints
+    the cost per request in microseconds.
+    """
+    count = int(count)
+    users = [Account.create() for _ in range(10)]
+    items = []
+    for i in range(count):
+        user = users[i % len(users)]
+        request = {
+            "from": user.address,
+            "to": "0x" + "11" * 20,
+            "value": 0,
+            "gas": 100000,
+            "nonce": i // len(users),
+            "data": bytes(100),
+        }
+        items.append((request, sign_request(request, user.key.hex())))
+
+    verifier = RequestVerifier(get_nonce=lambda address: 0)
+    start = time.perf_counter()
+    results = verifier.verify_batch(items)
+    elapsed = time.perf_counter() - start
+
+    assert all(reason is None for reason in results)
+    print(f"Verified {count} request(s) in {elapsed * 1000:.1f}ms "
+          f"({elapsed / count * 1e6:.0f}µs per request)")
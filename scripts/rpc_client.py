@@ -0,0 +1,372 @@
+"""
+Shared JSON-RPC client for the scripts and the relayer.
+
+Every script used to open its own connection and issue reads one request at
+a time. Against a hosted provider such as Infura each of those is a full
+HTTPS round-trip, and bursts of them run into rate limits. This module gives
+all scripts one place to get a connection from:
+
+  - RpcClient keeps a pooled requests.Session per endpoint, so TCP/TLS
+    connections are kept alive and reused, and sends groups of reads
+    (nonces, owners, expiries, ...) as a single JSON-RPC batch
+  - HTTP 429 / 5xx responses, connection errors and provider rate-limit
+    errors (-32005 and friends) are retried with capped, jittered
+    exponential backoff, honouring Retry-After when the provider sends it.
+    Transaction sends are the exception: they are only retried when the
+    provider refused them outright (429 or a rate-limit error), see
+    retry_status_codes
+  - RpcStats counts calls, errors, retries and latency per method, plus the
+    number of HTTP round-trips, so a script can print what it cost
+
+rpc_web3.web3_for / async_web3_for wrap the same stats and retry policy in a
+Web3 / AsyncWeb3 provider for code that needs the full web3 API. They live in
+a separate module so importing this one does not pull in web3 (about a
+second of startup on its own).
+
+Usage:
+    from scripts.rpc_client import get_client
+    client = get_client()                 # RPC_URL, default http://127.0.0.1:8545
+    nonces = forwarder_nonces(client, forwarder_address, addresses)
+    client.stats.print_report()
+"""
+
+import os
+import json
+import time
+import random
+import itertools
+
+import requests
+from requests.adapters import HTTPAdapter
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+
+from scripts.forward_request import encode_get_nonce
+
+DEFAULT_RPC_URL = "http://127.0.0.1:8545"
+
+# Provider-specific "slow down" errors returned inside a JSON-RPC response:
+# Infura -32005 (limit exceeded), others -32029 / -32090
+RATE_LIMIT_CODES = (-32005, -32029, -32090)
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# After a 5xx, a timeout or a dropped connection the node may already have
+# accepted a transaction; sending it again fails with "already known" or
+# "nonce too low" and makes a sent transaction look failed
+NON_IDEMPOTENT_METHODS = ("eth_sendRawTransaction", "eth_sendTransaction")
+REFUSED_STATUS_CODES = (429,)
+# Infura and most providers reject batches above a few hundred entries
+MAX_BATCH_SIZE = 100
+
+OWNER_OF_SELECTOR = keccak(text="ownerOf(uint256)")[:4]
+VALID_UNTIL_SELECTOR = keccak(text="validUntil(uint256)")[:4]
+HAS_ROLE_SELECTOR = keccak(text="hasRole(bytes32,address)")[:4]
+
+
+class RpcError(Exception):
+    """
+    A JSON-RPC error response (including reverted eth_calls).
+    """
+
+    def __init__(self, method, code, message, data=None):
+        super().__init__(f"{method}: {message} (code {code})")
+        self.method = method
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class _Retry(Exception):
+    def __init__(self, reason, retry_after=None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def _retry_after(headers):
+    value = (headers or {}).get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_rate_limited(response):
+    entries = response if isinstance(response, list) else [response]
+    return any(
+        isinstance(entry, dict) and (entry.get("error") or {}).get("code") in RATE_LIMIT_CODES
+        for entry in entries
+    )
+
+
+def retry_status_codes(methods):
+    """
+    HTTP statuses after which a request carrying `methods` may be sent again.
+    """
+    if any(method in NON_IDEMPOTENT_METHODS for method in methods):
+        return REFUSED_STATUS_CODES
+    return RETRY_STATUS_CODES
+
+
+def backoff_delay(attempt, base, cap, retry_after=None):
+    """
+    Full-jitter exponential backoff; a provider's Retry-After wins if larger.
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class RpcStats:
+    """
+    Per-method call counts and latencies, plus HTTP round-trips.
+
+    A call sent as part of a batch is charged the latency of the whole batch
+    round-trip, which is what the caller actually waited.
+    """
+
+    def __init__(self):
+        self.round_trips = 0
+        self.methods = {}
+
+    def _method(self, method):
+        entry = self.methods.get(method)
+        if entry is None:
+            entry = self.methods[method] = {"calls": 0, "errors": 0, "retries": 0, "total_s": 0.0, "max_s": 0.0}
+        return entry
+
+    def record(self, methods, elapsed, errors=()):
+        self.round_trips += 1
+        for method in methods:
+            entry = self._method(method)
+            entry["calls"] += 1
+            entry["total_s"] += elapsed
+            entry["max_s"] = max(entry["max_s"], elapsed)
+        for method in errors:
+            self._method(method)["errors"] += 1
+
+    def record_retry(self, methods):
+        for method in set(methods):
+            self._method(method)["retries"] += 1
+
+    def report(self):
+        return {
+            "round_trips": self.round_trips,
+            "calls": sum(entry["calls"] for entry in self.methods.values()),
+            "methods": {
+                method: {
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "retries": entry["retries"],
+                    "mean_ms": entry["total_s"] / entry["calls"] * 1000 if entry["calls"] else 0.0,
+                    "max_ms": entry["max_s"] * 1000,
+                }
+                for method, entry in sorted(self.methods.items())
+            },
+        }
+
+    def print_report(self):
+        report = self.report()
+        print(f"\n📡 RPC: {report['calls']} call(s) in {report['round_trips']} round-trip(s)")
+        for method, entry in report["methods"].items():
+            print(
+                f"   {method:<28} calls={entry['calls']:<6} errors={entry['errors']:<4} "
+                f"retries={entry['retries']:<4} mean={entry['mean_ms']:.1f}ms max={entry['max_ms']:.1f}ms"
+            )
+
+
+class RpcClient:
+    """
+    Minimal synchronous JSON-RPC client with keep-alive, batching and retries.
+    """
+
+    def __init__(
+        self,
+        url=None,
+        timeout=30,
+        max_retries=5,
+        backoff=0.25,
+        max_backoff=8.0,
+        pool_size=16,
+        max_batch_size=MAX_BATCH_SIZE,
+        stats=None,
+    ):
+        self.url = url or os.getenv("RPC_URL", DEFAULT_RPC_URL)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_batch_size = max_batch_size
+        self.stats = stats or RpcStats()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        self._ids = itertools.count(1)
+
+    def _post(self, payload, methods):
+        body = json.dumps(payload)
+        retry_codes = retry_status_codes(methods)
+        idempotent = retry_codes is RETRY_STATUS_CODES
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.url, data=body, timeout=self.timeout)
+                if response.status_code in retry_codes:
+                    raise _Retry(f"HTTP {response.status_code}", _retry_after(response.headers))
+                response.raise_for_status()
+                result = response.json()
+                if _is_rate_limited(result):
+                    raise _Retry("rate limited")
+                return result, time.perf_counter() - start
+            except (_Retry, requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries or not (idempotent or isinstance(e, _Retry)):
+                    self.stats.record(methods, time.perf_counter() - start, errors=methods)
+                    raise
+                self.stats.record_retry(methods)
+                time.sleep(backoff_delay(attempt, self.backoff, self.max_backoff, getattr(e, "retry_after", None)))
+
+    def call(self, method, params=()):
+        """
+        Sends one request and returns its result; raises RpcError on an error response.
+        """
+        response, elapsed = self._post(
+            {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)},
+            [method],
+        )
+        error = response.get("error")
+        self.stats.record([method], elapsed, errors=[method] if error else ())
+        if error:
+            raise RpcError(method, error.get("code"), error.get("message"), error.get("data"))
+        return response["result"]
+
+    def batch(self, calls, raise_errors=True):
+        """
+        Sends [(method, params), ...] as JSON-RPC batches of up to
+        max_batch_size entries and returns the results in order. With
+        raise_errors=False a failed entry comes back as an RpcError instead.
+        """
+        calls = [(method, list(params)) for method, params in calls]
+        results = []
+        for offset in range(0, len(calls), self.max_batch_size):
+            chunk = calls[offset:offset + self.max_batch_size]
+            ids = [next(self._ids) for _ in chunk]
+            methods = [method for method, _ in chunk]
+            payload = [
+                {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+                for request_id, (method, params) in zip(ids, chunk)
+            ]
+            response, elapsed = self._post(payload, methods)
+            if isinstance(response, dict):
+                # Some nodes answer a rejected batch with a single error object
+                error = response.get("error") or {}
+                self.stats.record(methods, elapsed, errors=methods)
+                raise RpcError("batch", error.get("code"), error.get("message", "batch rejected"))
+
+            by_id = {entry.get("id"): entry for entry in response}
+            failed = []
+            for request_id, method in zip(ids, methods):
+                entry = by_id.get(request_id, {"error": {"code": None, "message": "missing from batch response"}})
+                if "error" in entry:
+                    failed.append(method)
+                    error = entry["error"]
+                    results.append(RpcError(method, error.get("code"), error.get("message"), error.get("data")))
+                else:
+                    results.append(entry["result"])
+            self.stats.record(methods, elapsed, errors=failed)
+
+        if raise_errors:
+            for result in results:
+                if isinstance(result, RpcError):
+                    raise result
+        return results
+
+    def block_number(self):
+        return int(self.call("eth_blockNumber"), 16)
+
+    def eth_call(self, to, data, block="latest"):
+        return bytes.fromhex(self.call("eth_call", [{"to": to, "data": "0x" + data.hex()}, _block_param(block)])[2:])
+
+    def call_many(self, calls, block="latest", raise_errors=False):
+        """
+        Batched eth_call for [(to, data), ...] at one block. Returns bytes per
+        call, or an RpcError for calls that reverted (unless raise_errors).
+        """
+        block = _block_param(block)
+        results = self.batch(
+            [("eth_call", [{"to": to, "data": "0x" + data.hex()}, block]) for to, data in calls],
+            raise_errors=raise_errors,
+        )
+        return [result if isinstance(result, RpcError) else bytes.fromhex(result[2:]) for result in results]
+
+    def close(self):
+        self.session.close()
+
+
+def _block_param(block):
+    return hex(block) if isinstance(block, int) else block
+
+
+def forwarder_nonces(client, forwarder_address, addresses, block="latest"):
+    """
+    {address: MinimalForwarder.getNonce(address)} in one batch.
+    """
+    addresses = list(addresses)
+    results = client.call_many(
+        [(forwarder_address, encode_get_nonce(address)) for address in addresses], block, raise_errors=True
+    )
+    return {address: int.from_bytes(result, "big") for address, result in zip(addresses, results)}
+
+
+def token_owners(client, contract_address, token_ids, block="latest"):
+    """
+    {tokenId: owner} in one batch; None for ids whose ownerOf reverts (not minted).
+    """
+    token_ids = list(token_ids)
+    results = client.call_many(
+        [(contract_address, OWNER_OF_SELECTOR + int(token_id).to_bytes(32, "big")) for token_id in token_ids], block
+    )
+    return {
+        token_id: None if isinstance(result, RpcError) else to_checksum_address(decode(["address"], result)[0])
+        for token_id, result in zip(token_ids, results)
+    }
+
+
+def token_expiries(client, contract_address, token_ids, block="latest"):
+    """
+    {tokenId: validUntil} in one batch.
+    """
+    token_ids = list(token_ids)
+    results = client.call_many(
+        [(contract_address, VALID_UNTIL_SELECTOR + int(token_id).to_bytes(32, "big")) for token_id in token_ids],
+        block,
+        raise_errors=True,
+    )
+    return {token_id: int.from_bytes(result, "big") for token_id, result in zip(token_ids, results)}
+
+
+def role_holders(client, contract_address, role, addresses, block="latest"):
+    """
+    {address: hasRole(role, address)} in one batch; `role` is the bytes32 role id.
+    """
+    addresses = list(addresses)
+    role = bytes.fromhex(role[2:]) if isinstance(role, str) else bytes(role)
+    results = client.call_many(
+        [(contract_address, HAS_ROLE_SELECTOR + role + bytes(12) + bytes.fromhex(address[2:])) for address in addresses],
+        block,
+        raise_errors=True,
+    )
+    return {address: int.from_bytes(result, "big") == 1 for address, result in zip(addresses, results)}
+
+
+_clients = {}
+
+
+def get_client(url=None):
+    """
+    Returns the process-wide RpcClient for `url` (default: RPC_URL), creating it once.
+    """
+    url = url or os.getenv("RPC_URL", DEFAULT_RPC_URL)
+    client = _clients.get(url)
+    if client is None:
+        client = _clients[url] = RpcClient(url)
+    return client
@@ -0,0 +1,125 @@
+"""
+web3 providers that share rpc_client's stats and retry policy.
+
+InstrumentedHTTPProvider / InstrumentedAsyncHTTPProvider record every request
+into an RpcStats and retry HTTP 429 / 5xx and provider rate-limit errors with
+the same backoff as RpcClient (web3's own retry configuration is switched
+off, so retries are counted once). Connection errors and timeouts are
+retried too, but only for idempotent methods. Like RpcClient,
+eth_sendRawTransaction and eth_sendTransaction are only retried after a 429
+or a rate-limit error: after a 5xx, a dropped connection or a timeout the
+node may already have the transaction.
+"""
+
+import time
+import asyncio
+
+import aiohttp
+import requests
+from web3 import AsyncWeb3, Web3
+from web3.providers import AsyncHTTPProvider, HTTPProvider
+
+from scripts.rpc_client import (
+    NON_IDEMPOTENT_METHODS,
+    _is_rate_limited,
+    backoff_delay,
+    get_client,
+    retry_status_codes,
+)
+
+CONNECTION_ERRORS = (requests.ConnectionError, requests.Timeout)
+ASYNC_CONNECTION_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
+
+def _http_status(error):
+    # requests.HTTPError carries .response.status_code, aiohttp.ClientResponseError .status
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if status is not None else getattr(error, "status", None)
+
+
+def _should_retry(error, method, connection_errors):
+    if _http_status(error) in retry_status_codes([method]):
+        return True
+    return isinstance(error, connection_errors) and method not in NON_IDEMPOTENT_METHODS
+
+
+class InstrumentedHTTPProvider(HTTPProvider):
+    """
+    web3 HTTPProvider that records into an RpcStats and retries rate limits
+    (and dropped connections, for idempotent methods).
+    """
+
+    def __init__(self, endpoint_uri, stats, max_retries=5, backoff=0.25, max_backoff=8.0, **kwargs):
+        # One retry policy (ours), so retries are counted once
+        kwargs.setdefault("exception_retry_configuration", None)
+        super().__init__(endpoint_uri, **kwargs)
+        self.stats = stats
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def make_request(self, method, params):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = super().make_request(method, params)
+            except Exception as e:
+                if not _should_retry(e, method, CONNECTION_ERRORS) or attempt == self.max_retries:
+                    self.stats.record([method], time.perf_counter() - start, errors=[method])
+                    raise
+            else:
+                if not _is_rate_limited(response) or attempt == self.max_retries:
+                    self.stats.record([method], time.perf_counter() - start,
+                                      errors=[method] if "error" in response else ())
+                    return response
+            self.stats.record_retry([method])
+            time.sleep(backoff_delay(attempt, self.backoff, self.max_backoff))
+
+
+class InstrumentedAsyncHTTPProvider(AsyncHTTPProvider):
+    """
+    Async counterpart of InstrumentedHTTPProvider, used by the relayer daemon.
+    """
+
+    def __init__(self, endpoint_uri, stats, max_retries=5, backoff=0.25, max_backoff=8.0, **kwargs):
+        kwargs.setdefault("exception_retry_configuration", None)
+        super().__init__(endpoint_uri, **kwargs)
+        self.stats = stats
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    async def make_request(self, method, params):
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = await super().make_request(method, params)
+            except Exception as e:
+                if not _should_retry(e, method, ASYNC_CONNECTION_ERRORS) or attempt == self.max_retries:
+                    self.stats.record([method], time.perf_counter() - start, errors=[method])
+                    raise
+            else:
+                if not _is_rate_limited(response) or attempt == self.max_retries:
+                    self.stats.record([method], time.perf_counter() - start,
+                                      errors=[method] if "error" in response else ())
+                    return response
+            self.stats.record_retry([method])
+            await asyncio.sleep(backoff_delay(attempt, self.backoff, self.max_backoff))
+
+
+def web3_for(url=None):
+    """
+    Web3 sharing get_client(url)'s pooled session and stats.
+    """
+    client = get_client(url)
+    return Web3(InstrumentedHTTPProvider(client.url, client.stats, session=client.session))
+
+
+def async_web3_for(url=None):
+    """
+    AsyncWeb3 recording into get_client(url)'s stats. web3 keeps its own
+    aiohttp session per event loop, so connections are reused there too.
+    """
+    client = get_client(url)
+    return AsyncWeb3(InstrumentedAsyncHTTPProvider(client.url, client.stats))
@@ -13,3 +13,25 @@ def main():
     print("✅ Membership renewed.")
 # ⬇️ Print the event emitted
     print("Events:", tx.events)
+
+def batch(first_token_id=1, count=10):
+    """
+    Renews `count` consecutive token IDs (all owned by the deployer) with one
+    batchRenewMembership call.
+
+    Usage:
+        brownie run scripts/test_renew.py batch 1 50 --network sepolia
+    """
+    deployer = accounts.load("myDeployerAccount")
+    contract = NFTMembership.at("0xAaf086EC89D311f3fcAB1B17A735d4c8D746DFcF")
+
+    first_token_id, count = int(first_token_id), int(count)
+    token_ids = list(range(first_token_id, first_token_id + count))
+    durations = [30 * 24 * 60 * 60] * count  # 30 days in seconds
+
+    price = contract.membershipPrice()
+    tx = contract.batchRenewMembership(token_ids, durations, {"from": deployer, "value": price * count})
+    tx.wait(1)
+
+    print(f"✅ {count} memberships renewed ({len(tx.events['MembershipRenewed'])} events).")
+    print(f"Gas used: {tx.gas_used:,} ({tx.gas_used / count:,.0f} per token)")
@@ -0,0 +1,104 @@
+import pytest
+from brownie import MinimalForwarder, NFTMembership, accounts, reverts
+
+
+@pytest.fixture
+def membership_contract():
+    forwarder = MinimalForwarder.deploy({'from': accounts[0]})
+    yield NFTMembership.deploy(
+        "MembershipPass",
+        "MBR",
+        10**16,  # example price: 0.01 ETH
+        forwarder,
+        {'from': accounts[0]}
+    )
+
+
+def test_batch_mint_membership(membership_contract, accounts):
+    recipients = [accounts[1], accounts[2], accounts[3]]
+    tx = membership_contract.batchMintMembership(
+        recipients,
+        [3600, 7200, 10800],
+        {'from': accounts[0], 'value': 3 * 10**16}
+    )
+    timestamp = tx.timestamp
+
+    assert len(tx.events["Transfer"]) == 3
+    for token_id, (recipient, duration) in enumerate(zip(recipients, [3600, 7200, 10800]), start=1):
+        assert membership_contract.ownerOf(token_id) == recipient
+        assert membership_contract.validUntil(token_id) == timestamp + duration
+
+    # Single mints continue from the batch's last id
+    membership_contract.mintMembership(accounts[4], 3600, {'from': accounts[4], 'value': 10**16})
+    assert membership_contract.ownerOf(4) == accounts[4]
+
+
+def test_batch_mint_checks_total_payment(membership_contract, accounts):
+    with reverts("Insufficient payment"):
+        membership_contract.batchMintMembership(
+            [accounts[1], accounts[2]],
+            [3600, 3600],
+            {'from': accounts[0], 'value': 10**16}
+        )
+    with reverts("Length mismatch"):
+        membership_contract.batchMintMembership(
+            [accounts[1], accounts[2]],
+            [3600],
+            {'from': accounts[0], 'value': 2 * 10**16}
+        )
+
+
+def test_batch_renew_membership(membership_contract, accounts):
+    membership_contract.batchMintMembership(
+        [accounts[1], accounts[1]],
+        [3600, 3600],
+        {'from': accounts[0], 'value': 2 * 10**16}
+    )
+    expiries = [membership_contract.validUntil(1), membership_contract.validUntil(2)]
+
+    tx = membership_contract.batchRenewMembership(
+        [1, 2],
+        [60, 120],
+        {'from': accounts[1], 'value': 2 * 10**16}
+    )
+
+    events = tx.events["MembershipRenewed"]
+    assert [(e["tokenId"], e["newExpiry"]) for e in events] == [
+        (1, expiries[0] + 60),
+        (2, expiries[1] + 120),
+    ]
+    assert membership_contract.validUntil(2) == expiries[1] + 120
+
+
+def test_batch_renew_requires_ownership(membership_contract, accounts):
+    membership_contract.batchMintMembership(
+        [accounts[1], accounts[2]],
+        [3600, 3600],
+        {'from': accounts[0], 'value': 2 * 10**16}
+    )
+    with reverts("Not token owner"):
+        membership_contract.batchRenewMembership(
+            [1, 2],
+            [60, 60],
+            {'from': accounts[1], 'value': 2 * 10**16}
+        )
+
+
+def test_packed_expiries_do_not_overwrite_neighbours(membership_contract, accounts):
+    # Tokens 1-3 share a storage slot with token 0's (unused) field; 4-5 start the next one
+    durations = [100, 200, 300, 400, 500]
+    tx = membership_contract.batchMintMembership(
+        [accounts[1]] * 5,
+        durations,
+        {'from': accounts[0], 'value': 5 * 10**16}
+    )
+    expiries = [tx.timestamp + duration for duration in durations]
+
+    membership_contract.renewMembership(3, 1000, {'from': accounts[1], 'value': 10**16})
+    expiries[2] += 1000
+
+    assert [membership_contract.validUntil(token_id) for token_id in range(1, 6)] == expiries
+    assert membership_contract.validUntil(6) == 0
+
+    with reverts("Expiry too large"):
+        membership_contract.mintMembership(accounts[1], 2**64, {'from': accounts[1], 'value': 10**16})
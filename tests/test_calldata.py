@@ -0,0 +1,105 @@
+import re
+from pathlib import Path
+
+import pytest
+from eth_abi import encode
+
+from scripts.calldata import COMPACT_CONTRACTS, CalldataBuilder, load_compact_abi
+
+CONTRACTS_DIR = Path(__file__).resolve().parent.parent / "contracts"
+
+ABI = [
+    {
+        "type": "function",
+        "name": "metaRenewMembership",
+        "inputs": [
+            {"name": "tokenId", "type": "uint256"},
+            {"name": "additionalSeconds", "type": "uint256"},
+            {"name": "realUser", "type": "address"},
+        ],
+        "outputs": [],
+        "stateMutability": "nonpayable",
+    },
+    {
+        "type": "function",
+        "name": "batchRenewMembership",
+        "inputs": [
+            {"name": "tokenIds", "type": "uint256[]"},
+            {"name": "additionalSeconds", "type": "uint256[]"},
+        ],
+        "outputs": [],
+        "stateMutability": "payable",
+    },
+    {"type": "event", "name": "MembershipRenewed", "inputs": [], "anonymous": False},
+]
+
+USER = "0x816ca99BE0ba877bD780332B446D5ABC30285a31"
+
+
+def test_selector_matches_hand_built_calldata():
+    builder = CalldataBuilder(ABI)
+    assert builder.selector("metaRenewMembership").hex() == "48ce240c"
+
+    hand_built = bytes.fromhex(
+        "48ce240c"
+        "0000000000000000000000000000000000000000000000000000000000000001"
+        "0000000000000000000000000000000000000000000000000000000000278d00"
+        "000000000000000000000000816ca99be0ba877bd780332b446d5abc30285a31"
+    )
+    assert builder.encode("metaRenewMembership", 1, 30 * 24 * 3600, USER) == hand_built
+
+
+def test_static_and_dynamic_encoding_match_eth_abi():
+    builder = CalldataBuilder(ABI)
+    rows = [(token_id, token_id * 60, USER) for token_id in range(1, 50)]
+    expected = [
+        builder.selector("metaRenewMembership") + encode(["uint256", "uint256", "address"], list(row))
+        for row in rows
+    ]
+    assert builder.meta_renewals(rows) == expected
+
+    assert builder.encode("batchRenewMembership", [1, 2], [60, 120]) == (
+        builder.selector("batchRenewMembership") + encode(["uint256[]", "uint256[]"], [[1, 2], [60, 120]])
+    )
+
+
+def test_static_encoding_rejects_bad_arguments():
+    builder = CalldataBuilder(ABI)
+    with pytest.raises(OverflowError):
+        builder.encode("metaRenewMembership", -1, 60, USER)
+    with pytest.raises(ValueError):
+        builder.encode("metaRenewMembership", 1, 60, "0x1234")
+    with pytest.raises(TypeError):
+        builder.encode("metaRenewMembership", 1, 60)
+
+
+def test_overloaded_functions_need_a_signature():
+    transfer = {"type": "function", "name": "safeTransferFrom", "outputs": [], "stateMutability": "nonpayable"}
+    builder = CalldataBuilder(ABI + [
+        dict(transfer, inputs=[{"name": n, "type": t} for n, t in (("from", "address"), ("to", "address"), ("tokenId", "uint256"))]),
+        dict(transfer, inputs=[
+            {"name": n, "type": t} for n, t in (("from", "address"), ("to", "address"), ("tokenId", "uint256"), ("data", "bytes"))
+        ]),
+    ])
+
+    with pytest.raises(ValueError, match="overloaded"):
+        builder.encode("safeTransferFrom", USER, USER, 1)
+    assert builder.selector("safeTransferFrom(address,address,uint256)").hex() == "42842e0e"
+    assert builder.selector("safeTransferFrom(address,address,uint256,bytes)").hex() == "b88d4fde"
+    assert builder.encode("safeTransferFrom(address,address,uint256,bytes)", USER, USER, 1, b"\x01") == (
+        bytes.fromhex("b88d4fde") + encode(["address", "address", "uint256", "bytes"], [USER, USER, 1, b"\x01"])
+    )
+    # Names that are not overloaded still work, by name or by signature
+    assert builder.selector("metaRenewMembership(uint256,uint256,address)") == builder.selector("metaRenewMembership")
+
+
+@pytest.mark.parametrize("name", COMPACT_CONTRACTS)
+def test_compact_abis_declare_every_function_and_event_in_the_source(name):
+    # Cheap drift check that needs no compiler: names only, and only what the
+    # contract itself declares (test_compact_abi.py compares full ABIs)
+    source = (CONTRACTS_DIR / f"{name}.sol").read_text()
+    declared = set(re.findall(r"\bevent\s+(\w+)\s*\(", source))
+    for match in re.finditer(r"\bfunction\s+(\w+)\s*\(([^{;]*)", source):
+        if re.search(r"\b(public|external)\b", match.group(2)):
+            declared.add(match.group(1))
+    assert declared <= {entry["name"] for entry in load_compact_abi(name)}
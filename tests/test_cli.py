@@ -0,0 +1,67 @@
+from eth_account import Account
+from eth_utils import keccak
+
+from scripts.calldata import CalldataBuilder, compact_abi, load_compact_abi
+from scripts.cli import main, sign_legacy_transaction
+from scripts.forward_request import EXECUTE_BATCH_SELECTOR, EXECUTE_SELECTOR, load_key
+
+PRIVATE_KEY = "0x" + "11" * 32
+
+
+def test_legacy_transaction_matches_eth_account():
+    tx = {
+        "nonce": 7,
+        "gasPrice": 2 * 10**9,
+        "gas": 120000,
+        "to": "0x2222222222222222222222222222222222222222",
+        "value": 10**16,
+        "data": bytes.fromhex("48ce240c" + "00" * 96),
+        "chainId": 11155111,
+    }
+    assert sign_legacy_transaction(load_key(PRIVATE_KEY), tx) == bytes(
+        Account.sign_transaction(tx, PRIVATE_KEY).raw_transaction
+    )
+
+
+def test_compact_abis_match_contract_selectors():
+    forwarder = CalldataBuilder(load_compact_abi("MinimalForwarder"))
+    assert forwarder.selector("execute") == EXECUTE_SELECTOR
+    assert forwarder.selector("executeBatch") == EXECUTE_BATCH_SELECTOR
+
+    membership = CalldataBuilder(load_compact_abi("NFTMembership"))
+    assert membership.selector("metaRenewMembership").hex() == "48ce240c"
+    # Both ERC721 overloads are in the extracted ABI
+    assert membership.selector("safeTransferFrom(address,address,uint256)").hex() == "42842e0e"
+    assert membership.selector("safeTransferFrom(address,address,uint256,bytes)").hex() == "b88d4fde"
+
+    full = [{
+        "type": "function",
+        "name": "verify",
+        "inputs": [
+            {"name": "req", "type": "tuple", "components": [{"name": "from", "type": "address"}, {"name": "data", "type": "bytes"}]},
+            {"name": "signature", "type": "bytes"},
+        ],
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+    }, {"type": "constructor", "inputs": []}]
+    assert compact_abi(full) == [{
+        "type": "function",
+        "name": "verify",
+        "inputs": [{"name": "req", "type": "(address,bytes)"}, {"name": "signature", "type": "bytes"}],
+        "outputs": [{"name": "", "type": "bool"}],
+        "stateMutability": "view",
+    }]
+
+
+def test_dry_run_prints_calldata_without_rpc(monkeypatch, capsys):
+    monkeypatch.setenv("PRIVATE_KEY", PRIVATE_KEY)
+    monkeypatch.setenv("MEMBERSHIP_ADDRESS", "0x2222222222222222222222222222222222222222")
+    account = "0xD56521A2bc066ACFAf2cB398D38Be0C560b6abfD"
+
+    main(["--dry-run", "grant", account])
+
+    out = capsys.readouterr().out
+    membership = CalldataBuilder(load_compact_abi("NFTMembership"))
+    expected = membership.encode("grantRole", keccak(text="ADMIN_ROLE"), account)
+    assert f"data=0x{expected.hex()}" in out
+    assert f"from={Account.from_key(PRIVATE_KEY).address}" in out
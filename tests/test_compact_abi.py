@@ -0,0 +1,11 @@
+import pytest
+from brownie import MinimalForwarder, NFTMembership
+
+from scripts.calldata import compact_abi, load_compact_abi
+
+
+@pytest.mark.parametrize("contract", [NFTMembership, MinimalForwarder], ids=lambda contract: contract._name)
+def test_compact_abi_matches_compiled_contract(contract):
+    # abi/*.json is what cli.py and the signing scripts encode against; it
+    # must be regenerated (calldata.extract_abis) whenever a contract changes
+    assert load_compact_abi(contract._name) == compact_abi(contract.abi)
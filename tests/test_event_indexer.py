@@ -0,0 +1,67 @@
+import pytest
+from brownie import MinimalForwarder, NFTMembership, accounts
+
+from scripts.event_indexer import EventIndexer
+
+
+@pytest.fixture
+def membership_contract():
+    forwarder = MinimalForwarder.deploy({'from': accounts[0]})
+    yield NFTMembership.deploy(
+        "MembershipPass",
+        "MBR",
+        10**16,
+        forwarder,
+        {'from': accounts[0]}
+    )
+
+
+def test_indexer_resumes_from_checkpoint(membership_contract, web3, tmp_path):
+    membership_contract.mintMembership(accounts[1], 3600, {'from': accounts[1], 'value': 10**16})
+    start_block = web3.eth.block_number
+
+    first = membership_contract.renewMembership(1, 60, {'from': accounts[1], 'value': 10**16})
+    second = membership_contract.renewMembership(1, 60, {'from': accounts[1], 'value': 10**16})
+
+    db_path = str(tmp_path / "events.db")
+    indexer = EventIndexer(web3, membership_contract.address, db_path=db_path, start_block=start_block, chunk_size=1)
+    assert indexer.sync() == 2
+    assert [row[3] for row in indexer.renewals()] == [
+        first.events["MembershipRenewed"]["newExpiry"],
+        second.events["MembershipRenewed"]["newExpiry"],
+    ]
+    indexer.close()
+
+    third = membership_contract.renewMembership(1, 60, {'from': accounts[1], 'value': 10**16})
+
+    # A new indexer on the same file only scans blocks after the checkpoint
+    indexer = EventIndexer(web3, membership_contract.address, db_path=db_path, start_block=start_block)
+    assert indexer.last_indexed_block() == third.block_number - 1
+    assert indexer.sync() == 1
+    block, tx_hash, token_id, new_expiry = indexer.renewals()[-1]
+    assert (block, tx_hash, token_id, new_expiry) == (
+        third.block_number, third.txid, 1, third.events["MembershipRenewed"]["newExpiry"]
+    )
+    indexer.close()
+
+
+def test_contracts_sharing_a_database_stay_separate(membership_contract, web3, tmp_path):
+    other = NFTMembership.deploy("OtherPass", "OTH", 10**16, MinimalForwarder.deploy({'from': accounts[0]}), {'from': accounts[0]})
+    start_block = web3.eth.block_number
+    membership_contract.mintMembership(accounts[1], 3600, {'from': accounts[1], 'value': 10**16})
+    other.mintMembership(accounts[2], 3600, {'from': accounts[2], 'value': 10**16})
+    renewed = membership_contract.renewMembership(1, 60, {'from': accounts[1], 'value': 10**16})
+    other.renewMembership(1, 120, {'from': accounts[2], 'value': 10**16})
+    other.renewMembership(1, 120, {'from': accounts[2], 'value': 10**16})
+
+    db_path = str(tmp_path / "events.db")
+    for contract in (membership_contract, other):
+        indexer = EventIndexer(web3, contract.address, db_path=db_path, start_block=start_block)
+        indexer.sync()
+        indexer.close()
+
+    indexer = EventIndexer(web3, membership_contract.address, db_path=db_path)
+    assert [row[1] for row in indexer.renewals()] == [renewed.txid]
+    indexer.close()
+    assert len(EventIndexer(web3, other.address, db_path=db_path).renewals()) == 2
+
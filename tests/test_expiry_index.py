@@ -0,0 +1,94 @@
+import random
+
+from scripts.event_indexer import MEMBERSHIP_RENEWED_TOPIC
+from scripts.expiry_index import TRANSFER_TOPIC, ExpiryIndex
+
+
+def _expected(reference, t1, t2):
+    return [token_id for expiry, token_id in sorted((e, t) for t, e in reference.items() if t1 <= e <= t2)]
+
+
+def test_expiry_index_matches_reference():
+    rng = random.Random(7)
+    index = ExpiryIndex(load=8)
+    reference = {}
+
+    for step in range(5000):
+        token_id = rng.randrange(1, 300)
+        if rng.random() < 0.1:
+            index.remove(token_id)
+            reference.pop(token_id, None)
+        else:
+            expiry = rng.randrange(1, 1000)
+            index.set_expiry(token_id, expiry)
+            reference[token_id] = expiry
+
+        if step % 250 == 0:
+            t1, t2 = sorted((rng.randrange(1100), rng.randrange(1100)))
+            assert index.expiring_between(t1, t2) == _expected(reference, t1, t2)
+            assert index.count_between(t1, t2) == len(_expected(reference, t1, t2))
+
+    assert len(index) == len(reference)
+    assert index.expired_at(500) == _expected(reference, 0, 499)
+
+    bulk = ExpiryIndex(load=8)
+    bulk.bulk_load(reference.items())
+    assert bulk.expiring_between(0, 2000) == index.expiring_between(0, 2000)
+    assert all(bulk.get(token_id) == expiry for token_id, expiry in reference.items())
+
+
+def test_expiries_past_32_bits_are_kept_and_ordered():
+    far = 2**32 + 10
+    index = ExpiryIndex(load=2)
+    index.set_expiry(1, 100)
+    index.set_expiry(2, 2**64 - 1)  # the contract's type(uint64).max
+    index.set_expiry(3, far)
+    index.set_expiry(4, 2**32 - 1)
+
+    assert index.get(2) == 2**64 - 1 and index.get(3) == far
+    assert index.expiring_between(0, 2**64) == [1, 4, 3, 2]
+    assert index.expiring_between(2**32, 2**33) == [3]
+    assert index.count_between(2**32 - 1, 2**64) == 3
+    assert index.expiring_between(0, 2**32 - 2) == [1]
+
+    index.set_expiry(3, 50)
+    assert index.expiring_between(0, 2**64) == [3, 1, 4, 2]
+    bulk = ExpiryIndex(load=2)
+    bulk.bulk_load([(1, 100), (2, 2**64 - 1), (3, 50), (4, 2**32 - 1)])
+    assert bulk.expiring_between(0, 2**64) == [3, 1, 4, 2] and bulk.get(2) == 2**64 - 1
+
+
+def _log(topic, *topics, data=b"", block=1):
+    return {
+        "topics": [topic] + [value.to_bytes(32, "big") for value in topics],
+        "data": data,
+        "blockNumber": block,
+    }
+
+
+def test_apply_logs_resolves_mints_and_tracks_renewals_and_burns():
+    alice = int("aa" * 20, 16)
+    index = ExpiryIndex()
+    resolved = []
+
+    def resolve(mints):
+        resolved.extend(mints)
+        return [1000 + token_id for token_id, _ in mints]
+
+    index.apply_logs([
+        _log(TRANSFER_TOPIC, 0, alice, 1, block=5),
+        _log(TRANSFER_TOPIC, 0, alice, 2, block=5),
+        _log(TRANSFER_TOPIC, 0, alice, 3, block=6),
+        # Renewed in the same batch: the renewal wins, no lookup needed
+        _log(MEMBERSHIP_RENEWED_TOPIC, 2, data=(2**40).to_bytes(32, "big"), block=6),
+        # Burned
+        _log(TRANSFER_TOPIC, alice, 0, 3, block=7),
+    ], resolve)
+
+    assert resolved == [(1, 5)]
+    assert index.get(1) == 1001 and index.get(2) == 2**40 and index.get(3) is None
+    assert index.last_block == 7
+
+    # A far-future renewal does not break later syncs
+    index.apply_logs([_log(MEMBERSHIP_RENEWED_TOPIC, 1, data=(2**64 - 1).to_bytes(32, "big"), block=8)], resolve)
+    assert index.expiring_between(0, 2**64) == [2, 1]
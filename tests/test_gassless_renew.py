@@ -0,0 +1,109 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scripts.forward_request import load_key, recover_signer, request_from_json
+from scripts.gassless_renew import bulk_sign, sign_single_request
+from scripts.request_spool import SpoolReader
+
+MEMBERSHIP = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+FORWARDER = "0xe7f1725E7734CE288F8367e1Bb143E90bb3F0512"
+USER_KEYS = ["0x" + f"{i:02x}" * 32 for i in (1, 2, 3)]
+
+
+class NonceNode:
+    """
+    JSON-RPC endpoint that answers MinimalForwarder.getNonce(address) eth_calls
+    with `nonces[address]`.
+    """
+
+    def __init__(self, nonces):
+        self.nonces = {address.lower(): nonce for address, nonce in nonces.items()}
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if isinstance(payload, list):
+                    body = [node.answer(entry) for entry in payload]
+                else:
+                    body = node.answer(payload)
+                body = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, entry):
+        address = "0x" + entry["params"][0]["data"][-40:]
+        return {"jsonrpc": "2.0", "id": entry["id"], "result": "0x" + f"{self.nonces[address]:064x}"}
+
+
+def _address(user_key):
+    return load_key(user_key).public_key.to_checksum_address()
+
+
+@pytest.fixture
+def node(monkeypatch):
+    # Each user starts at a different chain nonce
+    fake = NonceNode({_address(key): 5 * i for i, key in enumerate(USER_KEYS)})
+    monkeypatch.setenv("RPC_URL", fake.url)
+    monkeypatch.setenv("FORWARDER_ADDRESS", FORWARDER)
+    monkeypatch.setenv("MEMBERSHIP_ADDRESS", MEMBERSHIP)
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+
+def _write_renewals(path):
+    # Rows of different users interleaved, four per user
+    with open(path, "w") as f:
+        f.write("user_key,token_id,seconds\n")
+        for row in range(12):
+            f.write(f"{USER_KEYS[row % 3]},{row},{86400 + row}\n")
+
+
+def _read_jsonl(path):
+    with open(path) as f:
+        return [request_from_json(json.loads(line)) for line in f]
+
+
+def _read_spool(path):
+    with SpoolReader(path) as reader:
+        return [(request, signature) for _, _, request, signature in reader.records()]
+
+
+@pytest.mark.parametrize("output, read", [("signed.jsonl", _read_jsonl), ("signed.spool", _read_spool)])
+def test_bulk_sign_signs_every_row_with_consecutive_nonces(node, tmp_path, output, read):
+    _write_renewals(tmp_path / "renewals.csv")
+    bulk_sign(str(tmp_path / "renewals.csv"), str(tmp_path / output), 2)
+
+    signed = read(tmp_path / output)
+    assert len(signed) == 12
+    nonces = {}
+    for request, signature in signed:
+        assert recover_signer(request, signature) == request["from"]
+        assert request["to"] == MEMBERSHIP
+        nonces.setdefault(request["from"], []).append(request["nonce"])
+    for i, key in enumerate(USER_KEYS):
+        assert nonces[_address(key)] == [5 * i + n for n in range(4)]
+
+
+def test_single_request_signature_matches_bulk_encoding(node, tmp_path):
+    # sign_single_request builds the full EIP-712 dict; the forwarder-side
+    # digest (recover_signer) must agree with it
+    payload = sign_single_request(USER_KEYS[1], MEMBERSHIP, FORWARDER, str(tmp_path / "signed.json"))
+    request, signature = request_from_json(payload)
+    assert request["nonce"] == 5
+    assert recover_signer(request, signature) == _address(USER_KEYS[1])
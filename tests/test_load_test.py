@@ -0,0 +1,30 @@
+import pytest
+
+from scripts.load_test import check_regressions, parse_mix
+
+
+def _report(ops_per_s=100.0, failed=0, gas=50000, p99=0.5):
+    return {
+        "ops_per_s": ops_per_s,
+        "failed": failed,
+        "operations": {
+            "renew": {"count": 10, "failed": failed, "gas_mean": gas, "latency_p50_s": 0.1, "latency_p99_s": p99},
+            "mint": {"count": 0, "failed": 0, "gas_mean": 0, "latency_p50_s": 0.0, "latency_p99_s": 0.0},
+        },
+    }
+
+
+def test_parse_mix():
+    assert parse_mix("mint=1,renew=2.5,meta_renew") == {"mint": 1.0, "renew": 2.5, "meta_renew": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("burn=1")
+
+
+def test_regressions_against_baseline():
+    baseline = _report()
+    assert check_regressions(_report(ops_per_s=95.0, gas=54000, p99=0.7), baseline) == []
+
+    problems = check_regressions(_report(ops_per_s=80.0, gas=60000, p99=1.0, failed=2), baseline)
+    assert len(problems) == 4
+    assert problems[0].startswith("2 failed")
+    assert check_regressions(_report(failed=2), None, max_failures=2) == []
@@ -0,0 +1,80 @@
+import pytest
+from brownie import MinimalForwarder, NFTMembership, accounts
+
+from scripts.log_stream import LogStream, SqliteEventSink
+
+PRICE = 10**16
+
+
+@pytest.fixture
+def membership_contract():
+    forwarder = MinimalForwarder.deploy({'from': accounts[0]})
+    yield NFTMembership.deploy("MembershipPass", "MBR", PRICE, forwarder, {'from': accounts[0]})
+
+
+def _drain(stream, sink):
+    items = stream.poll()
+    for item in items:
+        sink.apply(item)
+    return items
+
+
+def test_stream_rolls_back_replaced_blocks(membership_contract, accounts, chain, web3):
+    membership_contract.mintMembership(accounts[1], 3600, {'from': accounts[1], 'value': PRICE})
+    stream = LogStream(web3, [membership_contract.address], confirmations=0)
+    sink = SqliteEventSink(":memory:")
+
+    items = _drain(stream, sink)
+    assert [item["event"] for item in items if item["type"] == "log"] == ["Transfer"]
+    assert items[-1]["type"] == "checkpoint"
+    fork_point = stream.last_block
+
+    # Two renewals, then a reorg replaces their blocks with a single different one
+    chain.snapshot()
+    membership_contract.renewMembership(1, 60, {'from': accounts[1], 'value': PRICE})
+    membership_contract.renewMembership(1, 60, {'from': accounts[1], 'value': PRICE})
+    assert len([item for item in _drain(stream, sink) if item["type"] == "log"]) == 2
+    assert len(sink.events()) == 3
+
+    chain.revert()
+    membership_contract.mintMembership(accounts[2], 3600, {'from': accounts[2], 'value': PRICE})
+    chain.mine()
+
+    items = _drain(stream, sink)
+    assert items[0] == {"type": "rollback", "block_number": fork_point}
+    logs = [item for item in items if item["type"] == "log"]
+    assert [(log["event"], log["args"]["to"]) for log in logs] == [("Transfer", accounts[2])]
+    assert [event for _block, event, _args in sink.events()] == ["Transfer", "Transfer"]
+    assert stream.rollbacks == 1
+
+    # Nothing new: no logs, no re-scan
+    assert [item["type"] for item in stream.poll()] == []
+
+
+def test_stream_waits_for_confirmations(membership_contract, accounts, chain, web3):
+    stream = LogStream(web3, [membership_contract.address], confirmations=2)
+    stream.poll()
+
+    membership_contract.mintMembership(accounts[1], 3600, {'from': accounts[1], 'value': PRICE})
+    assert not [item for item in stream.poll() if item["type"] == "log"]
+
+    chain.mine(2)
+    logs = [item for item in stream.poll() if item["type"] == "log"]
+    assert [log["event"] for log in logs] == ["Transfer"]
+    assert logs[0]["args"]["tokenId"] == 1
+
+
+def test_sink_resumes_from_known_hashes(membership_contract, accounts, chain, web3, tmp_path):
+    db_path = str(tmp_path / "events.db")
+    membership_contract.mintMembership(accounts[1], 3600, {'from': accounts[1], 'value': PRICE})
+    sink = SqliteEventSink(db_path)
+    _drain(LogStream(web3, [membership_contract.address], confirmations=0), sink)
+    sink.close()
+
+    membership_contract.renewMembership(1, 60, {'from': accounts[1], 'value': PRICE})
+    sink = SqliteEventSink(db_path)
+    stream = LogStream(web3, [membership_contract.address], confirmations=0, known_hashes=sink.known_hashes())
+    logs = [item for item in _drain(stream, sink) if item["type"] == "log"]
+
+    assert [log["event"] for log in logs] == ["MembershipRenewed"]
+    assert len(sink.events()) == 2
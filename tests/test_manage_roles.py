@@ -0,0 +1,66 @@
+import brownie
+import pytest
+from brownie import MinimalForwarder, NFTMembership, accounts
+
+from scripts.manage_roles import plan_role_changes, read_role_file, sync
+from scripts.rpc_client import get_client, role_holders
+
+
+@pytest.fixture
+def membership_contract():
+    forwarder = MinimalForwarder.deploy({'from': accounts[0]})
+    yield NFTMembership.deploy("MembershipPass", "MBR", 10**16, forwarder, {'from': accounts[0]})
+
+
+def test_batch_grant_and_revoke_admin_roles(membership_contract, accounts, web3):
+    admin_role = membership_contract.ADMIN_ROLE()
+    operators = [accounts[1], accounts[2], accounts[3]]
+
+    tx = membership_contract.grantAdminRoles(operators + [accounts[1]], {'from': accounts[0]})
+    assert len(tx.events["RoleGranted"]) == 3  # the repeat is skipped
+
+    holders = role_holders(get_client(web3.provider.endpoint_uri), membership_contract.address, admin_role,
+                           [a.address for a in operators + [accounts[4]]])
+    assert list(holders.values()) == [True, True, True, False]
+
+    membership_contract.revokeAdminRoles([accounts[1], accounts[4]], {'from': accounts[0]})
+    assert not membership_contract.hasRole(admin_role, accounts[1])
+    assert membership_contract.hasRole(admin_role, accounts[2])
+
+    with brownie.reverts():
+        membership_contract.grantAdminRoles([accounts[5]], {'from': accounts[2]})
+
+
+def test_read_role_file_and_plan(tmp_path):
+    path = tmp_path / "admins.txt"
+    path.write_text(
+        "# operators\n"
+        "0xd56521a2bc066acfaf2cb398d38be0c560b6abfd\n"
+        "\n"
+        "0x66aB6D9362d4F35596279692F0251Db635165871  # ops-2\n"
+        "0xD56521A2bc066ACFAf2cB398D38Be0C560b6abfD\n"
+    )
+    desired = read_role_file(path)
+    assert desired == ["0xD56521A2bc066ACFAf2cB398D38Be0C560b6abfD", "0x66aB6D9362d4F35596279692F0251Db635165871"]
+
+    assert plan_role_changes(desired, ["0x66aB6D9362d4F35596279692F0251Db635165871", "0x" + "11" * 20]) == (
+        ["0xD56521A2bc066ACFAf2cB398D38Be0C560b6abfD"], ["0x" + "11" * 20]
+    )
+
+    path.write_text("0x1234\n")
+    with pytest.raises(ValueError, match="admins.txt:1"):
+        read_role_file(path)
+
+
+def test_sync_sends_only_the_difference(membership_contract, accounts, monkeypatch, tmp_path):
+    monkeypatch.setenv("MEMBERSHIP_ADDRESS", membership_contract.address)
+    membership_contract.grantAdminRoles([accounts[1], accounts[2]], {'from': accounts[0]})
+    path = tmp_path / "admins.txt"
+    path.write_text("\n".join([accounts[0].address, accounts[2].address, accounts[3].address]))
+
+    to_grant, to_revoke = sync(str(path), admin=accounts[0])
+
+    assert (to_grant, to_revoke) == ([accounts[3].address], [accounts[1].address])
+    admin_role = membership_contract.ADMIN_ROLE()
+    assert [membership_contract.hasRole(admin_role, a) for a in accounts[:4]] == [True, False, True, True]
+    assert sync(str(path), admin=accounts[0]) == ([], [])
@@ -1,13 +1,15 @@
 import pytest
-from brownie import NFTMembership, accounts, reverts
+from brownie import MinimalForwarder, NFTMembership, accounts, reverts
 
 @pytest.fixture
 def membership_contract():
-    # Deploy the contract using the first account
+    # Deploy the forwarder and the contract using the first account
+    forwarder = MinimalForwarder.deploy({'from': accounts[0]})
     yield NFTMembership.deploy(
         "MembershipPass",
         "MBR",
         10**16,  # example price: 0.01 ETH
+        forwarder,
         {'from': accounts[0]}
     )
 
@@ -64,10 +66,58 @@ def test_expired_membership(membership_contract, accounts, chain):
 
     assert membership_contract.isValid(token_id) == False
 
-    with reverts("Membership expired, cannot renew"):
+    # A lapsed membership can be renewed; the new period starts now
+    tx = membership_contract.renewMembership(
+        token_id,
+        3600,
+        {'from': accounts[1], 'value': 10**16}
+    )
+    assert membership_contract.validUntil(token_id) == tx.timestamp + 3600
+    assert membership_contract.isValid(token_id) == True
+
+
+def test_neighbouring_expiries_are_independent(membership_contract, accounts):
+    # Ids 4..7 share one packed storage slot; ids 1..3 and 8 sit in the
+    # slots on either side
+    durations = [1000 * i for i in range(1, 9)]
+    tx = membership_contract.batchMintMembership(
+        [accounts[1]] * 8,
+        durations,
+        {'from': accounts[1], 'value': 8 * 10**16}
+    )
+    expiries = {token_id: tx.timestamp + durations[token_id - 1] for token_id in range(1, 9)}
+    for token_id, expiry in expiries.items():
+        assert membership_contract.validUntil(token_id) == expiry
+
+    # Renewing each token of the shared slot moves only that token's expiry
+    for token_id in range(4, 8):
         membership_contract.renewMembership(
             token_id,
-            3600,
+            token_id,
             {'from': accounts[1], 'value': 10**16}
         )
+        expiries[token_id] += token_id
+        for other, expiry in expiries.items():
+            assert membership_contract.validUntil(other) == expiry
+
+def test_expiry_is_bounded_by_uint64(membership_contract, accounts):
+    membership_contract.batchMintMembership(
+        [accounts[1]] * 2,
+        [3600, 3600],
+        {'from': accounts[1], 'value': 2 * 10**16}
+    )
+    neighbour = membership_contract.validUntil(2)
+
+    # The largest expiry that fits is stored exactly, without touching token 2
+    membership_contract.renewMembership(
+        1,
+        2**64 - 1 - membership_contract.validUntil(1),
+        {'from': accounts[1], 'value': 10**16}
+    )
+    assert membership_contract.validUntil(1) == 2**64 - 1
+    assert membership_contract.validUntil(2) == neighbour
 
+    with reverts("Expiry too large"):
+        membership_contract.renewMembership(1, 1, {'from': accounts[1], 'value': 10**16})
+    with reverts("Expiry too large"):
+        membership_contract.mintMembership(accounts[1], 2**64, {'from': accounts[1], 'value': 10**16})
@@ -0,0 +1,114 @@
+import numpy as np
+
+from scripts.membership_analytics import (
+    BURN, DAY, MINT, RENEW, TRANSFER, EventStore, active_members, churn_per_period, coverage_intervals,
+    expiry_histogram, renewals_per_day, retention_cohorts,
+)
+from scripts.membership_gate import MEMBERSHIP_RENEWED_TOPIC, TRANSFER_TOPIC
+
+NFT = "0x" + "11" * 20
+ALICE = "0x" + "aa" * 20
+ZERO = "0x" + "00" * 20
+
+
+def _columns(rows):
+    return {
+        "block": np.arange(len(rows), dtype=np.uint64),
+        "time": np.array([row[0] for row in rows], np.int64),
+        "token": np.array([row[1] for row in rows], np.uint64),
+        "kind": np.array([row[2] for row in rows], np.uint8),
+        "expiry": np.array([row[3] for row in rows], np.int64),
+    }
+
+
+# Token 1 renews early, lapses on day 40 and comes back on day 50;
+# token 2 lapses on day 25 and is burned; token 3 is transferred
+HISTORY = _columns([
+    (0, 1, MINT, 10 * DAY),
+    (5 * DAY, 1, RENEW, 40 * DAY),
+    (20 * DAY, 2, MINT, 25 * DAY),
+    (30 * DAY, 2, BURN, 0),
+    (35 * DAY, 3, MINT, 100 * DAY),
+    (40 * DAY, 3, TRANSFER, 0),
+    (50 * DAY, 1, RENEW, 80 * DAY),
+])
+NOW = 60 * DAY
+
+
+def test_aggregates_follow_coverage_intervals():
+    intervals = coverage_intervals(HISTORY)
+    assert intervals["token"].tolist() == [1, 1, 1, 2, 3]
+    assert intervals["lapsed"].tolist() == [False, True, True, True, True]
+
+    days, counts = renewals_per_day(HISTORY)
+    assert (days[0], days[-1], counts.sum()) == (5, 50, 2)
+
+    # Token 1 expires in 20 days, token 3 in 40; token 2 is burned
+    assert expiry_histogram(intervals, NOW).tolist() == [0, 0, 0, 0, 1, 1, 0, 0]
+
+    active = active_members(intervals, 0, 60)
+    assert active[[0, 20, 25, 39, 40, 50]].tolist() == [1, 2, 1, 2, 1, 2]
+
+    periods, lapsed, reactivated = churn_per_period(intervals, NOW)
+    assert (periods.tolist(), lapsed.tolist(), reactivated.tolist()) == ([0, 1, 2], [1, 1, 0], [0, 1, 0])
+
+    cohorts, sizes, retention = retention_cohorts(intervals, NOW)
+    assert sizes.tolist() == [2, 1, 0]
+    assert retention[0, :2].tolist() == [0.5, 0.5] and retention[1, 0] == 1.0
+    assert np.isnan(retention[0, 2]) and np.isnan(retention[1, 1])
+
+
+class FakeClient:
+    """
+    eth_getLogs from `logs`, block timestamps at 12 s per block, validUntil from `mint_expiries`.
+    """
+
+    def __init__(self, head, logs, mint_expiries):
+        self.head = head
+        self.logs = logs
+        self.mint_expiries = mint_expiries
+
+    def block_number(self):
+        return self.head
+
+    def call(self, method, params):
+        lo, hi = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        return [log for log in self.logs if lo <= int(log["blockNumber"], 16) <= hi]
+
+    def batch(self, calls):
+        results = []
+        for method, params in calls:
+            if method == "eth_getBlockByNumber":
+                results.append({"timestamp": hex(1_000_000 + 12 * int(params[0], 16))})
+            else:
+                results.append(hex(self.mint_expiries[int(params[0]["data"][10:], 16)]))
+        return results
+
+
+def _word(value):
+    return "0x" + value.to_bytes(32, "big").hex()
+
+
+def test_store_syncs_incrementally_and_round_trips(tmp_path):
+    logs = [
+        {"blockNumber": hex(10), "data": "0x",
+         "topics": [TRANSFER_TOPIC, _word(0), "0x" + "00" * 12 + ALICE[2:], _word(1)]},
+        {"blockNumber": hex(3500), "data": _word(5_000_000), "topics": [MEMBERSHIP_RENEWED_TOPIC, _word(1)]},
+    ]
+    client = FakeClient(head=3000, logs=logs[:1], mint_expiries={1: 2_000_000})
+    path = str(tmp_path / "events.npz")
+
+    store = EventStore.load(path)
+    assert store.sync(client, NFT) == 1
+    store.save()
+
+    client.logs, client.head = logs, 4500
+    store = EventStore.load(path)
+    assert store.synced_block == 3000
+    assert store.sync(client, NFT) == 1
+    store.save()
+
+    columns = EventStore.load(path).columns
+    assert columns["kind"].tolist() == [MINT, RENEW]
+    assert columns["expiry"].tolist() == [2_000_000, 5_000_000]
+    assert columns["time"].tolist() == [1_000_000 + 12 * 10, 1_000_000 + 12 * 3500]
@@ -0,0 +1,94 @@
+import pytest
+
+from scripts.membership_gate import MEMBERSHIP_RENEWED_TOPIC, TRANSFER_TOPIC, MembershipGate, StaleIndexError
+
+NFT = "0x" + "11" * 20
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+ZERO = "0x" + "00" * 20
+
+
+def _word(value):
+    return "0x" + value.to_bytes(32, "big").hex()
+
+
+def _address_topic(address):
+    return "0x" + "00" * 12 + address[2:]
+
+
+def _transfer(block, sender, recipient, token_id):
+    return {"blockNumber": hex(block), "data": "0x",
+            "topics": [TRANSFER_TOPIC, _address_topic(sender), _address_topic(recipient), _word(token_id)]}
+
+
+def _renewed(block, token_id, expiry):
+    return {"blockNumber": hex(block), "data": _word(expiry), "topics": [MEMBERSHIP_RENEWED_TOPIC, _word(token_id)]}
+
+
+class FakeClient:
+    """
+    Serves eth_getLogs from `logs` by block range and validUntil reads from `mint_expiries`.
+    """
+
+    def __init__(self):
+        self.head = 0
+        self.logs = []
+        self.mint_expiries = {}
+        self.get_logs_calls = 0
+
+    def block_number(self):
+        return self.head
+
+    def call(self, method, params):
+        assert method == "eth_getLogs"
+        self.get_logs_calls += 1
+        lo, hi = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        return [dict(log) for log in self.logs if lo <= int(log["blockNumber"], 16) <= hi]
+
+    def batch(self, calls):
+        return [hex(self.mint_expiries[int(params[0]["data"][10:], 16)]) for _method, params in calls]
+
+
+def test_gate_follows_mints_renewals_and_transfers():
+    client = FakeClient()
+    client.mint_expiries = {1: 1000, 2: 500}
+    client.logs = [
+        _transfer(1, ZERO, ALICE, 1),
+        _transfer(1, ZERO, ALICE, 2),
+        _renewed(2, 2, 1500),
+    ]
+    client.head = 2
+    gate = MembershipGate(client, NFT)
+    gate.sync()
+
+    assert gate.tokens_of("0x" + ALICE[2:].upper()) == [1, 2]
+    assert gate.is_member(ALICE, now=1200)
+    assert not gate.is_valid(1, now=1200) and gate.is_valid(2, now=1200)
+    assert not gate.is_member(BOB, now=0)
+
+    client.logs.append(_transfer(3, ALICE, BOB, 2))
+    client.logs.append(_transfer(3, ALICE, ZERO, 1))  # burn
+    client.head = 3
+    gate.sync()
+
+    assert gate.tokens_of(ALICE) == []
+    assert gate.tokens_of(BOB) == [2]
+    assert gate.is_member(BOB, now=1500) and not gate.is_member(BOB, now=1501)
+    assert not gate.is_valid(1, now=0)
+
+
+def test_gate_syncs_in_log_ranges_and_reports_staleness():
+    client = FakeClient()
+    client.mint_expiries = {1: 1000}
+    client.logs = [_transfer(4500, ZERO, ALICE, 1)]
+    client.head = 4500
+    gate = MembershipGate(client, NFT, max_lag_blocks=2)
+
+    gate.sync()
+    assert client.get_logs_calls == 3  # blocks 0-1999, 2000-3999, 4000-4500
+    assert gate.is_member(ALICE, now=1000)
+
+    # The head moved on, but the sync that saw it did not finish
+    gate.head_block = gate.synced_block + 3
+    with pytest.raises(StaleIndexError):
+        gate.is_member(ALICE, now=1000)
@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from brownie import MinimalForwarder, NFTMembership, accounts
+from web3 import AsyncWeb3
+
+from scripts.membership_status import fetch_status
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+@pytest.fixture
+def membership_contract():
+    forwarder = MinimalForwarder.deploy({'from': accounts[0]})
+    yield NFTMembership.deploy(
+        "MembershipPass",
+        "MBR",
+        10**16,
+        forwarder,
+        {'from': accounts[0]}
+    )
+
+
+def test_membership_status_batch(membership_contract, accounts, chain):
+    membership_contract.batchMintMembership(
+        [accounts[1], accounts[2], accounts[3]],
+        [10, 3600, 3600],
+        {'from': accounts[0], 'value': 3 * 10**16}
+    )
+    chain.sleep(60)
+    chain.mine()
+
+    owners, expiries, active = membership_contract.membershipStatusBatch([1, 2, 3, 99])
+
+    assert owners == [accounts[1], accounts[2], accounts[3], ZERO_ADDRESS]
+    assert expiries[:3] == [membership_contract.validUntil(i) for i in (1, 2, 3)]
+    assert active == [False, True, True, False]
+
+
+def test_status_client_chunks_and_merges(membership_contract, accounts, web3):
+    membership_contract.batchMintMembership(
+        [accounts[1]] * 7,
+        [3600] * 7,
+        {'from': accounts[0], 'value': 7 * 10**16}
+    )
+
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(web3.provider.endpoint_uri))
+    status = asyncio.run(
+        fetch_status(w3, membership_contract.address, range(1, 10), chunk_size=2, concurrency=3)
+    )
+
+    assert sorted(status) == list(range(1, 10))
+    assert all(status[i] == (accounts[1].address, membership_contract.validUntil(i), True) for i in range(1, 8))
+    assert status[8] == (ZERO_ADDRESS, 0, False)
+
+
+def test_is_valid_matches_status_batch(membership_contract, accounts, chain):
+    membership_contract.batchMintMembership(
+        [accounts[1], accounts[2]],
+        [10, 3600],
+        {'from': accounts[0], 'value': 2 * 10**16}
+    )
+    chain.sleep(60)
+    chain.mine()
+
+    _, _, active = membership_contract.membershipStatusBatch([1, 2, 99])
+    assert [membership_contract.isValid(token_id) for token_id in (1, 2, 99)] == active == [False, True, False]
@@ -0,0 +1,78 @@
+import json
+import time
+
+from scripts.metrics import Metrics, SamplingProfiler
+
+
+def test_disabled_metrics_record_nothing(tmp_path):
+    metrics = Metrics()
+    with metrics.stage("sign"):
+        pass
+    metrics.incr("requests_signed")
+
+    assert metrics.timers == {} and not metrics.counters
+    assert metrics.export(tmp_path / "out.prom") is None
+    assert metrics.stage("sign") is metrics.stage("encode_calldata")  # one shared no-op
+
+
+def test_stages_counters_and_prometheus_export(tmp_path):
+    metrics = Metrics(enabled=True)
+    for _ in range(3):
+        with metrics.stage("sign"):
+            time.sleep(0.001)
+    metrics.incr("requests_signed", 3)
+
+    # A worker's timers folded in
+    worker = Metrics(enabled=True)
+    with worker.stage("sign"):
+        pass
+    with worker.stage("write_json"):
+        pass
+    metrics.merge(worker.drain())
+    assert worker.timers == {}
+
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["sign"]["count"] == 4
+    assert snapshot["stages"]["sign"]["max_ms"] >= 1.0
+    assert snapshot["stages"]["write_json"]["count"] == 1
+    assert snapshot["counters"] == {"requests_signed": 3}
+
+    path = metrics.export(str(tmp_path / "renewals.prom"))
+    text = open(path).read()
+    assert "# TYPE membership_stage_seconds summary" in text
+    assert 'membership_stage_seconds_count{stage="sign"} 4' in text
+    assert "membership_requests_signed_total 3" in text
+    assert not (tmp_path / "renewals.prom.tmp").exists()
+
+
+def test_jsonl_export_appends_snapshots(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics = Metrics(export_path=str(path))
+    assert metrics.enabled
+
+    with metrics.stage("send"):
+        pass
+    metrics.export()
+    metrics.incr("requests_relayed")
+    metrics.export()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["stages"]["send"]["count"] == 1
+    assert lines[1]["counters"] == {"requests_relayed": 1}
+
+
+def test_sampling_profiler_writes_collapsed_stacks(tmp_path):
+    def busy_loop():
+        end = time.perf_counter() + 0.05
+        while time.perf_counter() < end:
+            pass
+
+    metrics = Metrics(profile_dir=str(tmp_path))
+    with metrics.profile("hot_loop", interval=0.001) as profiler:
+        busy_loop()
+
+    assert isinstance(profiler, SamplingProfiler)
+    lines = (tmp_path / "hot_loop.folded").read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("busy_loop" in line for line in lines)
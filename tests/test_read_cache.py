@@ -0,0 +1,151 @@
+from eth_abi import decode, encode
+from eth_utils import keccak
+
+from scripts.read_cache import (
+    MEMBERSHIP_RENEWED_TOPIC,
+    ROLE_GRANTED_TOPIC,
+    TRANSFER_TOPIC,
+    VIEWS,
+    _SELECTORS,
+    ReadCache,
+)
+
+NFT = "0x" + "11" * 20
+FORWARDER = "0x" + "22" * 20
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+ADMIN_ROLE = keccak(text="ADMIN_ROLE")
+
+
+def _word(value):
+    return "0x" + (value if isinstance(value, bytes) else encode(["uint256"], [value])).hex()
+
+
+def _address_topic(address):
+    return "0x" + "00" * 12 + address[2:]
+
+
+class FakeClient:
+    """
+    Stands in for RpcClient: answers eth_calls from `values` and counts them.
+    """
+
+    def __init__(self):
+        self.head = 100
+        self.calls = 0
+        self.logs = []
+        self.values = {
+            ("validUntil", (1,)): 1000,
+            ("ownerOf", (1,)): ALICE,
+            ("balanceOf", (ALICE,)): 1,
+            ("getNonce", (ALICE,)): 3,
+            ("ADMIN_ROLE", ()): ADMIN_ROLE,
+            ("hasRole", (ADMIN_ROLE, BOB)): False,
+        }
+        for token_id in range(2, 10):
+            self.values[("validUntil", (token_id,))] = token_id
+
+    def block_number(self):
+        return self.head
+
+    def call(self, method, params):
+        assert method == "eth_getLogs"
+        logs, self.logs = self.logs, []
+        return logs
+
+    def call_many(self, calls, block, raise_errors=False):
+        results = []
+        for _to, data in calls:
+            self.calls += 1
+            name = next(name for name, selector in _SELECTORS.items() if data[:4] == selector)
+            inputs, output, _policy = VIEWS[name]
+            args = tuple(decode(list(inputs), data[4:]))  # addresses come back lower-case
+            results.append(encode([output], [self.values[(name, args)]]))
+        return results
+
+
+def test_repeated_reads_are_served_from_cache():
+    client = FakeClient()
+    cache = ReadCache(client)
+
+    assert cache.get(NFT, "validUntil", 1) == 1000
+    assert cache.get(NFT, "validUntil", 1) == 1000
+    assert cache.get_many(NFT, "validUntil", [(1,), (2,), (3,)]) == [1000, 2, 3]
+
+    assert client.calls == 3
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    assert stats["memory_bytes"] > 0
+
+
+def test_logs_update_and_invalidate_entries():
+    client = FakeClient()
+    cache = ReadCache(client)
+    cache.get(NFT, "validUntil", 1)
+    cache.get(NFT, "ownerOf", 1)
+    cache.get(NFT, "balanceOf", ALICE)
+    cache.get(NFT, "hasRole", ADMIN_ROLE, BOB)
+    calls = client.calls
+
+    client.head = 101
+    client.logs = [
+        {"address": NFT, "blockNumber": "0x65", "data": _word(2000),
+         "topics": [MEMBERSHIP_RENEWED_TOPIC, _word(1)]},
+        {"address": NFT, "blockNumber": "0x65", "data": "0x",
+         "topics": [TRANSFER_TOPIC, _address_topic(ALICE), _address_topic(BOB), _word(1)]},
+        {"address": NFT, "blockNumber": "0x65", "data": "0x",
+         "topics": [ROLE_GRANTED_TOPIC, _word(ADMIN_ROLE), _address_topic(BOB), _address_topic(ALICE)]},
+    ]
+    cache.refresh()
+
+    assert cache.get(NFT, "validUntil", 1) == 2000
+    assert cache.get(NFT, "ownerOf", 1).lower() == BOB
+    assert cache.get(NFT, "hasRole", ADMIN_ROLE, BOB) is True
+    assert client.calls == calls
+    assert cache.stats()["invalidations"] == 1  # balanceOf(ALICE)
+
+    # Log-updated values are not added for keys nobody asked for
+    assert cache.stats()["entries"] == 3
+
+
+def test_mint_invalidates_cached_expiry():
+    client = FakeClient()
+    cache = ReadCache(client)
+    # Read before the token exists: 0
+    client.values[("validUntil", (10,))] = 0
+    assert cache.get(NFT, "validUntil", 10) == 0
+
+    client.head = 101
+    client.values[("validUntil", (10,))] = 5000
+    client.logs = [
+        {"address": NFT, "blockNumber": "0x65", "data": "0x",
+         "topics": [TRANSFER_TOPIC, _word(0), _address_topic(ALICE), _word(10)]},
+    ]
+    cache.refresh()
+
+    assert cache.get(NFT, "validUntil", 10) == 5000
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_nonces_expire_per_block_and_constants_are_permanent():
+    client = FakeClient()
+    cache = ReadCache(client, max_entries=2)
+
+    cache.get(NFT, "ADMIN_ROLE")
+    cache.get(FORWARDER, "getNonce", ALICE)
+    cache.get(FORWARDER, "getNonce", ALICE)
+    assert client.calls == 2
+
+    client.head = 101
+    cache.refresh()
+    cache.get(FORWARDER, "getNonce", ALICE)
+    cache.get(NFT, "ADMIN_ROLE")
+    assert client.calls == 3
+    assert cache.stats()["expired"] == 1
+
+    for token_id in range(2, 6):
+        cache.get(NFT, "validUntil", token_id)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 3
+    assert stats["permanent_entries"] == 1
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import brownie
+import pytest
+from brownie import MinimalForwarder, NFTMembership, accounts
+from web3 import AsyncWeb3
+
+from scripts.forward_request import executed_requests, request_to_json, request_tuple, sign_request
+from scripts.relayer_daemon import relay_file, relay_spool
+from scripts.request_spool import HEADER_SIZE, SpoolCursor, SpoolWriter
+
+
+@pytest.fixture
+def forwarder():
+    yield MinimalForwarder.deploy({'from': accounts[0]})
+
+
+@pytest.fixture
+def membership_contract(forwarder):
+    yield NFTMembership.deploy(
+        "MembershipPass",
+        "MBR",
+        10**16,
+        forwarder,
+        {'from': accounts[0]}
+    )
+
+
+def _renew_request(membership_contract, user, token_id, nonce, seconds=60):
+    return {
+        "from": user.address,
+        "to": membership_contract.address,
+        "value": 0,
+        "gas": 100000,
+        "nonce": nonce,
+        "data": bytes.fromhex(
+            membership_contract.metaRenewMembership.encode_input(token_id, seconds, user.address)[2:]
+        ),
+    }
+
+
+def test_daemon_relays_pipelined_requests(forwarder, membership_contract, web3, tmp_path):
+    user = accounts.add()
+    relayer = accounts.add()
+    accounts[0].transfer(relayer, "10 ether")
+
+    membership_contract.mintMembership(user, 3600, {'from': accounts[0], 'value': 10**16})
+    token_id = 1
+    expiry_before = membership_contract.validUntil(token_id)
+
+    path = tmp_path / "signed_requests.jsonl"
+    with open(path, "w") as f:
+        for nonce in range(20):
+            request = _renew_request(membership_contract, user, token_id, nonce)
+            f.write(json.dumps(request_to_json(request, sign_request(request, user.private_key))) + "\n")
+
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(web3.provider.endpoint_uri))
+    report = asyncio.run(
+        relay_file(w3, forwarder.address, relayer.private_key, str(path), poll_interval=0.05)
+    )
+
+    assert report["confirmed"] == 20
+    assert report["send_errors"] == 0
+    assert forwarder.getNonce(user) == 20
+    assert membership_contract.validUntil(token_id) == expiry_before + 20 * 60
+
+
+def test_execute_batch_reports_per_request_success(forwarder, membership_contract, web3):
+    user = accounts.add()
+    other = accounts.add()
+    membership_contract.mintMembership(user, 3600, {'from': accounts[0], 'value': 10**16})
+    expiry_before = membership_contract.validUntil(1)
+
+    good = [_renew_request(membership_contract, user, 1, nonce) for nonce in (0, 1)]
+    stale = _renew_request(membership_contract, user, 1, 0)  # nonce already used by good[0]
+    forged = _renew_request(membership_contract, other, 1, 0)
+    # Signature checks out, but the call reverts: 99 has not been minted
+    missing = _renew_request(membership_contract, other, 99, 0)
+
+    requests = [good[0], stale, forged, good[1], missing]
+    signatures = [
+        sign_request(good[0], user.private_key),
+        sign_request(stale, user.private_key),
+        sign_request(forged, user.private_key),
+        sign_request(good[1], user.private_key),
+        sign_request(missing, other.private_key),
+    ]
+    tuples = [request_tuple(request) for request in requests]
+
+    assert forwarder.executeBatch.call(tuples, signatures) == [True, False, False, True, False]
+    tx = forwarder.executeBatch(tuples, signatures, {'from': accounts[0]})
+
+    # One Executed per request whose nonce was used; the stale and forged ones emit nothing
+    assert [(event["from"], event["nonce"], event["success"]) for event in tx.events["Executed"]] == [
+        (user.address, 0, True), (user.address, 1, True), (other.address, 0, False),
+    ]
+    assert executed_requests(web3.eth.get_transaction_receipt(tx.txid), forwarder.address) == {
+        (user.address, 0): True, (user.address, 1): True, (other.address, 0): False,
+    }
+    assert forwarder.getNonce(user) == 2
+    assert forwarder.getNonce(other) == 1
+    assert membership_contract.validUntil(1) == expiry_before + 2 * 60
+
+
+def test_execute_batch_refunds_value_of_failed_requests(forwarder, membership_contract):
+    user = accounts.add()
+    membership_contract.mintMembership(user, 3600, {'from': accounts[0], 'value': 10**16})
+
+    good = _renew_request(membership_contract, user, 1, 0)
+    # metaRenewMembership is not payable: the call reverts
+    paid = dict(_renew_request(membership_contract, user, 1, 1), value=10**16)
+    # Fails verification (nonce 0 is taken by `good`): skipped
+    stale = dict(_renew_request(membership_contract, user, 1, 0), value=2 * 10**16)
+    requests = [good, paid, stale]
+    tuples = [request_tuple(request) for request in requests]
+    signatures = [sign_request(request, user.private_key) for request in requests]
+
+    with brownie.reverts("MinimalForwarder: value mismatch"):
+        forwarder.executeBatch(tuples, signatures, {'from': accounts[0], 'value': 10**16})
+
+    balance_before = accounts[0].balance()
+    tx = forwarder.executeBatch(tuples, signatures, {'from': accounts[0], 'value': 3 * 10**16})
+
+    assert tx.return_value == [True, False, False]
+    assert forwarder.balance() == 0
+    assert accounts[0].balance() == balance_before - tx.gas_used * tx.gas_price
+
+
+def test_daemon_bundles_requests_within_gas_budget(forwarder, membership_contract, web3, tmp_path):
+    user = accounts.add()
+    relayer = accounts.add()
+    accounts[0].transfer(relayer, "10 ether")
+    membership_contract.mintMembership(user, 3600, {'from': accounts[0], 'value': 10**16})
+    expiry_before = membership_contract.validUntil(1)
+
+    path = tmp_path / "signed_requests.jsonl"
+    with open(path, "w") as f:
+        for nonce in range(25):
+            request = _renew_request(membership_contract, user, 1, nonce)
+            f.write(json.dumps(request_to_json(request, sign_request(request, user.private_key))) + "\n")
+
+    start_nonce = web3.eth.get_transaction_count(relayer.address)
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(web3.provider.endpoint_uri))
+    report = asyncio.run(
+        relay_file(
+            w3, forwarder.address, relayer.private_key, str(path),
+            poll_interval=0.05, bundle_gas_budget=1_500_000,
+        )
+    )
+
+    assert report["confirmed"] == 25
+    assert forwarder.getNonce(user) == 25
+    assert membership_contract.validUntil(1) == expiry_before + 25 * 60
+    # 140k budgeted per request -> at most 10 per bundle, so at least 3 transactions
+    sent = web3.eth.get_transaction_count(relayer.address) - start_nonce
+    assert 3 <= sent < 25
+
+
+def test_spool_resume_does_not_resend(forwarder, membership_contract, web3, tmp_path):
+    user = accounts.add()
+    relayer = accounts.add()
+    accounts[0].transfer(relayer, "10 ether")
+    membership_contract.mintMembership(user, 3600, {'from': accounts[0], 'value': 10**16})
+    expiry_before = membership_contract.validUntil(1)
+
+    path = tmp_path / "signed_requests.spool"
+    with SpoolWriter(path) as spool:
+        for nonce in range(10):
+            request = _renew_request(membership_contract, user, 1, nonce)
+            spool.append(request, sign_request(request, user.private_key))
+
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(web3.provider.endpoint_uri))
+    report = asyncio.run(relay_spool(w3, forwarder.address, relayer.private_key, str(path), poll_interval=0.05))
+    assert report["confirmed"] == 10
+    assert SpoolCursor(path).acked == path.stat().st_size
+
+    # Crash before `acked` was saved: everything is inside the send lease again
+    cursor = SpoolCursor(path)
+    cursor.acked = HEADER_SIZE
+    cursor.save()
+    with SpoolWriter(path) as spool:
+        for nonce in range(10, 15):
+            request = _renew_request(membership_contract, user, 1, nonce)
+            spool.append(request, sign_request(request, user.private_key))
+
+    start_nonce = web3.eth.get_transaction_count(relayer.address)
+    report = asyncio.run(relay_spool(w3, forwarder.address, relayer.private_key, str(path), poll_interval=0.05))
+
+    assert report["resumed_skipped"] == 10
+    assert report["confirmed"] == 5
+    assert web3.eth.get_transaction_count(relayer.address) - start_nonce == 5
+    assert forwarder.getNonce(user) == 15
+    assert membership_contract.validUntil(1) == expiry_before + 15 * 60
+    assert SpoolCursor(path).acked == path.stat().st_size
+
+
+def test_coalesced_cumulative_renewals_relay_once(forwarder, membership_contract, web3, tmp_path):
+    user = accounts.add()
+    relayer = accounts.add()
+    accounts[0].transfer(relayer, "10 ether")
+    membership_contract.mintMembership(user, 3600, {'from': accounts[0], 'value': 10**16})
+    expiry_before = membership_contract.validUntil(1)
+
+    # Three clicks signed cumulatively at the same forwarder nonce
+    path = tmp_path / "signed_requests.spool"
+    with SpoolWriter(path) as spool:
+        for seconds in (60, 120, 180):
+            request = _renew_request(membership_contract, user, 1, 0, seconds)
+            spool.append(request, sign_request(request, user.private_key))
+
+    start_nonce = web3.eth.get_transaction_count(relayer.address)
+    w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(web3.provider.endpoint_uri))
+    report = asyncio.run(
+        relay_spool(w3, forwarder.address, relayer.private_key, str(path), poll_interval=0.05, coalesce_window=1)
+    )
+
+    assert report["coalescer"]["merged"] == 2
+    assert report["confirmed"] == 1
+    assert web3.eth.get_transaction_count(relayer.address) - start_nonce == 1
+    assert forwarder.getNonce(user) == 1
+    assert membership_contract.validUntil(1) == expiry_before + 180
+    assert SpoolCursor(path).acked == path.stat().st_size
@@ -0,0 +1,207 @@
+import asyncio
+
+import rlp
+from eth_abi import decode
+from eth_account import Account
+from web3.exceptions import TransactionNotFound
+
+from scripts.forward_request import EXECUTED_TOPIC, FORWARD_REQUEST_ABI_TYPE
+from scripts.relayer_daemon import RelayerDaemon, RelayerPool
+
+FORWARDER = "0x" + "22" * 20
+RELAYER_KEY = "0x" + "01" * 32
+
+
+async def _value(value):
+    return value
+
+
+class _BrokeEth:
+    """
+    Just enough of AsyncWeb3.eth for a relayer key with no funds.
+    """
+
+    def __init__(self):
+        self.sent = []
+
+    @property
+    def chain_id(self):
+        return _value(1337)
+
+    @property
+    def gas_price(self):
+        return _value(10**9)
+
+    async def get_transaction_count(self, address, block="latest"):
+        return 0
+
+    async def get_balance(self, address, block="latest"):
+        return 0
+
+    async def send_raw_transaction(self, raw_tx):
+        self.sent.append(raw_tx)
+        return b"\x00" * 32
+
+
+class _FakeWeb3:
+    def __init__(self):
+        self.eth = _BrokeEth()
+
+
+def _request(nonce):
+    return {
+        "from": "0x" + "33" * 20, "to": "0x" + "44" * 20, "value": 0,
+        "gas": 100000, "nonce": nonce, "data": b"",
+    }
+
+
+async def _relay(daemon, count):
+    await daemon.start()
+    try:
+        for nonce in range(count):
+            await daemon.submit(_request(nonce), b"")
+        await asyncio.wait_for(daemon.drain(), 5)
+    finally:
+        await daemon.stop()
+
+
+def test_failed_reroute_settles_every_request():
+    w3 = _FakeWeb3()
+    daemon = RelayerDaemon(w3, FORWARDER, RELAYER_KEY, bundle_gas_budget=250000)
+    settled = []
+    daemon.on_settled = lambda bundle, receipt: settled.extend((r["nonce"], receipt) for r, _ in bundle)
+    rerouted = []
+
+    def reroute(items):
+        rerouted.append(len(items))
+        return False
+
+    daemon.reroute = reroute
+    asyncio.run(_relay(daemon, 5))
+
+    # Nothing was sent and nothing was lost: each request failed exactly once
+    assert w3.eth.sent == []
+    assert daemon.exhausted and rerouted
+    assert sorted(settled) == [(nonce, None) for nonce in range(5)]
+    assert daemon.stats.send_errors == 5
+
+
+def test_successful_reroute_moves_carry_and_queue():
+    daemon = RelayerDaemon(_FakeWeb3(), FORWARDER, RELAYER_KEY, bundle_gas_budget=250000)
+    rerouted = []
+
+    def reroute(items):
+        rerouted.extend(request["nonce"] for request, _ in items)
+        return True
+
+    daemon.reroute = reroute
+
+    async def run():
+        # Queue everything before the submitter runs, so the second bundle's
+        # first request is carried when the key runs dry
+        for nonce in range(5):
+            await daemon.submit(_request(nonce), b"")
+        await _relay(daemon, 0)
+
+    asyncio.run(run())
+    assert rerouted == [0, 1, 2, 3, 4]
+    assert daemon.stats.send_errors == 0
+
+
+def test_exhausted_key_only_moves_its_own_users():
+    keys = ["0x" + f"{i:02x}" * 32 for i in range(1, 5)]
+    pool = RelayerPool(_FakeWeb3(), FORWARDER, keys)
+    users = ["0x" + f"{i:040x}" for i in range(1, 401)]
+    before = {user: pool.daemon_for(user) for user in users}
+    # Every key gets a share of the users
+    assert {daemon.relayer.address for daemon in before.values()} == {daemon.relayer.address for daemon in pool.daemons}
+
+    dry = pool.daemons[1]
+    dry.exhausted = True
+    after = {user: pool.daemon_for(user) for user in users}
+    moved = [user for user in users if after[user] is not before[user]]
+    assert moved == [user for user in users if before[user] is dry]
+    assert all(after[user] is not dry for user in moved)
+
+
+class _Chain:
+    """
+    One fake chain shared by several relayer keys. Each key can pay for
+    `funded_txs` transactions; a transaction is mined `mine_after` receipt
+    polls after it was sent, and `log` records sends and mined receipts as
+    ("send" | "mined", forwarder nonce).
+    """
+
+    def __init__(self, funded_txs, mine_after=3):
+        self.funded_txs = funded_txs
+        self.mine_after = mine_after
+        self.spent = {}
+        self.polls = {}
+        self.txs = {}
+        self.log = []
+
+    @property
+    def chain_id(self):
+        return _value(1337)
+
+    @property
+    def gas_price(self):
+        return _value(10**9)
+
+    async def get_transaction_count(self, address, block="latest"):
+        return 0
+
+    async def get_balance(self, address, block="latest"):
+        # Exactly enough for `funded_txs` single-request transactions
+        return self.funded_txs.get(address, 0) * 160000 * 10**9 - self.spent.get(address, 0)
+
+    async def send_raw_transaction(self, raw_tx):
+        sender = Account.recover_transaction(raw_tx)
+        fields = rlp.decode(bytes(raw_tx))
+        self.spent[sender] = self.spent.get(sender, 0) + int.from_bytes(fields[1], "big") * int.from_bytes(fields[2], "big")
+        (request, _) = decode([FORWARD_REQUEST_ABI_TYPE, "bytes"], fields[5][4:])
+        tx_hash = len(self.txs).to_bytes(32, "big")
+        self.txs[tx_hash] = request
+        self.log.append(("send", request[4]))
+        return tx_hash
+
+    async def get_transaction_receipt(self, tx_hash):
+        self.polls[tx_hash] = self.polls.get(tx_hash, 0) + 1
+        if self.polls[tx_hash] <= self.mine_after:
+            raise TransactionNotFound(tx_hash)
+        request = self.txs[tx_hash]
+        if self.polls[tx_hash] == self.mine_after + 1:
+            self.log.append(("mined", request[4]))
+        log = {
+            "address": FORWARDER,
+            "topics": [EXECUTED_TOPIC, bytes(12) + bytes.fromhex(request[0][2:])],
+            "data": request[4].to_bytes(32, "big") + (1).to_bytes(32, "big"),
+        }
+        return {"status": 1, "gasUsed": 50000, "logs": [log]}
+
+
+def test_rerouted_user_keeps_its_nonce_order():
+    keys = ["0x" + "0a" * 32, "0x" + "0b" * 32]
+    chain = _Chain({})
+    w3 = _FakeWeb3()
+    w3.eth = chain
+    pool = RelayerPool(w3, FORWARDER, keys, poll_interval=0.01)
+    user = "0x" + "33" * 20
+    home = pool.daemon_for(user)
+    # The user's key can pay for two transactions, the other key for plenty
+    chain.funded_txs = {daemon.relayer.address: 2 if daemon is home else 100 for daemon in pool.daemons}
+
+    async def run():
+        await pool.start()
+        try:
+            for nonce in range(6):
+                await pool.submit(_request(nonce), b"")
+            await asyncio.wait_for(pool.drain(), 5)
+        finally:
+            await pool.stop()
+
+    asyncio.run(run())
+    assert home.exhausted and pool.stats.confirmed == 6
+    assert [nonce for event, nonce in chain.log if event == "send"] == list(range(6))
+    # Nonce 2 leaves the dry key only after nonces 0 and 1 were mined
+    assert chain.log.index(("send", 2)) > chain.log.index(("mined", 1))
@@ -0,0 +1,246 @@
+import asyncio
+
+import rlp
+from eth_abi import decode
+from eth_account import Account
+from eth_utils import to_checksum_address
+from web3.exceptions import TransactionNotFound
+
+from scripts.forward_request import (
+    EXECUTE_SELECTOR,
+    EXECUTED_TOPIC,
+    FORWARD_REQUEST_ABI_TYPE,
+    executed_requests,
+    sign_request,
+)
+from scripts.relayer_daemon import RelayerDaemon
+from scripts.request_verifier import NONCE_MISMATCH, RequestVerifier
+
+FORWARDER = "0x" + "22" * 20
+MEMBERSHIP = "0x" + "44" * 20
+RELAYER_KEY = "0x" + "01" * 32
+USER = Account.from_key("0x" + "02" * 32)
+
+
+async def _value(value):
+    return value
+
+
+def _gas_price(raw_tx):
+    return int.from_bytes(rlp.decode(bytes(raw_tx))[1], "big")
+
+
+def _forwarded(raw_tx):
+    """
+    (from, nonce) of every request in a signed execute / executeBatch transaction.
+    """
+    data = rlp.decode(bytes(raw_tx))[5]
+    if data[:4] == EXECUTE_SELECTOR:
+        requests = [decode([FORWARD_REQUEST_ABI_TYPE, "bytes"], data[4:])[0]]
+    else:
+        requests = decode([f"{FORWARD_REQUEST_ABI_TYPE}[]", "bytes[]"], data[4:])[0]
+    return [(to_checksum_address(request[0]), request[4]) for request in requests]
+
+
+def _executed_log(sender, nonce, success):
+    return {
+        "address": FORWARDER,
+        "topics": [EXECUTED_TOPIC, bytes(12) + bytes.fromhex(sender[2:])],
+        "data": nonce.to_bytes(32, "big") + int(success).to_bytes(32, "big"),
+    }
+
+
+class _FakeEth:
+    """
+    Just enough of AsyncWeb3.eth for a funded relayer key. getNonce always
+    answers `forwarder_nonce`; the first `fail_sends` sends raise, and every
+    mined transaction gets a receipt with `status`. In a successful one,
+    `outcome(sender, nonce)` decides each request's Executed log: its
+    success flag, or None for no log (request not executed). Transactions
+    priced below `min_gas_price` stay pending forever.
+    """
+
+    def __init__(self, fail_sends=0, status=1, outcome=lambda sender, nonce: True):
+        self.fail_sends = fail_sends
+        self.status = status
+        self.outcome = outcome
+        self.forwarder_nonce = 0
+        self.price = 10**9
+        self.min_gas_price = 0
+        self.sent = []
+        self.receipts = {}
+
+    @property
+    def chain_id(self):
+        return _value(1337)
+
+    @property
+    def gas_price(self):
+        return _value(self.price)
+
+    async def get_transaction_count(self, address, block="latest"):
+        return len(self.sent)
+
+    async def get_balance(self, address, block="latest"):
+        return 10**21
+
+    async def call(self, transaction, block="latest"):
+        return self.forwarder_nonce.to_bytes(32, "big")
+
+    async def send_raw_transaction(self, raw_tx):
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise ValueError("nonce too low")
+        self.sent.append(raw_tx)
+        tx_hash = len(self.sent).to_bytes(32, "big")
+        logs = []
+        if self.status == 1:
+            for sender, nonce in _forwarded(raw_tx):
+                success = self.outcome(sender, nonce)
+                if success is not None:
+                    logs.append(_executed_log(sender, nonce, success))
+        if _gas_price(raw_tx) >= self.min_gas_price:
+            self.receipts[tx_hash] = {"status": self.status, "gasUsed": 50000, "logs": logs}
+        return tx_hash
+
+    async def get_transaction_receipt(self, tx_hash):
+        if tx_hash not in self.receipts:
+            raise TransactionNotFound(tx_hash)
+        return self.receipts[tx_hash]
+
+
+class _FakeWeb3:
+    def __init__(self, **options):
+        self.eth = _FakeEth(**options)
+
+
+def _signed(nonce):
+    request = {"from": USER.address, "to": MEMBERSHIP, "value": 0, "gas": 100000, "nonce": nonce, "data": b""}
+    return request, sign_request(request, USER.key.hex())
+
+
+async def _relay(daemon, nonces):
+    await daemon.start()
+    try:
+        accepted = [await daemon.submit(*_signed(nonce)) for nonce in nonces]
+        await asyncio.wait_for(daemon.drain(), 5)
+    finally:
+        await daemon.stop()
+    return accepted
+
+
+def test_failed_send_lets_the_sender_resubmit_its_nonce():
+    w3 = _FakeWeb3(fail_sends=1)
+    verifier = RequestVerifier()
+    daemon = RelayerDaemon(w3, FORWARDER, RELAYER_KEY, verifier=verifier)
+
+    assert asyncio.run(_relay(daemon, [0, 1, 2])) == [True, True, True]
+    assert daemon.stats.send_errors == 1
+    # Nonce 0 never reached the forwarder, so its re-signed copy must be
+    # accepted instead of being checked against the cached nonce 3
+    assert asyncio.run(_relay(daemon, [0])) == [True]
+    assert verifier.expected_nonce(USER.address) == 1
+
+
+def test_reverted_request_lets_the_sender_resubmit_its_nonce():
+    w3 = _FakeWeb3(status=0)
+    verifier = RequestVerifier()
+    daemon = RelayerDaemon(w3, FORWARDER, RELAYER_KEY, verifier=verifier)
+
+    assert asyncio.run(_relay(daemon, [0])) == [True]
+    assert daemon.stats.reverted == 1
+    assert asyncio.run(_relay(daemon, [0])) == [True]
+    # The resubmission reverted too, so the cache is dropped again
+    assert verifier.needs_nonce(USER.address)
+
+
+def test_sent_requests_keep_their_cached_nonce():
+    verifier = RequestVerifier()
+    daemon = RelayerDaemon(_FakeWeb3(), FORWARDER, RELAYER_KEY, verifier=verifier)
+
+    assert asyncio.run(_relay(daemon, [0, 1])) == [True, True]
+    assert verifier.verify(*_signed(0)) == NONCE_MISMATCH
+    assert verifier.expected_nonce(USER.address) == 2
+
+
+def test_bundle_requests_are_counted_by_their_executed_event():
+    # Nonce 0 executes, nonce 1's call reverts inside the forwarder and
+    # nonce 2 fails verification: the transaction itself still succeeds
+    outcomes = {0: True, 1: False, 2: None}
+    w3 = _FakeWeb3(outcome=lambda sender, nonce: outcomes[nonce])
+    verifier = RequestVerifier()
+    daemon = RelayerDaemon(w3, FORWARDER, RELAYER_KEY, verifier=verifier, bundle_gas_budget=10**6)
+    settled = []
+    daemon.on_settled = lambda bundle, receipt: settled.append(len(bundle))
+
+    async def run():
+        # Queue all three before the submitter starts, so they share one bundle
+        for nonce in range(3):
+            await daemon.submit(*_signed(nonce))
+        await _relay(daemon, [])
+
+    asyncio.run(run())
+    assert len(w3.eth.sent) == 1 and settled == [3]
+    assert daemon.stats.confirmed == 1
+    assert daemon.stats.reverted == 2
+    # Nonce 2 was never used, so the sender's cached nonce is dropped
+    assert verifier.needs_nonce(USER.address)
+
+
+def test_executed_logs_of_other_contracts_are_ignored():
+    w3 = _FakeWeb3()
+    daemon = RelayerDaemon(w3, FORWARDER, RELAYER_KEY)
+    asyncio.run(_relay(daemon, [0]))
+    assert daemon.stats.confirmed == 1
+
+    receipt = w3.eth.receipts[next(iter(w3.eth.receipts))]
+    receipt["logs"][0]["address"] = MEMBERSHIP
+    assert executed_requests(receipt, FORWARDER) == {}
+    receipt["logs"][0]["address"] = FORWARDER
+    assert executed_requests(receipt, FORWARDER) == {(USER.address, 0): True}
+
+
+def test_gas_price_is_refreshed_between_transactions():
+    w3 = _FakeWeb3()
+    daemon = RelayerDaemon(w3, FORWARDER, RELAYER_KEY, gas_price_refresh=0)
+
+    async def run():
+        await daemon.start()
+        try:
+            await daemon.submit(*_signed(0))
+            await asyncio.wait_for(daemon.drain(), 5)
+            w3.eth.price = 3 * 10**9
+            await daemon.submit(*_signed(1))
+            await asyncio.wait_for(daemon.drain(), 5)
+        finally:
+            await daemon.stop()
+
+    asyncio.run(run())
+    assert [_gas_price(raw_tx) for raw_tx in w3.eth.sent] == [10**9, 3 * 10**9]
+
+
+def test_stuck_transaction_is_replaced_at_the_same_nonce():
+    w3 = _FakeWeb3()
+    # Nothing priced at 1 gwei gets mined; the market moves to 2 gwei
+    w3.eth.min_gas_price = 2 * 10**9
+    daemon = RelayerDaemon(w3, FORWARDER, RELAYER_KEY, poll_interval=0.01, replace_after=0.05)
+
+    async def run():
+        await daemon.start()
+        try:
+            await daemon.submit(*_signed(0))
+            await asyncio.sleep(0.08)
+            w3.eth.price = 2 * 10**9
+            await asyncio.wait_for(daemon.drain(), 5)
+        finally:
+            await daemon.stop()
+
+    asyncio.run(run())
+    nonces = {rlp.decode(bytes(raw_tx))[0] for raw_tx in w3.eth.sent}
+    prices = [_gas_price(raw_tx) for raw_tx in w3.eth.sent]
+    assert len(nonces) == 1 and len(prices) >= 2
+    # Every replacement pays at least 12.5% more than the one before
+    assert all(new >= old * 9 // 8 + 1 for old, new in zip(prices, prices[1:]))
+    assert prices[-1] >= 2 * 10**9
+    assert daemon.stats.replacements == len(prices) - 1
+    assert daemon.stats.confirmed == 1 and daemon.stats.send_errors == 0
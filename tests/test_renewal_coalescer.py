@@ -0,0 +1,154 @@
+import asyncio
+
+from scripts.relayer_daemon import CoalescingFeed
+from scripts.renewal_coalescer import (
+    HOLD_MARGIN,
+    RenewalCoalescer,
+    decode_meta_renew,
+    encode_meta_renew,
+    load_held,
+    plan_renewal,
+    replay,
+    save_held,
+    synthetic_clicks,
+)
+from scripts.request_spool import SpoolCursor, SpoolReader, SpoolWriter
+
+ALICE = "0x19E7E376E7C213B7E7e7e46cc70A5dD086DAff2A"
+BOB = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+MEMBERSHIP = "0x" + "11" * 20
+
+
+def _renewal(sender, nonce, token_id, seconds):
+    return {
+        "from": sender, "to": MEMBERSHIP, "value": 0, "gas": 100000,
+        "nonce": nonce, "data": encode_meta_renew(token_id, seconds, sender),
+    }
+
+
+def test_cumulative_renewals_merge_within_window():
+    coalescer = RenewalCoalescer(window=60)
+    assert coalescer.add(_renewal(ALICE, 5, 1, 100), b"a", now=0, tag="a") == []
+    assert coalescer.add(_renewal(ALICE, 5, 1, 300), b"b", now=10, tag="b") == []
+    assert coalescer.add(_renewal(ALICE, 6, 2, 50), b"c", now=20, tag="c") == []
+    # Same nonce but a smaller duration is not cumulative: dropped
+    assert coalescer.add(_renewal(ALICE, 5, 1, 200), b"d", now=30, tag="d") == ["d"]
+    assert coalescer.add(_renewal(BOB, 0, 3, 100), b"e", now=30, tag="e") == []
+
+    assert coalescer.due(59) == []
+    released = coalescer.due(60)
+    assert [(r["nonce"], decode_meta_renew(r["data"])[1], sig, tags) for r, sig, tags in released] == [
+        (5, 300, b"b", ["a", "b"]),
+    ]
+    released = coalescer.flush()
+    assert [(r["from"], r["nonce"]) for r, _, _ in released] == [(ALICE, 6), (BOB, 0)]
+    assert coalescer.stats.report() == {
+        "received": 5, "released": 3, "merged": 1, "conflicts": 1, "seconds_merged": 100,
+    }
+
+
+def test_lower_nonces_are_released_first():
+    coalescer = RenewalCoalescer(window=10)
+    coalescer.add(_renewal(ALICE, 8, 1, 60), b"", now=0)
+    coalescer.add(_renewal(ALICE, 7, 1, 60), b"", now=5)
+    # Nonce 8 is due; nonce 7 must go out before it even though it arrived later
+    assert [r["nonce"] for r, _, _ in coalescer.due(10)] == [7, 8]
+    assert len(coalescer) == 0 and coalescer.next_deadline() is None
+
+
+def test_plan_renewal_reads_unacked_spool_records(tmp_path):
+    path = str(tmp_path / "signed.spool")
+    assert plan_renewal(path, ALICE, 0, 1, now=0) == (0, 0)
+    with SpoolWriter(path) as spool:
+        first = spool.append(_renewal(ALICE, 0, 1, 100), bytes(65))
+        spool.append(_renewal(ALICE, 0, 1, 250), bytes(65))
+
+    # Without a coalescing relayer holding it, a waiting nonce is never reused
+    assert plan_renewal(path, ALICE, 0, 1, now=0) == (1, 0)
+    save_held(path, {ALICE: {0: 60}})
+    assert plan_renewal(path, ALICE, 0, 1, now=0) == (0, 250)
+    assert plan_renewal(path, BOB, 0, 1, now=0) == (0, 0)
+    # Already mined on chain: ignored
+    assert plan_renewal(path, ALICE, 1, 1, now=0) == (1, 0)
+
+    # Once the relayer has acknowledged them they are no longer waiting
+    cursor = SpoolCursor(path)
+    with SpoolReader(path) as reader:
+        cursor.acked = reader.size
+    cursor.save()
+    assert first == 8 and plan_renewal(path, ALICE, 0, 1, now=0) == (0, 0)
+
+
+def test_plan_renewal_never_reuses_a_released_nonce(tmp_path):
+    path = str(tmp_path / "signed.spool")
+    with SpoolWriter(path) as spool:
+        spool.append(_renewal(ALICE, 0, 1, 100), bytes(65))
+    save_held(path, {ALICE: {0: 60}})
+    assert plan_renewal(path, ALICE, 0, 1, now=0) == (0, 100)
+    # Too close to the deadline: the relayer may release it before it reads a new record
+    assert plan_renewal(path, ALICE, 0, 1, now=60 - HOLD_MARGIN + 1) == (1, 0)
+
+    # Released and sent, but neither mined nor acknowledged yet: the
+    # renewal must not be signed over nonce 0, or it would be lost
+    save_held(path, {})
+    assert plan_renewal(path, ALICE, 0, 1, now=0) == (1, 0)
+    assert load_held(path) == {}
+
+
+def test_plan_renewal_two_tokens_same_sender(tmp_path):
+    path = str(tmp_path / "signed.spool")
+    save_held(path, {ALICE: {0: 60, 1: 61}})
+    with SpoolWriter(path) as spool:
+        spool.append(_renewal(ALICE, 0, 1, 100), bytes(65))
+    # Token 2 must not take (and lose to) the nonce held by token 1
+    nonce, held = plan_renewal(path, ALICE, 0, 2, now=0)
+    assert (nonce, held) == (1, 0)
+    with SpoolWriter(path) as spool:
+        spool.append(_renewal(ALICE, nonce, 2, 50), bytes(65))
+    # Token 1 again: its renewal is no longer the newest, so a new nonce
+    assert plan_renewal(path, ALICE, 0, 1, now=0) == (2, 0)
+    assert plan_renewal(path, ALICE, 0, 2, now=0) == (1, 50)
+
+    # Same clicks through the coalescer: nothing is dropped
+    coalescer = RenewalCoalescer(window=60)
+    clicks = [(0, 0, 1, 100, "repeat"), (1, 0, 2, 50, "repeat"), (2, 0, 1, 100, "repeat")]
+    report = replay(window=60, clicks=clicks)
+    assert report["coalescer"]["conflicts"] == 0
+    assert report["coalesced_txs"] == 3
+    coalescer.add(_renewal(ALICE, 0, 1, 100), b"", now=0)
+    coalescer.add(_renewal(ALICE, 1, 2, 50), b"", now=1)
+    assert coalescer.last_held(ALICE)["nonce"] == 1 and coalescer.last_held(BOB) is None
+
+
+def test_replay_saves_transactions_without_losing_seconds():
+    clicks = synthetic_clicks(members=60, days=3, seed=7)
+    off = replay(window=0, clicks=clicks)
+    on = replay(window=3600, clicks=clicks)
+
+    assert off["coalesced_txs"] == off["clicks"] and off["txs_saved"] == 0
+    assert on["coalesced_txs"] < on["clicks"]
+    assert on["txs_saved"] == on["coalescer"]["merged"]
+    assert 0 < on["txs_saved_pct"] < 100
+    assert on["coalescer"]["conflicts"] == 0
+
+
+def test_feed_withdraws_held_nonces_before_sending_them(tmp_path):
+    path = str(tmp_path / "signed.spool")
+    sent = []
+
+    async def send(request, signature, tags):
+        # By the time a request goes out, signers no longer see it as held
+        sent.append((request["nonce"], load_held(path)))
+
+    async def run():
+        feed = CoalescingFeed(send, window=0.05, poll_interval=0.01, spool_path=path)
+        await feed.start()
+        await feed.add(_renewal(ALICE, 0, 1, 100), b"")
+        await asyncio.sleep(0.02)
+        assert set(load_held(path)[ALICE]) == {0}
+        await asyncio.sleep(0.1)
+        await feed.add(_renewal(ALICE, 1, 1, 100), b"")
+        await feed.close()
+
+    asyncio.run(run())
+    assert sent == [(0, {}), (1, {})]
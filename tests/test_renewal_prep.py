@@ -0,0 +1,44 @@
+from eth_abi import decode, encode
+
+from scripts.forward_request import load_key
+from scripts.renewal_prep import NonceAllocator, prepare_renewals
+
+FORWARDER = "0x" + "22" * 20
+KEYS = ["0x" + f"{i:02x}" * 32 for i in range(1, 4)]
+ADDRESSES = [load_key(key).public_key.to_checksum_address() for key in KEYS]
+
+
+class FakeClient:
+    """
+    Answers getNonce eth_calls from `nonces` and counts batches.
+    """
+
+    def __init__(self, nonces):
+        self.nonces = {address.lower(): nonce for address, nonce in nonces.items()}
+        self.batches = []
+
+    def call_many(self, calls, block, raise_errors=False):
+        self.batches.append(len(calls))
+        return [encode(["uint256"], [self.nonces[decode(["address"], data[4:])[0]]]) for _to, data in calls]
+
+
+def test_nonces_are_prefetched_per_cohort_and_assigned_consecutively():
+    client = FakeClient(dict(zip(ADDRESSES, (5, 0, 9))))
+    rows = [
+        (KEYS[0], 1, 60, None),
+        (KEYS[1], 2, 60, None),
+        (KEYS[0], 3, 60, None),
+        (KEYS[2], 4, 60, 12),
+        (KEYS[0], 5, 60, None),
+        (KEYS[2], 6, 60, None),
+    ]
+    allocator = NonceAllocator(client, FORWARDER)
+
+    prepared = list(prepare_renewals(rows, allocator, cohort_size=4))
+
+    assert [nonce for *_, nonce in prepared] == [5, 0, 6, 12, 7, 13]
+    assert [row[:3] for row in prepared] == [row[:3] for row in rows]
+    # One batch for the blank-nonce users of cohort 1; user 2 is read when its
+    # explicit nonce is assigned, so later rows continue from the higher value
+    assert client.batches == [2, 1]
+    assert allocator.fetched == 3
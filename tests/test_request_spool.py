@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from scripts.request_spool import (
+    HEADER_SIZE,
+    AckTracker,
+    SpoolCorruptError,
+    SpoolCursor,
+    SpoolReader,
+    SpoolWriter,
+    encode_record,
+)
+
+USER = "0x19E7E376E7C213B7E7e7e46cc70A5dD086DAff2A"
+MEMBERSHIP = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+
+
+def _request(nonce, data=b"\x01" * 100):
+    return {"from": USER, "to": MEMBERSHIP, "value": 10**16, "gas": 100000, "nonce": nonce, "data": data}
+
+
+def test_spool_round_trip_and_append(tmp_path):
+    path = tmp_path / "signed.spool"
+    signature = bytes(range(65))
+    with SpoolWriter(path) as writer:
+        offsets = [writer.append(_request(nonce), signature) for nonce in range(3)]
+    # Reopening appends after the existing records
+    with SpoolWriter(path) as writer:
+        offsets.append(writer.append(_request(3, b""), signature))
+
+    assert offsets[0] == HEADER_SIZE
+    assert os.path.getsize(path) == HEADER_SIZE + 3 * 285 + 185
+
+    with SpoolReader(path) as reader:
+        records = list(reader.records())
+        assert [offset for offset, _, _, _ in records] == offsets
+        assert [request["nonce"] for _, _, request, _ in records] == [0, 1, 2, 3]
+        _, end, request, sig = records[1]
+        assert request == _request(1) and sig == signature
+        assert end == offsets[2]
+        # Resume from an offset in the middle
+        assert [r["nonce"] for _, _, r, _ in reader.records(offsets[2])] == [2, 3]
+        assert reader.senders(HEADER_SIZE, offsets[2]) == [USER]
+
+
+def test_torn_tail_is_skipped_then_truncated(tmp_path):
+    path = tmp_path / "signed.spool"
+    with SpoolWriter(path) as writer:
+        writer.append(_request(0), b"\x00" * 65)
+    good_size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(encode_record(_request(1), b"\x00" * 65)[:100])
+
+    with SpoolReader(path) as reader:
+        assert len(list(reader.records())) == 1
+
+    writer = SpoolWriter(path)
+    assert writer.truncated == 100
+    writer.append(_request(1), b"\x00" * 65)
+    writer.close()
+    assert os.path.getsize(path) == good_size + 285
+
+    # A complete record with a bad checksum is an error, not a torn tail
+    with open(path, "r+b") as f:
+        f.seek(good_size + 20)
+        f.write(b"\xff")
+    with SpoolReader(path) as reader, pytest.raises(SpoolCorruptError):
+        list(reader.records())
+
+
+def test_ack_tracker_and_cursor(tmp_path):
+    tracker = AckTracker()
+    for offset in (8, 293, 578):
+        tracker.track(offset, offset + 285)
+
+    assert not tracker.ack(293)       # the first record is still out
+    assert tracker.acked == HEADER_SIZE
+    assert tracker.ack(8)
+    assert tracker.acked == 578 and len(tracker) == 1
+
+    path = tmp_path / "signed.spool"
+    cursor = SpoolCursor(path)
+    assert (cursor.acked, cursor.sent) == (HEADER_SIZE, HEADER_SIZE)
+    assert cursor.lease(293, lease_bytes=1000)
+    assert not cursor.lease(1000, lease_bytes=1000)   # still inside the lease
+    cursor.acked = tracker.acked
+    cursor.save()
+
+    with open(f"{path}.ack") as f:
+        assert json.load(f) == {"acked": 578, "sent": 1293}
+    resumed = SpoolCursor(path)
+    assert (resumed.acked, resumed.sent) == (578, 1293)
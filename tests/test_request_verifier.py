@@ -0,0 +1,84 @@
+import pytest
+from brownie import MinimalForwarder, accounts
+
+from scripts.forward_request import sign_request
+from scripts.request_verifier import BAD_SIGNATURE, NONCE_MISMATCH, RequestVerifier
+
+
+@pytest.fixture
+def forwarder():
+    yield MinimalForwarder.deploy({'from': accounts[0]})
+
+
+def _request(user, nonce, data=b"\x48\xce\x24\x0c"):
+    return {
+        "from": user.address,
+        "to": accounts[1].address,
+        "value": 0,
+        "gas": 100000,
+        "nonce": nonce,
+        "data": data,
+    }
+
+
+def _on_chain(forwarder, request, signature):
+    req = [request["from"], request["to"], request["value"], request["gas"], request["nonce"], request["data"]]
+    return forwarder.verify(req, signature)
+
+
+def test_verifier_matches_forwarder(forwarder):
+    user = accounts.add()
+    other = accounts.add()
+    good = _request(user, 0, data=bytes(range(200)))
+    good_sig = sign_request(good, user.private_key)
+    wrong_nonce = _request(user, 1)
+    high_v = bytearray(good_sig)
+    high_v[64] = 29
+
+    cases = [
+        (good, good_sig),
+        (good, sign_request(good, other.private_key)),
+        (wrong_nonce, sign_request(wrong_nonce, user.private_key)),
+        (good, good_sig[:64]),
+        (good, bytes(high_v)),
+        (good, bytes(65)),
+        (_request(user, 0, data=b""), good_sig),
+    ]
+
+    for request, signature in cases:
+        verifier = RequestVerifier(get_nonce=forwarder.getNonce)
+        assert (verifier.verify(request, signature) is None) == _on_chain(forwarder, request, signature)
+
+
+def test_verify_batch_tracks_consecutive_nonces(forwarder):
+    user = accounts.add()
+    items = []
+    for nonce in (0, 1, 1, 3):
+        request = _request(user, nonce)
+        items.append((request, sign_request(request, user.private_key)))
+    forged = _request(user, 2)
+    items.append((forged, sign_request(forged, accounts.add().private_key)))
+
+    verifier = RequestVerifier(get_nonce=forwarder.getNonce)
+    assert verifier.verify_batch(items) == [None, None, NONCE_MISMATCH, NONCE_MISMATCH, BAD_SIGNATURE]
+    assert verifier.expected_nonce(user.address) == 2
+
+
+def test_forwarder_accepts_existing_client_signatures(forwarder):
+    # Signed once with forward_request.sign_request against the original
+    # per-call domain hashing; must keep verifying after the cached-domain change
+    request = {
+        "from": "0x19E7E376E7C213B7E7e7e46cc70A5dD086DAff2A",
+        "to": "0x" + "22" * 20,
+        "value": 0,
+        "gas": 100000,
+        "nonce": 0,
+        "data": b"\x48\xce\x24\x0c",
+    }
+    signature = bytes.fromhex(
+        "12018885c12033287dfc0e36cab9764f155b570eccfea81cc61202c74080bb17"
+        "133bd384e3799b6beed3379e1699bab988dde5836e7aca17f709c218ea2bb4da1c"
+    )
+
+    assert sign_request(request, "0x" + "11" * 32) == signature
+    assert _on_chain(forwarder, request, signature)
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scripts.rpc_client import RpcClient, RpcError, token_owners
+from scripts.rpc_web3 import InstrumentedAsyncHTTPProvider, InstrumentedHTTPProvider
+
+
+class FakeNode:
+    """
+    Tiny JSON-RPC endpoint: answers eth_blockNumber and eth_call (ownerOf
+    reverts for ids above 2) and eth_sendRawTransaction, returns HTTP
+    `throttle_status` (429) for the first `throttle` requests, and closes
+    the connection without answering the first `drop` ones.
+    """
+
+    def __init__(self, throttle=0):
+        self.throttle = throttle
+        self.throttle_status = 429
+        self.drop = 0
+        self.posts = 0
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                node.posts += 1
+                if node.drop:
+                    node.drop -= 1
+                    self.close_connection = True
+                    return
+                if node.throttle:
+                    node.throttle -= 1
+                    self._send(node.throttle_status, b"", {"Retry-After": "0"})
+                    return
+                if isinstance(payload, list):
+                    body = [node.answer(entry) for entry in payload][::-1]  # order is not guaranteed
+                else:
+                    body = node.answer(payload)
+                self._send(200, json.dumps(body).encode())
+
+            def _send(self, status, body, headers=None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, entry):
+        if entry["method"] == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": entry["id"], "result": "0x10"}
+        if entry["method"] == "eth_sendRawTransaction":
+            return {"jsonrpc": "2.0", "id": entry["id"], "result": "0x" + "ab" * 32}
+        token_id = int(entry["params"][0]["data"][10:], 16)
+        if token_id > 2:
+            return {"jsonrpc": "2.0", "id": entry["id"], "error": {"code": 3, "message": "execution reverted"}}
+        return {"jsonrpc": "2.0", "id": entry["id"], "result": "0x" + "00" * 12 + f"{token_id:040x}"}
+
+
+@pytest.fixture
+def node():
+    fake = FakeNode()
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+
+def test_batch_keeps_order_and_counts_round_trips(node):
+    client = RpcClient(node.url, max_batch_size=3)
+
+    owners = token_owners(client, "0x" + "11" * 20, range(1, 6))
+
+    assert owners[1] == "0x0000000000000000000000000000000000000001"
+    assert owners[2] == "0x0000000000000000000000000000000000000002"
+    assert owners[3] is owners[4] is owners[5] is None
+    report = client.stats.report()
+    assert report["round_trips"] == 2 == node.posts
+    assert report["methods"]["eth_call"]["calls"] == 5
+    assert report["methods"]["eth_call"]["errors"] == 3
+
+    with pytest.raises(RpcError):
+        client.batch([("eth_blockNumber", []), ("eth_call", [{"to": "0x", "data": "0x" + "00" * 35 + "09"}])])
+
+
+def test_retries_rate_limited_requests(node):
+    node.throttle = 2
+    client = RpcClient(node.url, backoff=0.001)
+
+    assert client.block_number() == 16
+    assert node.posts == 3
+    assert client.stats.report()["methods"]["eth_blockNumber"]["retries"] == 2
+
+    node.throttle = 5
+    with pytest.raises(Exception):
+        RpcClient(node.url, max_retries=1, backoff=0.001).block_number()
+
+
+def test_transaction_sends_are_not_retried_after_5xx(node):
+    client = RpcClient(node.url, backoff=0.001)
+    provider = InstrumentedHTTPProvider(node.url, client.stats, backoff=0.001)
+
+    # A 503 may come after the node accepted the transaction: no second send
+    for send in (
+        lambda: client.call("eth_sendRawTransaction", ["0x01"]),
+        lambda: provider.make_request("eth_sendRawTransaction", ["0x01"]),
+    ):
+        node.throttle, node.throttle_status, node.posts = 1, 503, 0
+        with pytest.raises(Exception):
+            send()
+        assert node.posts == 1
+
+    # Reads still are, and a 429 means the send was refused, so it is retried
+    node.throttle, node.posts = 1, 0
+    assert client.block_number() == 16 and node.posts == 2
+    node.throttle, node.throttle_status, node.posts = 1, 429, 0
+    assert provider.make_request("eth_sendRawTransaction", ["0x01"])["result"] == "0x" + "ab" * 32
+    assert node.posts == 2
+
+
+def test_providers_retry_dropped_connections_for_reads_only(node):
+    client = RpcClient(node.url, backoff=0.001)
+    provider = InstrumentedHTTPProvider(node.url, client.stats, backoff=0.001)
+    async_provider = InstrumentedAsyncHTTPProvider(node.url, client.stats, backoff=0.001)
+
+    async def async_request(method, params):
+        try:
+            return await async_provider.make_request(method, params)
+        finally:
+            await async_provider.disconnect()
+
+    for make_request in (provider.make_request, lambda *args: asyncio.run(async_request(*args))):
+        node.drop, node.posts = 2, 0
+        assert make_request("eth_blockNumber", [])["result"] == "0x10"
+        assert node.posts == 3
+
+        # The node may have read the transaction before the connection broke
+        node.drop, node.posts = 1, 0
+        with pytest.raises(Exception):
+            make_request("eth_sendRawTransaction", ["0x01"])
+        assert node.posts == 1
+    assert client.stats.report()["methods"]["eth_blockNumber"]["retries"] == 4